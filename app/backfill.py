@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from src.kg.deduplicate import batch_generate_embeddings
+
+class EmbeddingBackfill:
+    """
+    Runs batch_generate_embeddings as a background task so startup does not
+    wait for it. Only one backfill runs at a time; its progress is kept for
+    the status endpoint.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._status = {"status": "idle"}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> dict:
+        return dict(self._status)
+
+    def _progress(self, processed: int, failed: int, total: int):
+        self._status.update(processed=processed, failed=failed, total=total)
+
+    def start(self, project_id: Optional[int] = None) -> dict:
+        """Start a backfill unless one is already running. Returns the current status."""
+        if self.running:
+            return self.status()
+        self._status = {
+            "status": "running",
+            "project_id": project_id,
+            "processed": 0,
+            "failed": 0,
+            "total": None,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+            "error": None
+        }
+        self._task = asyncio.create_task(self._run(project_id))
+        return self.status()
+
+    async def _run(self, project_id: Optional[int]):
+        try:
+            await batch_generate_embeddings(project_id=project_id, progress=self._progress)
+            self._status["status"] = "completed"
+        except asyncio.CancelledError:
+            self._status["status"] = "cancelled"
+            logging.info("Embedding backfill cancelled")
+            raise
+        except Exception as e:
+            self._status.update(status="failed", error=str(e))
+            logging.error(f"Embedding backfill failed: {e}", exc_info=True)
+        finally:
+            self._status["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+    async def cancel(self) -> dict:
+        """Cancel the running backfill (if any) and wait for it to stop."""
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        return self.status()
+
+# Process-wide backfill, started in the background at application startup
+embedding_backfill = EmbeddingBackfill()
@@ -1,24 +1,43 @@
 import time
+import asyncio
 import logging
+import threading
+from typing import Optional
 from neo4j import GraphDatabase
 from neo4j.exceptions import ServiceUnavailable
-from app.config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from app.metrics import InstrumentedSession
+from app.config import (
+    NEO4J_URI,
+    NEO4J_USER,
+    NEO4J_PASSWORD,
+    NEO4J_MAX_CONNECTION_POOL_SIZE,
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+    NEO4J_MAX_CONNECTION_LIFETIME,
+)
 
 class Neo4jDriver:
     def __init__(self):
-        # Configure driver with a max retry time
+        # Configure driver with pool settings from config
         self.driver = GraphDatabase.driver(
-            NEO4J_URI, 
+            NEO4J_URI,
             auth=(NEO4J_USER, NEO4J_PASSWORD),
-            max_connection_lifetime=3600  # 1 hour in seconds
+            max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+            max_connection_pool_size=NEO4J_MAX_CONNECTION_POOL_SIZE,
+            connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT
         )
+        # Acquisition counters used by get_pool_stats()
+        self._stats_lock = threading.Lock()
+        self._acquisitions = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._instrument_pool()
         # Test connection when initializing
         self._test_connection()
 
     def _test_connection(self, max_attempts=3, retry_delay=1):
         attempt = 0
         last_error = None
-        
+
         while attempt < max_attempts:
             try:
                 self.driver.verify_connectivity()
@@ -29,46 +48,127 @@ class Neo4jDriver:
                 if attempt < max_attempts:
                     logging.debug(f"Connection test attempt {attempt}/{max_attempts} failed: {e}")
                     time.sleep(retry_delay)
-        
+
         logging.warning(f"Failed to connect to Neo4j during driver init: {last_error}")
         return False
 
+    def _instrument_pool(self):
+        # The driver does not publish pool metrics, so time calls to the
+        # pool's acquire() to learn how long sessions wait for a connection.
+        pool = getattr(self.driver, "_pool", None)
+        acquire = getattr(pool, "acquire", None)
+        if acquire is None:
+            logging.debug("Neo4j pool does not expose acquire(); wait time stats disabled")
+            return
+
+        def timed_acquire(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return acquire(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._stats_lock:
+                    self._acquisitions += 1
+                    self._total_wait_seconds += elapsed
+                    self._max_wait_seconds = max(self._max_wait_seconds, elapsed)
+
+        pool.acquire = timed_acquire
+
+    def get_pool_stats(self) -> dict:
+        """
+        Return a snapshot of the connection pool.
+
+        Returns:
+            dict: Connections in use and idle, the configured maximum and
+            cumulative connection acquisition wait times
+        """
+        in_use = 0
+        idle = 0
+        pool = getattr(self.driver, "_pool", None)
+        connections = getattr(pool, "connections", {}) or {}
+        for address_connections in list(connections.values()):
+            for connection in list(address_connections):
+                if getattr(connection, "in_use", False):
+                    in_use += 1
+                else:
+                    idle += 1
+
+        with self._stats_lock:
+            acquisitions = self._acquisitions
+            total_wait = self._total_wait_seconds
+            max_wait = self._max_wait_seconds
+
+        return {
+            "in_use": in_use,
+            "idle": idle,
+            "max_size": NEO4J_MAX_CONNECTION_POOL_SIZE,
+            "acquisition_timeout_seconds": NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+            "acquisitions": acquisitions,
+            "total_wait_seconds": round(total_wait, 6),
+            "avg_wait_seconds": round(total_wait / acquisitions, 6) if acquisitions else 0.0,
+            "max_wait_seconds": round(max_wait, 6)
+        }
+
     def close(self):
         self.driver.close()
 
     def get_session(self):
-        return self.driver.session()
+        # Queries run through the session are timed for /metrics
+        return InstrumentedSession(self.driver.session())
+
+# Process-wide driver shared by all requests
+_driver: Optional[Neo4jDriver] = None
+_driver_lock = threading.Lock()
+
+def get_driver() -> Neo4jDriver:
+    """Return the application-scoped Neo4j driver, creating it on first use."""
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = Neo4jDriver()
+    return _driver
+
+def close_driver():
+    """Close the application-scoped Neo4j driver (called on shutdown)."""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
 
 # Dependency to get Neo4j session
 def get_db():
-    db = Neo4jDriver()
-    try:
-        yield db
-    finally:
-        db.close()
+    # The shared driver owns the connection pool and is closed on shutdown,
+    # so there is nothing to clean up per request.
+    yield get_driver()
+
+def _create_constraints(db: Neo4jDriver):
+    with db.get_session() as session:
+        # Create a uniqueness constraint on email
+        # This prevents duplicate emails but allows null emails
+        session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (p:Person) REQUIRE p.email IS UNIQUE")
 
 # Initialize the database with constraints
 async def init_db():
-    db = Neo4jDriver()
+    # Creating the driver tests connectivity (with retries), so do it off the event loop
+    db = await asyncio.to_thread(get_driver)
     max_attempts = 20
     retry_delay = 3  # seconds
     attempt = 0
-    
+
     while attempt < max_attempts:
         try:
-            with db.get_session() as session:
-                # Create a uniqueness constraint on email
-                # This prevents duplicate emails but allows null emails
-                session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (p:Person) REQUIRE p.email IS UNIQUE")
-                logging.info("Successfully connected to Neo4j and created constraints")
-                break
+            # Run the blocking driver call in a worker thread so startup does not block the event loop
+            await asyncio.to_thread(_create_constraints, db)
+            logging.info("Successfully connected to Neo4j and created constraints")
+            break
         except ServiceUnavailable as e:
             attempt += 1
             if attempt < max_attempts:
                 logging.warning(f"Neo4j connection attempt {attempt}/{max_attempts} failed: {e}. Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+                await asyncio.sleep(retry_delay)
             else:
                 logging.error(f"Failed to connect to Neo4j after {max_attempts} attempts: {e}")
                 # Continue with application startup even if we can't connect to Neo4j
                 # This allows the FastAPI app to start and show appropriate errors later
-    db.close()
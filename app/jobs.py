@@ -0,0 +1,292 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from fastapi import HTTPException
+from sqlalchemy import func, or_, select, update
+from app.config import JOB_WORKER_CONCURRENCY, JOB_WORKER_ID, JOB_HEARTBEAT_INTERVAL, JOB_STALE_SECONDS
+from app.database import get_driver
+from app.postgres_db import get_postgres_driver
+from app.models.postgres_models import Job
+from app.utils.pagination import invalidate_cached_totals
+from src.kg.kg import extract_knowledge_graph_from_text, knowledge_graph_to_dict
+from src.kg.store import store_knowledge_graph
+from src.kg.embeddings import entity_embedding_text, agenerate_embeddings
+
+# Jobs in these states will not change again
+TERMINAL_STATUSES = ("completed", "failed")
+
+def job_to_dict(job: Job) -> dict:
+    """Serialize a job for API responses (the input text is left out)."""
+    def iso(value):
+        return value.isoformat() if value else None
+    return {
+        "id": job.id,
+        "project_id": job.project_id,
+        "creator_email": job.creator_email,
+        "source_name": job.source_name,
+        "store": job.store,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "message": job.message,
+        "result": job.result,
+        "error": job.error,
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+        "updated_at": iso(job.updated_at),
+        "worker_id": job.worker_id,
+        "heartbeat_at": iso(job.heartbeat_at)
+    }
+
+class JobRunner:
+    """
+    In-process worker pool for ingestion jobs.
+
+    Each job runs the pipeline extract -> embed -> store. Job state is persisted
+    in the Postgres jobs table after every stage, so it can be polled from any
+    process, and in-process subscribers are notified of each change.
+
+    Several processes may share the jobs table. Each running job records its
+    owner (worker_id) and a heartbeat; only jobs whose heartbeat is stale, or
+    that this worker id owned before a restart, are marked failed.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY, worker_id: str = JOB_WORKER_ID):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._resume: Optional[asyncio.Task] = None
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    def _session(self):
+        return get_postgres_driver().AsyncSessionLocal()
+
+    async def start(self):
+        """
+        Start the workers and the heartbeat. Jobs left over from a previous run are
+        picked up in the background, retrying until Postgres is reachable, so an
+        unavailable database does not hold up or abort application startup.
+        """
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        self._resume = asyncio.create_task(self._resume_jobs())
+        logging.info(f"Started {self.concurrency} job workers as {self.worker_id}")
+
+    async def _resume_jobs(self):
+        while True:
+            try:
+                async with self._session() as session:
+                    # Jobs that were mid-pipeline may have partially run; do not repeat them
+                    interrupted = await self._fail_interrupted_jobs(session, include_own=True)
+                    result = await session.execute(select(Job.id).where(Job.status == "queued").order_by(Job.id))
+                    queued = result.scalars().all()
+                break
+            except Exception as e:
+                logging.warning(f"Could not resume jobs, retrying in {JOB_HEARTBEAT_INTERVAL}s: {e}")
+                await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+        if interrupted:
+            logging.info(f"Marked {interrupted} interrupted jobs as failed")
+        for job_id in queued:
+            self._queue.put_nowait(job_id)
+        if queued:
+            logging.info(f"Resuming {len(queued)} queued jobs")
+
+    async def stop(self):
+        tasks = self._workers + [task for task in (self._heartbeat, self._resume) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        self._resume = None
+
+    async def _fail_interrupted_jobs(self, session, include_own: bool = False) -> int:
+        """
+        Mark running jobs failed when their owner stopped heartbeating for JOB_STALE_SECONDS,
+        or, with include_own (at startup), when they belong to this worker id. Jobs of
+        other live processes are left alone.
+        """
+        now = datetime.now(timezone.utc)
+        stale = func.coalesce(Job.heartbeat_at, Job.started_at, Job.created_at) < now - timedelta(seconds=JOB_STALE_SECONDS)
+        condition = or_(stale, Job.worker_id == self.worker_id) if include_own else stale
+        result = await session.execute(
+            update(Job)
+            .where(Job.status == "running", condition)
+            .values(status="failed", error="Interrupted: the worker running it stopped", finished_at=now)
+        )
+        await session.commit()
+        return result.rowcount
+
+    async def _heartbeat_loop(self):
+        """Refresh the heartbeat of this process's running jobs and fail jobs abandoned by others."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                async with self._session() as session:
+                    await session.execute(
+                        update(Job)
+                        .where(Job.status == "running", Job.worker_id == self.worker_id)
+                        .values(heartbeat_at=datetime.now(timezone.utc))
+                    )
+                    await session.commit()
+                    interrupted = await self._fail_interrupted_jobs(session)
+                if interrupted:
+                    logging.warning(f"Marked {interrupted} jobs with a stale heartbeat as failed")
+            except Exception as e:
+                logging.warning(f"Job heartbeat failed: {e}")
+
+    async def submit(self, project_id: int, user_email: str, text: str, store: bool = True, source_name: Optional[str] = None) -> dict:
+        """Persist a new job and queue it. Returns the job without waiting for it to run."""
+        async with self._session() as session:
+            job = Job(
+                project_id=project_id,
+                creator_email=user_email,
+                source_name=source_name,
+                input_text=text,
+                store=store,
+                status="queued",
+                progress=0.0,
+                message="Waiting for a worker"
+            )
+            session.add(job)
+            await session.commit()
+            await session.refresh(job)
+            self._queue.put_nowait(job.id)
+            return job_to_dict(job)
+
+    async def get(self, job_id: int) -> Optional[dict]:
+        async with self._session() as session:
+            job = await session.get(Job, job_id)
+            return job_to_dict(job) if job else None
+
+    async def list_jobs(self, project_id: int, limit: int = 20) -> List[dict]:
+        async with self._session() as session:
+            result = await session.execute(
+                select(Job).where(Job.project_id == project_id).order_by(Job.id.desc()).limit(limit)
+            )
+            return [job_to_dict(job) for job in result.scalars().all()]
+
+    def subscribe(self, job_id: int) -> asyncio.Queue:
+        """Return a queue that receives the job dict after every state change."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    async def _update(self, job_id: int, **fields) -> dict:
+        """Persist job fields and notify subscribers."""
+        async with self._session() as session:
+            job = await session.get(Job, job_id)
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = datetime.now(timezone.utc)
+            await session.commit()
+            data = job_to_dict(job)
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(data)
+        return data
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Job {job_id} failed: {e}", exc_info=True)
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                try:
+                    await self._update(job_id, status="failed", message="Job failed", error=detail, finished_at=datetime.now(timezone.utc))
+                except Exception as update_error:
+                    logging.error(f"Could not record failure of job {job_id}: {update_error}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int):
+        # Claim the job atomically so it runs only once
+        async with self._session() as session:
+            claimed = await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(
+                    status="running",
+                    started_at=datetime.now(timezone.utc),
+                    worker_id=self.worker_id,
+                    heartbeat_at=datetime.now(timezone.utc)
+                )
+            )
+            await session.commit()
+            if claimed.rowcount != 1:
+                return
+            job = await session.get(Job, job_id)
+            project_id, user_email, text, store = job.project_id, job.creator_email, job.input_text, job.store
+
+        # Stage 1: extract entities and relationships with the LLM
+        await self._update(job_id, stage="extract", progress=0.0, message="Extracting knowledge graph")
+        kg_data = knowledge_graph_to_dict(await extract_knowledge_graph_from_text(text, project_id))
+        entities = kg_data["entities"]
+        relationships = kg_data["relationships"]
+        message = f"Extracted {len(entities)} entities and {len(relationships)} relationships"
+        if not store:
+            await self._update(
+                job_id, status="completed", stage=None, progress=1.0, message=message,
+                result=kg_data, finished_at=datetime.now(timezone.utc)
+            )
+            return
+
+        # Stage 2: embed the entities (name + description) in batched requests
+        await self._update(job_id, stage="embed", progress=0.6, message=f"{message}; generating embeddings", result=kg_data)
+        embeddings = await agenerate_embeddings(
+            [entity_embedding_text(entity["label"], entity["description"]) for entity in entities]
+        )
+
+        # Stage 3: write everything to Neo4j in a single batched transaction
+        await self._update(job_id, stage="store", progress=0.8, message="Storing knowledge graph")
+        current_time = datetime.utcnow().isoformat()
+
+        def write_graph():
+            with get_driver().get_session() as neo4j_session:
+                return store_knowledge_graph(
+                    neo4j_session,
+                    entities,
+                    relationships,
+                    project_id,
+                    user_email,
+                    current_time,
+                    embeddings=embeddings
+                )
+        stored = await asyncio.to_thread(write_graph)
+        invalidate_cached_totals(project_id)
+
+        await self._update(
+            job_id, status="completed", stage=None, progress=1.0,
+            message=f"Stored {len(stored['entities'])} entities and {len(stored['relationships'])} relationships",
+            result=stored, finished_at=datetime.now(timezone.utc)
+        )
+
+# Process-wide job runner, started and stopped with the application
+_runner: Optional[JobRunner] = None
+
+def get_job_runner() -> JobRunner:
+    global _runner
+    if _runner is None:
+        _runner = JobRunner()
+    return _runner
+
+async def start_job_workers():
+    await get_job_runner().start()
+
+async def stop_job_workers():
+    if _runner is not None:
+        await _runner.stop()
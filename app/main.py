@@ -2,53 +2,18 @@ from fastapi import FastAPI, Request, Response, Depends
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
+import asyncio
 import logging
-from app.database import init_db
-from app.postgres_db import init_postgres_db
-from app.routes import web, api, kg, deduplicate, postgres, projects, session
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from app.database import init_db, close_driver
+from app.neo4j_schema import create_schema
+from app.postgres_db import init_postgres_db, close_postgres_driver
+from app.routes import web, api, kg, deduplicate, postgres, projects, session, system, jobs
+from app.jobs import start_job_workers, stop_job_workers
+from app.metrics import PrometheusMiddleware
 from app.config import USE_HEADER_AUTH, TEST_USER_EMAIL, TEST_USER_BELONGS_TO_AUTHORIZATION_GROUP
 
-import os
-from neo4j import GraphDatabase
-
-from src.kg.deduplicate import batch_generate_embeddings
-
-# Vector index creation for Neo4j
-def get_embedding_dimensions(model_name):
-    # Known OpenAI embedding model dimensions
-    model_dims = {
-        "text-embedding-3-small": 1536,
-        "text-embedding-3-large": 3072,
-        "text-embedding-ada-002": 1536
-    }
-    # Try to match by substring for flexibility
-    for key, val in model_dims.items():
-        if key in model_name:
-            return val
-    return 1536  # Default
-
-async def create_vector_index():
-    NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-    NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password123")
-    embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
-    dimensions = get_embedding_dimensions(embedding_model)
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    try:
-        with driver.session() as session:
-            session.run(
-                """
-                CREATE VECTOR INDEX person_embeddings IF NOT EXISTS
-                FOR (p:Person) ON (p.embedding)
-                OPTIONS {indexConfig: {
-                  `vector.dimensions`: $dimensions,
-                  `vector.similarity_function`: 'cosine'
-                }}
-                """,
-                dimensions=dimensions
-            )
-    finally:
-        driver.close()
+from app.backfill import embedding_backfill
 
 # Create FastAPI app
 app = FastAPI(title="Neo4j FastAPI Demo")
@@ -56,6 +21,10 @@ app = FastAPI(title="Neo4j FastAPI Demo")
 # User authentication middleware
 class UserAuthMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
+        # Prometheus scrapes /metrics without a user header
+        if request.url.path == "/metrics":
+            return await call_next(request)
+
         # Get user email from header or use test email based on config
         if USE_HEADER_AUTH:
             if "X-user-email" not in request.headers:
@@ -83,6 +52,8 @@ class UserAuthMiddleware(BaseHTTPMiddleware):
 # Add middleware
 app.add_middleware(SessionMiddleware, secret_key="your-secret-key")  # Replace with a secure secret key
 app.add_middleware(UserAuthMiddleware)
+# Added last so it is outermost and also times requests rejected by auth
+app.add_middleware(PrometheusMiddleware)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -95,16 +66,38 @@ app.include_router(deduplicate.router)
 app.include_router(postgres.router)
 app.include_router(projects.router)
 app.include_router(session.router)
+app.include_router(system.router)
+app.include_router(jobs.router)
+
+# Prometheus scrape endpoint (see prometheus/prometheus.yml)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 # Startup event
 @app.on_event("startup")
 async def startup_db_client():
-    await init_db()
-    await init_postgres_db()
-    await create_vector_index()
-    await batch_generate_embeddings()
+    async def init_neo4j():
+        await init_db()
+        await create_schema()
+
+    # Neo4j and PostgreSQL are initialized concurrently, without blocking the event loop
+    await asyncio.gather(init_neo4j(), init_postgres_db())
+    # Does not touch Postgres; leftover jobs are resumed in the background once it is reachable
+    await start_job_workers()
+    # Backfill missing embeddings in the background; see /api/system/backfill
+    embedding_backfill.start()
     logging.info("Application startup complete")
 
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    await embedding_backfill.cancel()
+    await stop_job_workers()
+    close_driver()
+    await close_postgres_driver()
+    logging.info("Application shutdown complete")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,179 @@
+import sys
+import time
+import inspect
+import functools
+from prometheus_client import Histogram, Counter
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+# Request latency per route template (not raw path) so ids do not explode label cardinality
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"]
+)
+
+# Neo4j query latency by the function that issued the query
+NEO4J_QUERY_DURATION = Histogram(
+    "neo4j_query_duration_seconds",
+    "Neo4j query latency by call site",
+    ["call_site"]
+)
+
+POSTGRES_QUERY_DURATION = Histogram(
+    "postgres_query_duration_seconds",
+    "PostgreSQL statement latency by statement type",
+    ["operation"]
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "LLM API call latency",
+    ["model", "operation"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "Tokens reported by the LLM API",
+    ["model", "kind"]
+)
+
+LLM_ERRORS = Counter(
+    "llm_errors",
+    "Failed LLM API calls",
+    ["model", "operation"]
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Texts sent per embedding request",
+    ["model"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2048)
+)
+
+class PrometheusMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # The matched route is only known after routing has run
+            route = request.scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            ).observe(time.perf_counter() - start)
+
+# --- Neo4j ---
+
+def _call_site(depth: int) -> str:
+    frame = sys._getframe(depth + 1)
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+class InstrumentedSession:
+    """
+    Wraps a Neo4j session and times each query, labelled with the module and
+    function that issued it. run() is timed until the server answers (records
+    are streamed lazily); execute_read/execute_write are timed as a whole and
+    labelled with the transaction function's name.
+    """
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._session.__exit__(*exc_info)
+
+    def run(self, query, parameters=None, **kwargs):
+        with NEO4J_QUERY_DURATION.labels(call_site=_call_site(1)).time():
+            return self._session.run(query, parameters, **kwargs)
+
+    def _execute(self, execute, transaction_function, *args, **kwargs):
+        call_site = f"{transaction_function.__module__}.{transaction_function.__name__}"
+        with NEO4J_QUERY_DURATION.labels(call_site=call_site).time():
+            return execute(transaction_function, *args, **kwargs)
+
+    def execute_read(self, transaction_function, *args, **kwargs):
+        return self._execute(self._session.execute_read, transaction_function, *args, **kwargs)
+
+    def execute_write(self, transaction_function, *args, **kwargs):
+        return self._execute(self._session.execute_write, transaction_function, *args, **kwargs)
+
+# --- PostgreSQL ---
+
+def instrument_engine(engine):
+    """Time every statement executed on a (sync) SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        words = statement.split(None, 1)
+        operation = words[0].upper() if words else "UNKNOWN"
+        POSTGRES_QUERY_DURATION.labels(operation=operation).observe(elapsed)
+
+# --- LLM ---
+
+def record_llm_usage(model: str, usage):
+    """Count the prompt and completion tokens from an OpenAI-style usage object."""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        count = getattr(usage, kind, None)
+        if count:
+            LLM_TOKENS.labels(model=model, kind=kind.replace("_tokens", "")).inc(count)
+
+def observe_llm_call(operation: str):
+    """
+    Decorator for LLM client methods taking a model_name argument: records the
+    call latency and counts failures. Works on sync and async methods.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def model_of(args, kwargs) -> str:
+            return str(signature.bind_partial(*args, **kwargs).arguments.get("model_name", "unknown"))
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                model = model_of(args, kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    LLM_ERRORS.labels(model=model, operation=operation).inc()
+                    raise
+                finally:
+                    LLM_REQUEST_DURATION.labels(model=model, operation=operation).observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            model = model_of(args, kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                LLM_ERRORS.labels(model=model, operation=operation).inc()
+                raise
+            finally:
+                LLM_REQUEST_DURATION.labels(model=model, operation=operation).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
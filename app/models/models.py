@@ -73,8 +73,36 @@ class DuplicatePair(BaseModel):
 
 class DeduplicationRequest(BaseModel):
     limit: int = 100
+    incremental: bool = True  # Only check entities changed since the last run and skip judged pairs
+
+class DuplicateClusterMember(BaseModel):
+    id: str
+    name: str
+
+class DuplicateCluster(BaseModel):
+    canonical_id: str  # Entity that survives the merge
+    canonical_name: str
+    members: List[DuplicateClusterMember]  # Entities merged into the canonical one
+    confidence_score: float  # Lowest confidence among the cluster's pairs
+    pairs: List[DuplicatePair]
 
 class DeduplicationResponse(BaseModel):
     duplicates: List[DuplicatePair]
     total_entities_checked: int
     potential_duplicates_found: int
+    clusters: List[DuplicateCluster] = []
+    reused_verdicts: int = 0  # Candidate pairs answered from stored verdicts instead of the LLM
+    lexical_accepted: int = 0  # Candidate pairs accepted by name without the LLM
+    lexical_pruned: int = 0  # Candidate pairs dropped by name without the LLM
+
+class MergePair(BaseModel):
+    entity_id: str  # Entity to keep
+    duplicate_id: str  # Entity merged into it and deleted
+
+class MergeCluster(BaseModel):
+    canonical_id: str  # Entity to keep
+    member_ids: List[str]  # Entities merged into it and deleted
+
+class MergeBatchRequest(BaseModel):
+    pairs: List[MergePair] = []
+    clusters: List[MergeCluster] = []
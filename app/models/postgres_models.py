@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Table
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Boolean, Table, Float, JSON, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.postgres_db import Base
@@ -96,3 +96,91 @@ class Tag(Base):
     
     def __repr__(self):
         return f"<Tag(id={self.id}, name='{self.name}')>"
+
+# Background ingestion job (extract -> embed -> store), see app/jobs.py
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
+    creator_email = Column(String(255), index=True)
+    source_name = Column(String(255), nullable=True)  # Uploaded file name, if any
+    input_text = Column(Text)
+    store = Column(Boolean, default=True)  # False stops after extraction (for review before storing)
+    status = Column(String(20), index=True, default="queued")  # queued, running, completed, failed
+    stage = Column(String(20), nullable=True)  # extract, embed, store
+    progress = Column(Float, default=0.0)  # 0.0 - 1.0
+    message = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    worker_id = Column(String(255), nullable=True)  # JOB_WORKER_ID of the process running the job
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Refreshed by the owner while running
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, project_id={self.project_id}, status='{self.status}', stage='{self.stage}')>"
+
+# Cached LLM extraction result, addressed by a hash of (model, prompt version, text)
+class ExtractionCacheEntry(Base):
+    __tablename__ = "extraction_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 hex digest
+    model = Column(String(255))
+    prompt_version = Column(String(50))
+    result = Column(JSON)  # {"entities": [...], "relationships": [...]}
+    size_bytes = Column(Integer)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<ExtractionCacheEntry(key='{self.key}', model='{self.model}', hits={self.hits})>"
+
+# Cached embedding vector for a (model, normalized text) pair, stored as packed float32
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    model = Column(String(255), primary_key=True)
+    text_hash = Column(String(64), primary_key=True)  # sha256 hex digest of the normalized text
+    dimensions = Column(Integer)
+    vector = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<EmbeddingCacheEntry(model='{self.model}', text_hash='{self.text_hash}', dimensions={self.dimensions})>"
+
+# Where the last incremental dedup run stopped: Person nodes are scanned in
+# (changed_at, node id) order, see src/kg/dedup_state.py
+class DedupWatermark(Base):
+    __tablename__ = "dedup_watermarks"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    changed_at = Column(String(64))  # ISO timestamp, as stored on the Neo4j nodes
+    node_id = Column(BigInteger)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DedupWatermark(project_id={self.project_id}, changed_at='{self.changed_at}', node_id={self.node_id})>"
+
+# LLM (or rule) decision on whether two Person nodes are duplicates.
+# entity1_id < entity2_id; the fingerprint covers both entities' names and
+# descriptions, so the verdict is ignored once either of them changes.
+class DedupVerdict(Base):
+    __tablename__ = "dedup_verdicts"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    entity1_id = Column(BigInteger, primary_key=True)
+    entity2_id = Column(BigInteger, primary_key=True)
+    fingerprint = Column(String(64))
+    decision = Column(String(20))  # duplicate, distinct
+    model = Column(String(255))
+    confidence_score = Column(Float, nullable=True)
+    reasoning = Column(Text, nullable=True)
+    decided_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<DedupVerdict(project_id={self.project_id}, pair=({self.entity1_id}, {self.entity2_id}), decision='{self.decision}')>"
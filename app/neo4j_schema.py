@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from app.database import Neo4jDriver, get_driver
+from src.kg.embeddings import embedding_model
+
+# Range indexes backing the project-scoped Person lookups:
+# every query matches Person {project_id}, store_kg matches {project_id, entity_id}
+# and the listings sort by name within a project.
+PERSON_INDEXES = [
+    ("person_project_id", ["project_id"]),
+    ("person_project_entity_id", ["project_id", "entity_id"]),
+    ("person_project_name", ["project_id", "name"]),
+]
+
+VECTOR_INDEX_NAME = "person_embeddings"
+
+# Vector index creation for Neo4j
+def get_embedding_dimensions(model_name):
+    # Known OpenAI embedding model dimensions
+    model_dims = {
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+        "text-embedding-ada-002": 1536
+    }
+    # Try to match by substring for flexibility
+    for key, val in model_dims.items():
+        if key in model_name:
+            return val
+    return 1536  # Default
+
+def ensure_schema(db: Neo4jDriver):
+    """
+    Idempotently create the Person range indexes and the embedding vector index.
+    Existing indexes are left untouched.
+    """
+    with db.get_session() as session:
+        for name, properties in PERSON_INDEXES:
+            columns = ", ".join(f"p.{prop}" for prop in properties)
+            session.run(f"CREATE INDEX {name} IF NOT EXISTS FOR (p:Person) ON ({columns})")
+        session.run(
+            f"""
+            CREATE VECTOR INDEX {VECTOR_INDEX_NAME} IF NOT EXISTS
+            FOR (p:Person) ON (p.embedding)
+            OPTIONS {{indexConfig: {{
+              `vector.dimensions`: $dimensions,
+              `vector.similarity_function`: 'cosine'
+            }}}}
+            """,
+            dimensions=get_embedding_dimensions(embedding_model)
+        )
+    logging.info(f"Ensured Neo4j schema: {', '.join(name for name, _ in PERSON_INDEXES)}, {VECTOR_INDEX_NAME}")
+
+def _find_index(indexes: List[Dict[str, Any]], index_type: str, properties: List[str]) -> Optional[Dict[str, Any]]:
+    """Find an index on Person by type and property list (its name may differ if created elsewhere)."""
+    for index in indexes:
+        if (index["type"] == index_type
+                and "Person" in (index["labelsOrTypes"] or [])
+                and list(index["properties"] or []) == properties):
+            return index
+    return None
+
+def get_schema_status(db: Neo4jDriver) -> Dict[str, Any]:
+    """
+    Report the build state of the expected indexes and whether the vector
+    index dimensions match the configured embedding model.
+    """
+    with db.get_session() as session:
+        indexes = session.run(
+            """
+            SHOW INDEXES
+            YIELD name, type, labelsOrTypes, properties, state, populationPercent, options
+            RETURN name, type, labelsOrTypes, properties, state, populationPercent, options
+            """
+        ).data()
+
+    range_indexes = []
+    for name, properties in PERSON_INDEXES:
+        index = _find_index(indexes, "RANGE", properties)
+        range_indexes.append({
+            "name": index["name"] if index else name,
+            "properties": properties,
+            "exists": index is not None,
+            "state": index["state"] if index else None,
+            "population_percent": index["populationPercent"] if index else None
+        })
+
+    expected_dimensions = get_embedding_dimensions(embedding_model)
+    vector = _find_index(indexes, "VECTOR", ["embedding"])
+    dimensions = None
+    if vector:
+        index_config = (vector["options"] or {}).get("indexConfig") or {}
+        dimensions = index_config.get("vector.dimensions")
+    vector_index = {
+        "name": vector["name"] if vector else VECTOR_INDEX_NAME,
+        "exists": vector is not None,
+        "state": vector["state"] if vector else None,
+        "population_percent": vector["populationPercent"] if vector else None,
+        "embedding_model": embedding_model,
+        "dimensions": dimensions,
+        "expected_dimensions": expected_dimensions,
+        "dimensions_match": dimensions == expected_dimensions
+    }
+
+    return {
+        "indexes": range_indexes,
+        "vector_index": vector_index,
+        "ready": all(index["state"] == "ONLINE" for index in range_indexes + [vector_index])
+                 and vector_index["dimensions_match"]
+    }
+
+def init_schema(db: Optional[Neo4jDriver] = None) -> Dict[str, Any]:
+    """Create the schema and log anything that needs attention."""
+    db = db or get_driver()
+    ensure_schema(db)
+    status = get_schema_status(db)
+    for index in status["indexes"] + [status["vector_index"]]:
+        if index["state"] != "ONLINE":
+            logging.info(f"Neo4j index {index['name']} is {index['state']} ({index['population_percent']}% populated)")
+    vector_index = status["vector_index"]
+    if vector_index["exists"] and not vector_index["dimensions_match"]:
+        # The vector index cannot be altered in place; it has to be dropped and recreated
+        logging.warning(
+            f"Vector index {vector_index['name']} has {vector_index['dimensions']} dimensions but "
+            f"{vector_index['embedding_model']} produces {vector_index['expected_dimensions']}. "
+            f"Similarity search will fail until the index is dropped and recreated."
+        )
+    return status
+
+async def create_schema():
+    """Startup hook: run init_schema without blocking the event loop."""
+    await asyncio.to_thread(init_schema)
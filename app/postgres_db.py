@@ -1,10 +1,22 @@
 import time
+import asyncio
 import logging
+import threading
+from typing import Optional
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError
-from app.config import POSTGRES_URI
+from app.metrics import instrument_engine
+from app.config import (
+    POSTGRES_URI,
+    POSTGRES_ASYNC_URI,
+    POSTGRES_POOL_SIZE,
+    POSTGRES_MAX_OVERFLOW,
+    POSTGRES_POOL_TIMEOUT,
+    POSTGRES_POOL_RECYCLE,
+)
 
 # Create SQLAlchemy Base class for models
 Base = declarative_base()
@@ -14,20 +26,42 @@ class PostgresDriver:
         # Configure SQLAlchemy engine with connection pool settings
         self.engine = create_engine(
             POSTGRES_URI,
-            pool_pre_ping=True,  # Verify connections before using them
-            pool_recycle=3600,   # Recycle connections after 1 hour
-            echo=False           # Set to True for SQL query logging
+            pool_pre_ping=True,                # Verify connections before using them
+            pool_recycle=POSTGRES_POOL_RECYCLE,
+            pool_size=POSTGRES_POOL_SIZE,
+            max_overflow=POSTGRES_MAX_OVERFLOW,
+            pool_timeout=POSTGRES_POOL_TIMEOUT,
+            echo=False                         # Set to True for SQL query logging
         )
+        # Async engine (asyncpg) for routes that must not block the event loop
+        self.async_engine = create_async_engine(
+            POSTGRES_ASYNC_URI,
+            pool_pre_ping=True,
+            pool_recycle=POSTGRES_POOL_RECYCLE,
+            pool_size=POSTGRES_POOL_SIZE,
+            max_overflow=POSTGRES_MAX_OVERFLOW,
+            pool_timeout=POSTGRES_POOL_TIMEOUT,
+            echo=False
+        )
+        # Statement timings for /metrics (async engines emit events through their sync engine)
+        instrument_engine(self.engine)
+        instrument_engine(self.async_engine.sync_engine)
         # Test connection when initializing
         self._test_connection()
-        
-        # Create session factory
+
+        # Create session factories
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Objects stay usable after commit; lazy refreshes are not possible with AsyncSession
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
 
     def _test_connection(self, max_attempts=3, retry_delay=1):
         attempt = 0
         last_error = None
-        
+
         while attempt < max_attempts:
             try:
                 # Test connection with a simple query
@@ -40,13 +74,39 @@ class PostgresDriver:
                 if attempt < max_attempts:
                     logging.debug(f"PostgreSQL connection test attempt {attempt}/{max_attempts} failed: {e}")
                     time.sleep(retry_delay)
-        
+
         logging.warning(f"Failed to connect to PostgreSQL during driver init: {last_error}")
         return False
 
+    def get_pool_stats(self) -> dict:
+        """
+        Return a snapshot of the sync and async connection pools.
+
+        Returns:
+            dict: Checked-out, idle and overflow connections for each engine
+        """
+        def describe(pool):
+            return {
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "size": pool.size()
+            }
+
+        return {
+            "sync": describe(self.engine.pool),
+            "async": describe(self.async_engine.sync_engine.pool),
+            "max_overflow": POSTGRES_MAX_OVERFLOW,
+            "pool_timeout_seconds": POSTGRES_POOL_TIMEOUT
+        }
+
     def close(self):
         self.engine.dispose()
 
+    async def aclose(self):
+        self.engine.dispose()
+        await self.async_engine.dispose()
+
     def get_session(self):
         db_session = self.SessionLocal()
         try:
@@ -54,36 +114,60 @@ class PostgresDriver:
         finally:
             db_session.close()
 
+# Process-wide driver so the engines' connection pools are actually reused
+_postgres_driver: Optional[PostgresDriver] = None
+_postgres_driver_lock = threading.Lock()
+
+def get_postgres_driver() -> PostgresDriver:
+    """Return the application-scoped PostgreSQL driver, creating it on first use."""
+    global _postgres_driver
+    if _postgres_driver is None:
+        with _postgres_driver_lock:
+            if _postgres_driver is None:
+                _postgres_driver = PostgresDriver()
+    return _postgres_driver
+
+async def close_postgres_driver():
+    """Dispose of the application-scoped engines (called on shutdown)."""
+    global _postgres_driver
+    driver = _postgres_driver
+    _postgres_driver = None
+    if driver is not None:
+        await driver.aclose()
+
 # Dependency to get PostgreSQL session
 def get_postgres_db():
-    db = PostgresDriver()
-    session = db.SessionLocal()
+    session = get_postgres_driver().SessionLocal()
     try:
         yield session
     finally:
         session.close()
-        db.close()
+
+# Dependency to get an async PostgreSQL session
+async def get_async_postgres_db():
+    async with get_postgres_driver().AsyncSessionLocal() as session:
+        yield session
 
 # Initialize the database with tables
 async def init_postgres_db():
-    db = PostgresDriver()
+    # Creating the driver tests connectivity (with retries), so do it off the event loop
+    db = await asyncio.to_thread(get_postgres_driver)
     max_attempts = 20
     retry_delay = 3  # seconds
     attempt = 0
-    
+
     while attempt < max_attempts:
         try:
-            # Create all tables defined in models
-            Base.metadata.create_all(bind=db.engine)
+            # Create all tables defined in models (in a worker thread; create_all is blocking)
+            await asyncio.to_thread(Base.metadata.create_all, bind=db.engine)
             logging.info("Successfully connected to PostgreSQL and created tables")
             break
         except OperationalError as e:
             attempt += 1
             if attempt < max_attempts:
                 logging.warning(f"PostgreSQL connection attempt {attempt}/{max_attempts} failed: {e}. Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+                await asyncio.sleep(retry_delay)
             else:
                 logging.error(f"Failed to connect to PostgreSQL after {max_attempts} attempts: {e}")
                 # Continue with application startup even if we can't connect to PostgreSQL
                 # This allows the FastAPI app to start and show appropriate errors later
-    db.close()
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
-from typing import List
+from typing import List, Optional
 import logging
 from datetime import datetime
 from app.database import Neo4jDriver, get_db
 from app.models.models import Person, PersonCreate, PersonUpdate, RelationshipCreate
 from app.utils.project_auth import verify_project_access # Added import
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_phases, fetch_keyset_page, get_cached_total, invalidate_cached_totals
 
 router = APIRouter(prefix="/api")
 
@@ -55,6 +56,7 @@ def create_person(
         data = result.single()
         if not data:
             raise HTTPException(status_code=500, detail="Failed to create person")
+        invalidate_cached_totals(project_id)
         
         # Get the created node
         node = data["p"]
@@ -78,32 +80,51 @@ def create_person(
 def read_people(
     page: int = 1, 
     limit: int = 10, 
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Neo4jDriver = Depends(get_db),
     # Project details are injected by the dependency based on query param or session
     project_details: dict = Depends(verify_project_access) 
 ):
+    """
+    List people ordered by (name, id).
+
+    Pass the returned next_cursor to get the following page; keyset pagination
+    makes every page cost the same as the first. The page parameter (without a
+    cursor) is still accepted for compatibility but skips rows on the server.
+    The total is cached briefly and may lag recent writes; include_total=false
+    omits it.
+    """
     project_id = project_details["project_id"] # Get project_id from dependency result
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Legacy page-number pagination when no cursor is given
+    skip = (page - 1) * limit if after is None else 0
+    phases = keyset_phases("p.name", "ID(p)", after) if skip <= 0 else [("true", {})]
+
     with db.get_session() as session:
-        # Get total count for the project
-        count_result = session.run(
-            "MATCH (p:Person {project_id: $project_id}) RETURN count(p) as total",
-            project_id=project_id
-        )
-        total = count_result.single()["total"]
-        
-        # Calculate skip value for pagination
-        skip = (page - 1) * limit
-        
-        # Get paginated results for the project
-        result = session.run(
-            "MATCH (p:Person {project_id: $project_id}) RETURN p, ID(p) as id ORDER BY p.name SKIP $skip LIMIT $limit",
-            project_id=project_id,
-            skip=skip,
-            limit=limit
-        )
+        def run_phase(condition, params, remaining):
+            return list(session.run(
+                f"""
+                MATCH (p:Person {{project_id: $project_id}})
+                WHERE {condition}
+                RETURN p, ID(p) as id
+                ORDER BY p.name, ID(p)
+                SKIP $skip LIMIT $limit
+                """,
+                project_id=project_id,
+                skip=max(skip, 0),
+                limit=remaining,
+                **params
+            ))
+
+        # Fetch one extra row to know whether another page follows
+        records = fetch_keyset_page(phases, limit + 1, run_phase)
         
         people = []
-        for record in result:
+        for record in records[:limit]:
             node = record["p"]
             node_id = str(record["id"])
             
@@ -119,14 +140,27 @@ def read_people(
                 "updated_by": node.get("updated_by", None),
                 "updated_at": node.get("updated_at", None)
             })
+
+        next_cursor = None
+        if len(records) > limit:
+            last = records[limit - 1]
+            next_cursor = encode_cursor(last["p"].get("name"), last["id"])
+
+        total = None
+        if include_total:
+            total = get_cached_total("people", project_id, lambda: session.run(
+                "MATCH (p:Person {project_id: $project_id}) RETURN count(p) as total",
+                project_id=project_id
+            ).single()["total"])
         
         # Return paginated response
         return {
             "items": people,
+            "next_cursor": next_cursor,
             "total": total,
             "page": page,
             "limit": limit,
-            "pages": (total + limit - 1) // limit  # Ceiling division to get total pages
+            "pages": (total + limit - 1) // limit if total is not None else None  # Ceiling division to get total pages
         }
 
 # Get all people without pagination for the current project (for visualization)
@@ -315,6 +349,7 @@ def delete_person(
             project_id=project_id,
             id=person_node_id
         )
+        invalidate_cached_totals(project_id)
         
         return {"message": "Person deleted successfully"}
 
@@ -392,6 +427,7 @@ def create_relationship(
         record = result.single()
         if not record:
             raise HTTPException(status_code=500, detail="Failed to create relationship")
+        invalidate_cached_totals(project_id)
         
         return {"message": f"Relationship '{relationship.relationship_type}' created successfully"}
 
@@ -462,39 +498,49 @@ def read_relationships(
 def read_all_relationships(
     page: int = 1, 
     limit: int = 10, 
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Neo4jDriver = Depends(get_db),
     # Project details are injected by the dependency based on query param or session
     project_details: dict = Depends(verify_project_access) 
 ):
+    """
+    List relationships ordered by (source name, relationship id), paginated
+    with next_cursor the same way as GET /api/people/.
+    """
     project_id = project_details["project_id"] # Get project_id from dependency result
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Legacy page-number pagination when no cursor is given
+    skip = (page - 1) * limit if after is None else 0
+    phases = keyset_phases("p1.name", "ID(r)", after) if skip <= 0 else [("true", {})]
+
     with db.get_session() as session:
-        # Get total count for the project
-        count_result = session.run(
-            "MATCH (p1:Person {project_id: $project_id})-[r {project_id: $project_id}]->(p2:Person {project_id: $project_id}) RETURN count(r) as total",
-            project_id=project_id
-        )
-        total = count_result.single()["total"]
-        
-        # Calculate skip value for pagination
-        skip = (page - 1) * limit
-        
-        # Get paginated results with relationship properties for the project
-        result = session.run(
-            """
-            MATCH (p1:Person {project_id: $project_id})-[r {project_id: $project_id}]->(p2:Person {project_id: $project_id})
-            RETURN ID(p1) as source_id, p1.name as source_name, 
-                   ID(p2) as target_id, p2.name as target_name, 
-                   type(r) as relationship_type, r
-            ORDER BY p1.name, p2.name
-            SKIP $skip LIMIT $limit
-            """,
-            project_id=project_id,
-            skip=skip,
-            limit=limit
-        )
+        def run_phase(condition, params, remaining):
+            return list(session.run(
+                f"""
+                MATCH (p1:Person {{project_id: $project_id}})-[r {{project_id: $project_id}}]->(p2:Person {{project_id: $project_id}})
+                WHERE {condition}
+                RETURN ID(p1) as source_id, p1.name as source_name, 
+                       ID(p2) as target_id, p2.name as target_name, 
+                       type(r) as relationship_type, r, ID(r) as rel_id
+                ORDER BY p1.name, ID(r)
+                SKIP $skip LIMIT $limit
+                """,
+                project_id=project_id,
+                skip=max(skip, 0),
+                limit=remaining,
+                **params
+            ))
+
+        # Get paginated results with relationship properties for the project,
+        # fetching one extra row to know whether another page follows
+        records = fetch_keyset_page(phases, limit + 1, run_phase)
         
         relationships = []
-        for record in result:
+        for record in records[:limit]:
             # Convert relationship_type back from Neo4j format (underscores) to display format (spaces)
             rel_type = record["relationship_type"].replace('_', ' ')
             
@@ -512,12 +558,25 @@ def read_all_relationships(
                 "updated_by": rel.get("updated_by", None),
                 "updated_at": rel.get("updated_at", None)
             })
+
+        next_cursor = None
+        if len(records) > limit:
+            last = records[limit - 1]
+            next_cursor = encode_cursor(last["source_name"], last["rel_id"])
+
+        total = None
+        if include_total:
+            total = get_cached_total("relationships", project_id, lambda: session.run(
+                "MATCH (p1:Person {project_id: $project_id})-[r {project_id: $project_id}]->(p2:Person {project_id: $project_id}) RETURN count(r) as total",
+                project_id=project_id
+            ).single()["total"])
         
         # Return paginated response
         return {
             "items": relationships,
+            "next_cursor": next_cursor,
             "total": total,
             "page": page,
             "limit": limit,
-            "pages": (total + limit - 1) // limit  # Ceiling division to get total pages
+            "pages": (total + limit - 1) // limit if total is not None else None  # Ceiling division to get total pages
         }
@@ -2,9 +2,11 @@ from fastapi import APIRouter, HTTPException, Form, Request, Depends # Added Dep
 from typing import Dict, Any
 import logging
 from datetime import datetime
-from app.models.models import DeduplicationRequest, DeduplicationResponse
-from src.kg.deduplicate import find_potential_duplicates, merge_duplicate_entities
+from app.models.models import DeduplicationRequest, DeduplicationResponse, MergeBatchRequest
+from src.kg.deduplicate import find_potential_duplicates, merge_duplicate_entities, merge_duplicate_clusters
+from src.kg.dedup_state import reset_dedup_state
 from app.utils.project_auth import verify_project_access # Added import
+from app.utils.pagination import invalidate_cached_totals
 
 router = APIRouter(prefix="/api/kg")
 
@@ -18,23 +20,43 @@ async def deduplicate_entities(
     Find potential duplicate entities in the knowledge graph using batch processing.
     
     This endpoint sends a batch of N entities to the OpenAI API and uses AI
-    to identify potential duplicate pairs among them.
+    to identify potential duplicate pairs among them. By default only entities
+    changed since the previous run are checked, and pairs judged before are not
+    sent to the API again.
     """
     try:
         # Find potential duplicates using batch processing, passing project_id
         project_id = project_details["project_id"] # Get project_id from dependency result
-        result = await find_potential_duplicates(request.limit, project_id) # Pass project_id
+        result = await find_potential_duplicates(request.limit, project_id, incremental=request.incremental) # Pass project_id
         # Ensure the result matches the expected response model
         return {
             "duplicates": result.duplicates,
+            "clusters": result.clusters,
             "total_entities_checked": result.total_entities_checked,
-            "potential_duplicates_found": result.potential_duplicates_found
+            "potential_duplicates_found": result.potential_duplicates_found,
+            "reused_verdicts": result.reused_verdicts,
+            "lexical_accepted": result.lexical_accepted,
+            "lexical_pruned": result.lexical_pruned
         }
     
     except Exception as e:
         logging.error(f"Error during deduplication: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to deduplicate entities: {str(e)}")
 
+@router.delete("/deduplicate/state", response_model=Dict[str, Any])
+async def reset_deduplication_state(
+    project_details: dict = Depends(verify_project_access)
+):
+    """
+    Forget the project's dedup watermark and stored verdicts, so the next
+    incremental run checks every entity and asks about every pair again.
+    """
+    try:
+        return await reset_dedup_state(project_details["project_id"])
+    except Exception as e:
+        logging.error(f"Error resetting deduplication state: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to reset deduplication state: {str(e)}")
+
 @router.post("/merge", response_model=Dict[str, Any])
 async def merge_entities(
     entity_id: str = Form(...), 
@@ -70,6 +92,7 @@ async def merge_entities(
         
         # Merge the duplicate entities with user tracking and project_id
         result = await merge_duplicate_entities(entity_id_int, duplicate_id_int, user_email, current_time, project_id)
+        invalidate_cached_totals(project_id)
         return result
     
     except HTTPException:
@@ -77,3 +100,44 @@ async def merge_entities(
     except Exception as e:
         logging.error(f"Error merging entities: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to merge entities: {str(e)}")
+
+@router.post("/merge/batch", response_model=Dict[str, Any])
+async def merge_entities_batch(
+    merge_request: MergeBatchRequest,
+    request: Request,
+    # Project details are injected by the dependency based on query param or session
+    project_details: dict = Depends(verify_project_access)
+):
+    """
+    Merge many duplicate pairs and clusters in a single transaction.
+
+    Each cluster's members are merged into its canonical entity. Chains of pairs
+    are followed (A<-B then B<-C merges both into A) and pairs already merged
+    together are returned as skipped. Either everything is merged or, if an
+    entity is missing, nothing is.
+    """
+    try:
+        # A pair is a cluster with a single member
+        clusters = [(int(pair.entity_id), [int(pair.duplicate_id)]) for pair in merge_request.pairs]
+        clusters += [
+            (int(cluster.canonical_id), [int(member_id) for member_id in cluster.member_ids])
+            for cluster in merge_request.clusters
+        ]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Entity IDs must be integers.")
+
+    project_id = project_details["project_id"]
+    try:
+        result = await merge_duplicate_clusters(
+            clusters, request.state.user_email, datetime.utcnow().isoformat(), project_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error merging entities: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to merge entities: {str(e)}")
+    invalidate_cached_totals(project_id)
+    return {
+        "message": f"Merged {len(result['merged'])} entities",
+        **result
+    }
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, List
+import asyncio
+import json
+from app.config import JOB_EVENTS_POLL_INTERVAL
+from app.jobs import get_job_runner, TERMINAL_STATUSES
+from app.models.models import TextInput
+from app.postgres_db import get_async_postgres_db
+from app.utils.project_auth import verify_project_access, get_accessible_project
+from src.kg.kg import read_file_content
+
+router = APIRouter(
+    prefix="/api/jobs",
+    tags=["jobs"],
+)
+
+async def get_job_for_user(job_id: int, request: Request, db: AsyncSession) -> dict:
+    """Load a job, treating jobs in projects the user cannot access as missing."""
+    job = await get_job_runner().get(job_id)
+    if job is None or await get_accessible_project(job["project_id"], request.state.user_email, db) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# Submit text for extraction (and, unless store=false, embedding and storage)
+@router.post("/extract", response_model=Dict[str, Any], status_code=202)
+async def submit_text_job(
+    text_input: TextInput,
+    request: Request,
+    store: bool = True,
+    # Project details are injected by the dependency based on query param or session
+    project_details: dict = Depends(verify_project_access)
+):
+    """
+    Queue a knowledge graph extraction job and return it immediately.
+
+    Poll GET /api/jobs/{id} or stream GET /api/jobs/{id}/events for progress.
+    With store=false the job stops after extraction and its result holds the
+    extracted graph for review.
+    """
+    return await get_job_runner().submit(
+        project_details["project_id"], request.state.user_email, text_input.text, store=store
+    )
+
+# Submit a file for extraction (and, unless store=false, embedding and storage)
+@router.post("/upload", response_model=Dict[str, Any], status_code=202)
+async def submit_file_job(
+    request: Request,
+    file: UploadFile = File(...),
+    store: bool = True,
+    # Project details are injected by the dependency based on query param or session
+    project_details: dict = Depends(verify_project_access)
+):
+    """Queue an extraction job for an uploaded file and return it immediately."""
+    text = await read_file_content(file)
+    return await get_job_runner().submit(
+        project_details["project_id"], request.state.user_email, text, store=store, source_name=file.filename
+    )
+
+# List recent jobs in the current project
+@router.get("/", response_model=List[Dict[str, Any]])
+async def list_jobs(
+    limit: int = 20,
+    # Project details are injected by the dependency based on query param or session
+    project_details: dict = Depends(verify_project_access)
+):
+    return await get_job_runner().list_jobs(project_details["project_id"], limit=limit)
+
+@router.get("/{job_id}", response_model=Dict[str, Any])
+async def read_job(job_id: int, request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
+    return await get_job_for_user(job_id, request, db)
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: int, request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
+    """
+    Server-sent events: one `data:` message with the job after every state
+    change, ending once the job completes or fails.
+    """
+    job = await get_job_for_user(job_id, request, db)
+    runner = get_job_runner()
+
+    async def events():
+        queue = runner.subscribe(job_id)
+        try:
+            current = job
+            yield f"data: {json.dumps(current)}\n\n"
+            while current["status"] not in TERMINAL_STATUSES:
+                try:
+                    latest = await asyncio.wait_for(queue.get(), timeout=JOB_EVENTS_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    # No in-process update; the job may be running elsewhere, so re-read it
+                    latest = await runner.get(job_id)
+                    if latest is None:
+                        break
+                if latest == current:
+                    yield ": keep-alive\n\n"
+                    continue
+                current = latest
+                yield f"data: {json.dumps(current)}\n\n"
+        finally:
+            runner.unsubscribe(job_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
 from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any
+import json
 import logging
 from datetime import datetime
 from app.database import Neo4jDriver, get_db
 from app.models.models import TextInput
-from src.kg.kg import extract_knowledge_graph_from_text, read_file_content
+from src.kg.kg import extract_knowledge_graph_from_text, read_file_content, knowledge_graph_to_dict
+from src.kg.store import store_knowledge_graph
+from src.kg.embeddings import entity_embedding_text, agenerate_embeddings
 from app.utils.project_auth import verify_project_access # Added import
-
-import os
-from openai import OpenAI
+from app.utils.pagination import invalidate_cached_totals
 
 router = APIRouter(prefix="/api/kg")
 
@@ -17,37 +19,19 @@ router = APIRouter(prefix="/api/kg")
 @router.post("/extract", response_model=Dict[str, Any])
 async def extract_kg_from_text(
     text_input: TextInput,
+    bypass_cache: bool = False,
     # Project details are injected by the dependency based on query param or session
     project_details: dict = Depends(verify_project_access) 
 ):
     try:
         # Extract knowledge graph from text, passing project_id
         project_id = project_details["project_id"] # Get project_id from dependency result
-        kg = await extract_knowledge_graph_from_text(text_input.text, project_id) # Pass project_id
+        kg = await extract_knowledge_graph_from_text(text_input.text, project_id, bypass_cache=bypass_cache) # Pass project_id
         
         # Convert entities and relationships to dictionaries for JSON response
-        entities = []
-        relationships = []
-        
-        for entity in kg.entities:
-            entities.append({
-                "entity_id": entity.entity_id,
-                "label": entity.label,
-                "type": entity.type,
-                "description": entity.description
-            })
-        
-        for rel in kg.relationships:
-            relationships.append({
-                "source_id": rel.source_id,
-                "target_id": rel.target_id,
-                "label": rel.label
-            })
-        
         return {
             "message": "Knowledge graph extracted successfully",
-            "entities": entities,
-            "relationships": relationships
+            **knowledge_graph_to_dict(kg)
         }
     
     except Exception as e:
@@ -58,6 +42,7 @@ async def extract_kg_from_text(
 @router.post("/upload", response_model=Dict[str, Any])
 async def upload_file_extract_kg(
     file: UploadFile = File(...),
+    bypass_cache: bool = False,
     # Project details are injected by the dependency based on query param or session
     project_details: dict = Depends(verify_project_access) 
 ):
@@ -70,65 +55,36 @@ async def upload_file_extract_kg(
         
         # Use the extract_kg_from_text function directly to process the text, passing project_id
         project_id = project_details["project_id"] # Get project_id from dependency result
-        kg = await extract_knowledge_graph_from_text(text_input.text, project_id) # Pass project_id
+        kg = await extract_knowledge_graph_from_text(text_input.text, project_id, bypass_cache=bypass_cache) # Pass project_id
         
         # Convert entities and relationships to dictionaries for JSON response
-        entities = []
-        relationships = []
-        
-        for entity in kg.entities:
-            entities.append({
-                "entity_id": entity.entity_id,
-                "label": entity.label,
-                "type": entity.type,
-                "description": entity.description
-            })
-        
-        for rel in kg.relationships:
-            relationships.append({
-                "source_id": rel.source_id,
-                "target_id": rel.target_id,
-                "label": rel.label
-            })
-        
         return {
             "message": "Knowledge graph extracted successfully",
-            "entities": entities,
-            "relationships": relationships
+            **knowledge_graph_to_dict(kg)
         }
     
     except Exception as e:
         logging.error(f"Error processing uploaded file: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to process uploaded file: {str(e)}")
 
-# Export the current knowledge graph as a downloadable JSON file
-@router.get("/export")
-async def export_kg(
-    db: Neo4jDriver = Depends(get_db),
-    project_details: dict = Depends(verify_project_access)
-):
+# Flush streamed export output in chunks of roughly this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def iter_export_records(db: Neo4jDriver, project_id: int):
     """
-    Export the current knowledge graph (nodes and edges) for the selected project as a downloadable JSON file.
+    Yield ("node", dict) records and then ("edge", dict) records for a project,
+    as they arrive from Neo4j rather than after the whole graph is loaded.
     """
-    import io
-    import json
-
-    project_id = project_details["project_id"]
-
-    # Query all people (nodes)
     with db.get_session() as session:
+        # Query all people (nodes)
         people_result = session.run(
             "MATCH (p:Person {project_id: $project_id}) RETURN p, ID(p) as id ORDER BY p.name",
             project_id=project_id
         )
-        nodes = []
-        node_ids = set()
         for record in people_result:
             node = record["p"]
-            node_id = str(record["id"])
-            node_ids.add(node_id)
-            nodes.append({
-                "id": node_id,
+            yield "node", {
+                "id": str(record["id"]),
                 "name": node.get("name", "Unknown"),
                 "description": node.get("description", ""),
                 "age": node.get("age", None),
@@ -137,9 +93,11 @@ async def export_kg(
                 "created_at": node.get("created_at", None),
                 "updated_by": node.get("updated_by", None),
                 "updated_at": node.get("updated_at", None)
-            })
+            }
 
-        # Query all relationships (edges) between people in this project
+        # Query all relationships (edges) between people in this project.
+        # Both endpoints are matched within the project, so every edge
+        # connects two exported nodes.
         rel_result = session.run(
             """
             MATCH (p1:Person {project_id: $project_id})-[r {project_id: $project_id}]->(p2:Person {project_id: $project_id})
@@ -147,41 +105,130 @@ async def export_kg(
             """,
             project_id=project_id
         )
-        edges = []
         for record in rel_result:
-            # Only include edges where both source and target are in the current node set
-            source_id = str(record["source_id"])
-            target_id = str(record["target_id"])
-            if source_id in node_ids and target_id in node_ids:
-                rel_type = record["relationship_type"].replace('_', ' ')
-                rel = record["r"]
-                edges.append({
-                    "source_id": source_id,
-                    "target_id": target_id,
-                    "relationship_type": rel_type,
-                    "created_by": rel.get("created_by", None),
-                    "created_at": rel.get("created_at", None),
-                    "updated_by": rel.get("updated_by", None),
-                    "updated_at": rel.get("updated_at", None)
-                })
+            rel = record["r"]
+            yield "edge", {
+                "source_id": str(record["source_id"]),
+                "target_id": str(record["target_id"]),
+                "relationship_type": record["relationship_type"].replace('_', ' '),
+                "created_by": rel.get("created_by", None),
+                "created_at": rel.get("created_at", None),
+                "updated_by": rel.get("updated_by", None),
+                "updated_at": rel.get("updated_at", None)
+            }
+
+def _chunked(pieces):
+    """Group small string pieces into byte chunks of about EXPORT_CHUNK_BYTES."""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+def stream_export_ndjson(db: Neo4jDriver, project_id: int):
+    """Newline-delimited JSON: one {"type": "node"|"edge", ...} object per line, nodes first."""
+    return _chunked(
+        json.dumps({"type": kind, **data}) + "\n"
+        for kind, data in iter_export_records(db, project_id)
+    )
+
+def stream_export_json(db: Neo4jDriver, project_id: int):
+    """A single {"nodes": [...], "edges": [...]} document, streamed without indentation."""
+    def pieces():
+        yield '{"nodes": ['
+        current = "node"
+        first = True
+        for kind, data in iter_export_records(db, project_id):
+            if kind != current:
+                yield '], "edges": ['
+                current = kind
+                first = True
+            yield ("" if first else ", ") + json.dumps(data)
+            first = False
+        if current == "node":
+            yield '], "edges": ['
+        yield ']}'
+    return _chunked(pieces())
+
+# Export the current knowledge graph as a downloadable file
+@router.get("/export")
+async def export_kg(
+    format: str = "ndjson",
+    db: Neo4jDriver = Depends(get_db),
+    project_details: dict = Depends(verify_project_access)
+):
+    """
+    Export the current knowledge graph (nodes and edges) for the selected project as a downloadable file.
+    
+    The export is streamed from Neo4j as records arrive. With format=ndjson (default)
+    each line is a node or edge object, nodes first; format=json returns the
+    {"nodes": [...], "edges": [...]} document.
+    """
+    if format not in ("ndjson", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'json'")
+
+    project_id = project_details["project_id"]
 
-    # Prepare JSON data
-    export_data = {
-        "nodes": nodes,
-        "edges": edges
-    }
-    json_bytes = json.dumps(export_data, indent=2).encode("utf-8")
-    file_like = io.BytesIO(json_bytes)
+    if format == "ndjson":
+        content = stream_export_ndjson(db, project_id)
+        media_type = "application/x-ndjson"
+    else:
+        content = stream_export_json(db, project_id)
+        media_type = "application/json"
 
-    # Return as downloadable file
+    # Return as downloadable file; the sync generator is iterated in the threadpool
     return StreamingResponse(
-        file_like,
-        media_type="application/json",
+        content,
+        media_type=media_type,
         headers={
-            "Content-Disposition": "attachment; filename=knowledge_graph_export.json"
+            "Content-Disposition": f"attachment; filename=knowledge_graph_export.{format}"
         }
     )
 
+# Nodes and edges for the graph visualization in a single query.
+# Edges are distinct per (source, target, type), so parallel copies of the
+# same relationship are drawn once.
+GRAPH_QUERY = """
+MATCH (p:Person {project_id: $project_id})
+WITH collect({id: toString(ID(p)), name: coalesce(p.name, 'Unknown'), description: coalesce(p.description, '')}) as nodes
+RETURN nodes, COLLECT {
+    MATCH (p1:Person {project_id: $project_id})-[r {project_id: $project_id}]->(p2:Person {project_id: $project_id})
+    RETURN DISTINCT {source: toString(ID(p1)), target: toString(ID(p2)), type: type(r)}
+} as edges
+"""
+
+def read_graph(db: Neo4jDriver, project_id: int) -> Dict[str, Any]:
+    with db.get_session() as session:
+        record = session.run(GRAPH_QUERY, project_id=project_id).single()
+    edges = [
+        {
+            "id": f"{edge['source']}-{edge['type']}-{edge['target']}",
+            "source": edge["source"],
+            "target": edge["target"],
+            # Convert relationship_type back from Neo4j format (underscores) to display format (spaces)
+            "relationship_type": edge["type"].replace('_', ' ')
+        }
+        for edge in record["edges"]
+    ]
+    return {"nodes": record["nodes"], "edges": edges}
+
+@router.get("/graph", response_model=Dict[str, Any])
+async def get_graph(
+    db: Neo4jDriver = Depends(get_db),
+    project_details: dict = Depends(verify_project_access)
+):
+    """
+    Compact graph for visualization: {"nodes": [{id, name, description}],
+    "edges": [{id, source, target, relationship_type}]} for the selected project.
+    """
+    return await run_in_threadpool(read_graph, db, project_details["project_id"])
+
 # Store knowledge graph after approval
 @router.post("/store", response_model=Dict[str, Any])
 async def store_kg(
@@ -202,163 +249,31 @@ async def store_kg(
         entities = kg_data.get("entities", [])
         relationships = kg_data.get("relationships", [])
         
-        stored_entities = []
-        stored_relationships = []
+        # Generate embeddings for the entities (name + description) in batched requests
+        embeddings = await agenerate_embeddings(
+            [entity_embedding_text(entity["label"], entity["description"]) for entity in entities]
+        )
         
-        with db.get_session() as session:
-            # Get the count of existing Person nodes *within the project* to use as an offset
-            count_result = session.run(
-                "MATCH (p:Person {project_id: $project_id}) RETURN COUNT(p) as count",
-                project_id=project_id
-            )
-            count_record = count_result.single()
-            offset = count_record["count"] if count_record else 0
-            
-            # Create a mapping between original entity IDs and new entity IDs
-            id_mapping = {}
-            
-            # Store entities with new unique entity IDs
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
-            client = OpenAI(api_key=openai_api_key)
-            for i, entity in enumerate(entities):
-                # Create a new unique entity ID by adding the offset
-                original_entity_id = entity["entity_id"]
-                new_entity_id = str(int(offset) + i + 1)  # +1 to avoid starting at 0
-
-                # Store the mapping
-                id_mapping[original_entity_id] = new_entity_id
-
-                # Generate embedding for the entity (name + description)
-                name = entity["label"]
-                description = entity["description"]
-                text = f"{name or ''} - {description or ''}"
-                embedding = None
-                try:
-                    response = client.embeddings.create(
-                        input=text,
-                        model=embedding_model
-                    )
-                    embedding = response.data[0].embedding
-                except Exception as e:
-                    logging.error(f"Error generating embedding for entity '{name}': {e}")
-
-                # Create entity in Neo4j with the new entity ID, project_id, user tracking, and embedding
-                result = session.run(
-                    """
-                    CREATE (p:Person {
-                        entity_id: $entity_id,
-                        original_entity_id: $original_entity_id,
-                        name: $name,
-                        description: $description,
-                        project_id: $project_id,
-                        created_by: $created_by,
-                        created_at: $created_at,
-                        updated_by: $updated_by,
-                        updated_at: $updated_at,
-                        embedding: $embedding
-                    })
-                    RETURN p, ID(p) as id
-                    """,
-                    entity_id=new_entity_id,
-                    original_entity_id=original_entity_id,
-                    name=name,
-                    description=description,
-                    project_id=project_id,
-                    created_by=user_email,
-                    created_at=current_time,
-                    updated_by=user_email,
-                    updated_at=current_time,
-                    embedding=embedding
-                )
-
-                data = result.single()
-                if data:
-                    node = data["p"]
-                    node_id = str(data["id"])
-                    stored_entities.append({
-                        "id": node_id,
-                        "entity_id": node.get("entity_id", ""),
-                        "original_entity_id": node.get("original_entity_id", ""),
-                        "name": node.get("name", ""),
-                        "description": node.get("description", "")
-                    })
-            
-            # Store relationships using the new entity IDs
-            for rel in relationships:
-                # Get the new entity IDs from the mapping
-                original_source_id = rel["source_id"]
-                original_target_id = rel["target_id"]
-                
-                # Skip if either source or target is not in the mapping
-                if original_source_id not in id_mapping or original_target_id not in id_mapping:
-                    logging.warning(f"Skipping relationship: source {original_source_id} or target {original_target_id} not found in mapping")
-                    continue
-                
-                new_source_id = id_mapping[original_source_id]
-                new_target_id = id_mapping[original_target_id]
-                
-                # Find the Neo4j IDs for the source and target entities *within the project*
-                source_result = session.run(
-                    "MATCH (p:Person {entity_id: $entity_id, project_id: $project_id}) RETURN ID(p) as id",
-                    entity_id=new_source_id,
-                    project_id=project_id
-                )
-                source_record = source_result.single()
-                
-                target_result = session.run(
-                    "MATCH (p:Person {entity_id: $entity_id, project_id: $project_id}) RETURN ID(p) as id",
-                    entity_id=new_target_id,
-                    project_id=project_id
+        # Write all entities and relationships in a single batched transaction
+        # (in the threadpool, since the Neo4j driver is synchronous)
+        def write_graph():
+            with db.get_session() as session:
+                return store_knowledge_graph(
+                    session,
+                    entities,
+                    relationships,
+                    project_id,
+                    user_email,
+                    current_time,
+                    embeddings=embeddings
                 )
-                target_record = target_result.single()
-                
-                if source_record and target_record:
-                    source_id = source_record["id"]
-                    target_id = target_record["id"]
-                    
-                    # Process relationship type to make it Neo4j compatible
-                    rel_type = rel["label"].replace(' ', '_')
-                    
-                    # Create relationship with project_id and user tracking
-                    query = f"""
-                        MATCH (p1:Person) WHERE ID(p1) = $id1 AND p1.project_id = $project_id
-                        MATCH (p2:Person) WHERE ID(p2) = $id2 AND p2.project_id = $project_id
-                        CREATE (p1)-[r:{rel_type} {{
-                            project_id: $project_id, // Added project_id
-                            created_by: $created_by,
-                            created_at: $created_at,
-                            updated_by: $updated_by,
-                            updated_at: $updated_at
-                        }}]->(p2)
-                        RETURN p1, p2, type(r) as relationship_type
-                        """
-                    
-                    result = session.run(
-                        query,
-                        id1=source_id,
-                        id2=target_id,
-                        project_id=project_id, # Pass project_id
-                        created_by=user_email,
-                        created_at=current_time,
-                        updated_by=user_email,
-                        updated_at=current_time
-                    )
-                    
-                    record = result.single()
-                    if record:
-                        stored_relationships.append({
-                            "source_id": new_source_id,
-                            "target_id": new_target_id,
-                            "original_source_id": original_source_id,
-                            "original_target_id": original_target_id,
-                            "label": rel["label"]
-                        })
+        stored = await run_in_threadpool(write_graph)
+        invalidate_cached_totals(project_id)
         
         return {
             "message": "Knowledge graph stored successfully",
-            "entities": stored_entities,
-            "relationships": stored_relationships
+            "entities": stored["entities"],
+            "relationships": stored["relationships"]
         }
     
     except Exception as e:
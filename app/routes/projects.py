@@ -1,13 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.postgres_db import get_postgres_db
+from app.postgres_db import get_async_postgres_db
 from app.models.postgres_models import Project, KnowledgeGraph
 from app.utils.auth import check_user_authorization_groups, is_user_in_group
+from app.utils.project_auth import invalidate_project_access_cache
 
 router = APIRouter(
     prefix="/api/projects",
@@ -40,7 +42,7 @@ class ProjectUpdate(BaseModel):
 
 # Project routes
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-def create_project(project: ProjectCreate, request: Request, db: Session = Depends(get_postgres_db)):
+async def create_project(project: ProjectCreate, request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
     """Create a new project"""
     # Get user email from request state
     user_email = request.state.user_email
@@ -55,18 +57,18 @@ def create_project(project: ProjectCreate, request: Request, db: Session = Depen
     
     try:
         db.add(db_project)
-        db.commit()
-        db.refresh(db_project)
+        await db.commit()
+        await db.refresh(db_project)
         return db_project
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error creating project"
         )
 
 @router.get("/", response_model=List[ProjectResponse])
-def read_projects(request: Request, db: Session = Depends(get_postgres_db)):
+async def read_projects(request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
     """Get a list of projects that the user has access to"""
     # Get user email from request state
     user_email = request.state.user_email
@@ -74,25 +76,27 @@ def read_projects(request: Request, db: Session = Depends(get_postgres_db)):
     # Get user's authorization groups from the mock external service
     user_auth_groups = check_user_authorization_groups(user_email)
     
-    # Query all projects
-    all_projects = db.query(Project).all()
-    
-    # Filter projects where user is creator or in the authorization group
-    accessible_projects = []
-    for project in all_projects:
-        if project.creator_email == user_email or project.authorization_group in user_auth_groups:
-            accessible_projects.append(project)
+    # Query projects where user is creator or in the authorization group
+    result = await db.execute(
+        select(Project).where(
+            or_(
+                Project.creator_email == user_email,
+                Project.authorization_group.in_(user_auth_groups)
+            )
+        ).order_by(Project.id)
+    )
     
-    return accessible_projects
+    return result.scalars().all()
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def read_project(project_id: int, request: Request, db: Session = Depends(get_postgres_db)):
+async def read_project(project_id: int, request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
     """Get a specific project by ID"""
     # Get user email from request state
     user_email = request.state.user_email
     
     # Query the project
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    result = await db.execute(select(Project).where(Project.id == project_id))
+    db_project = result.scalars().first()
     
     # Check if project exists
     if db_project is None:
@@ -111,13 +115,14 @@ def read_project(project_id: int, request: Request, db: Session = Depends(get_po
     raise HTTPException(status_code=403, detail="You don't have access to this project")
 
 @router.put("/{project_id}", response_model=ProjectResponse)
-def update_project(project_id: int, project: ProjectUpdate, request: Request, db: Session = Depends(get_postgres_db)):
+async def update_project(project_id: int, project: ProjectUpdate, request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
     """Update a project (only creator can update)"""
     # Get user email from request state
     user_email = request.state.user_email
     
     # Query the project
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    result = await db.execute(select(Project).where(Project.id == project_id))
+    db_project = result.scalars().first()
     
     # Check if project exists
     if db_project is None:
@@ -139,24 +144,27 @@ def update_project(project_id: int, project: ProjectUpdate, request: Request, db
     db_project.updated_at = datetime.utcnow()
     
     try:
-        db.commit()
-        db.refresh(db_project)
+        await db.commit()
+        await db.refresh(db_project)
+        # Name or authorization group may have changed; drop cached access checks
+        invalidate_project_access_cache(project_id)
         return db_project
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error updating project"
         )
 
 @router.delete("/{project_id}", status_code=status.HTTP_200_OK)
-def delete_project(project_id: int, request: Request, db: Session = Depends(get_postgres_db)):
+async def delete_project(project_id: int, request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
     """Delete a project (only creator can delete)"""
     # Get user email from request state
     user_email = request.state.user_email
     
     # Query the project
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    result = await db.execute(select(Project).where(Project.id == project_id))
+    db_project = result.scalars().first()
     
     # Check if project exists
     if db_project is None:
@@ -168,11 +176,12 @@ def delete_project(project_id: int, request: Request, db: Session = Depends(get_
     
     try:
         # Delete the project
-        db.delete(db_project)
-        db.commit()
+        await db.delete(db_project)
+        await db.commit()
+        invalidate_project_access_cache(project_id)
         return {"message": "Project deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting project: {str(e)}"
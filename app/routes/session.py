@@ -2,11 +2,10 @@ from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.postgres_db import get_postgres_db
-from app.models.postgres_models import Project
-from app.utils.project_auth import check_project_access
+from app.postgres_db import get_async_postgres_db
+from app.utils.project_auth import get_accessible_project
 
 router = APIRouter(
     prefix="/api/session",
@@ -25,20 +24,15 @@ class SessionResponse(BaseModel):
     project_name: Optional[str] = None
 
 @router.post("/select-project", response_model=SessionResponse)
-async def select_project(project_data: ProjectSelection, request: Request, db: Session = Depends(get_postgres_db)):
+async def select_project(project_data: ProjectSelection, request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
     """Select a project and save it to the session"""
     # Get user email from request state
     user_email = request.state.user_email
     
     # Verify that the project exists and user has access to it
-    if not check_project_access(project_data.project_id, user_email, db):
+    if await get_accessible_project(project_data.project_id, user_email, db) is None:
         raise HTTPException(status_code=403, detail="You don't have access to this project")
     
-    # Get project details
-    db_project = db.query(Project).filter(Project.id == project_data.project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
     # Save project to session
     request.session["selected_project_id"] = project_data.project_id
     request.session["selected_project_name"] = project_data.project_name
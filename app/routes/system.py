@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, Optional
+from app.database import Neo4jDriver, get_db
+from app.postgres_db import get_postgres_driver, get_async_postgres_db
+from app.neo4j_schema import get_schema_status
+from src.kg.extraction_cache import get_extraction_cache_stats, clear_extraction_cache
+from app.utils.llm import get_llm_client
+from app.backfill import embedding_backfill
+from app.utils.auth import require_admin, is_admin
+from app.utils.project_auth import get_accessible_project
+
+router = APIRouter(
+    prefix="/api/system",
+    tags=["system"],
+)
+
+@router.get("/pool-stats", response_model=Dict[str, Any])
+def read_pool_stats(db: Neo4jDriver = Depends(get_db)):
+    """Report connection pool usage so the pool can be sized"""
+    return {
+        "neo4j": db.get_pool_stats(),
+        "postgres": get_postgres_driver().get_pool_stats()
+    }
+
+@router.get("/schema", response_model=Dict[str, Any])
+def read_schema_status(db: Neo4jDriver = Depends(get_db)):
+    """Report Neo4j index build state and whether the vector index matches the embedding model"""
+    return get_schema_status(db)
+
+@router.get("/extraction-cache", response_model=Dict[str, Any])
+async def read_extraction_cache_stats():
+    """Report extraction cache size and hit rate"""
+    return await get_extraction_cache_stats()
+
+@router.delete("/extraction-cache", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def delete_extraction_cache():
+    """Drop every cached extraction result (shared by all projects, so admins only)"""
+    return {"deleted": await clear_extraction_cache()}
+
+@router.get("/embedding-cache", response_model=Dict[str, Any])
+async def read_embedding_cache_stats():
+    """Report embedding cache size and hit rate"""
+    cache = get_llm_client().embedding_cache
+    if cache is None:
+        return {"enabled": False}
+    return await cache.stats()
+
+@router.delete("/embedding-cache", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def delete_embedding_cache():
+    """Drop every cached embedding (shared by all projects, so admins only)"""
+    cache = get_llm_client().embedding_cache
+    return {"deleted": await cache.clear() if cache is not None else 0}
+
+@router.get("/backfill", response_model=Dict[str, Any])
+def read_backfill_status():
+    """Report progress of the background embedding backfill"""
+    return embedding_backfill.status()
+
+async def _require_backfill_access(project_id: Optional[int], request: Request, db: AsyncSession):
+    """Admins may backfill any or all projects; other users only a project they can access."""
+    user_email = request.state.user_email
+    if is_admin(user_email):
+        return
+    if project_id is None:
+        raise HTTPException(status_code=403, detail="Backfilling all projects requires admin access")
+    if await get_accessible_project(project_id, user_email, db) is None:
+        raise HTTPException(status_code=403, detail="You don't have access to this project")
+
+@router.post("/backfill", response_model=Dict[str, Any])
+async def start_backfill(
+    request: Request,
+    project_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_postgres_db)
+):
+    """Start an embedding backfill (all projects unless project_id is given) if none is running"""
+    await _require_backfill_access(project_id, request, db)
+    return embedding_backfill.start(project_id)
+
+@router.post("/backfill/cancel", response_model=Dict[str, Any])
+async def cancel_backfill(request: Request, db: AsyncSession = Depends(get_async_postgres_db)):
+    """Cancel the running embedding backfill; needs the same access as starting it"""
+    if embedding_backfill.running:
+        await _require_backfill_access(embedding_backfill.status().get("project_id"), request, db)
+    return await embedding_backfill.cancel()
@@ -6,7 +6,7 @@ import logging
 from src.kg.deduplicate import merge_duplicate_entities
 from app.utils.auth import check_user_authorization_groups
 from app.utils.project_auth import verify_project_access
-from app.postgres_db import get_postgres_db
+from app.postgres_db import get_async_postgres_db
 
 router = APIRouter()
 
@@ -25,7 +25,7 @@ async def get_selected_project(request: Request):
     }
 
 # Dependency to require a selected project with access verification
-async def require_selected_project(request: Request, db = Depends(get_postgres_db)):
+async def require_selected_project(request: Request, db = Depends(get_async_postgres_db)):
     """
     Requires a selected project for the route by verifying access using 
     the verify_project_access dependency. It handles missing project ID (400)
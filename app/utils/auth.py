@@ -1,5 +1,6 @@
 import logging
-from app.config import TEST_USER_BELONGS_TO_AUTHORIZATION_GROUP
+from fastapi import HTTPException, Request
+from app.config import TEST_USER_BELONGS_TO_AUTHORIZATION_GROUP, ADMIN_AUTHORIZATION_GROUP
 
 def check_user_authorization_groups(user_email: str) -> list:
     """
@@ -34,3 +35,17 @@ def is_user_in_group(user_email: str, group_name: str) -> bool:
     """
     user_groups = check_user_authorization_groups(user_email)
     return group_name in user_groups
+
+def is_admin(user_email: str) -> bool:
+    """Check if a user is in ADMIN_AUTHORIZATION_GROUP (never true when it is unset)."""
+    return bool(ADMIN_AUTHORIZATION_GROUP) and is_user_in_group(user_email, ADMIN_AUTHORIZATION_GROUP)
+
+def require_admin(request: Request):
+    """
+    Dependency for cross-project maintenance routes.
+
+    Raises:
+        HTTPException: 403 if the user is not an admin
+    """
+    if not is_admin(request.state.user_email):
+        raise HTTPException(status_code=403, detail="This operation requires admin access")
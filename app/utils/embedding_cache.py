@@ -0,0 +1,202 @@
+import os
+import hashlib
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+from sqlalchemy import select, update, delete, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.postgres_db import get_postgres_driver
+from app.models.postgres_models import EmbeddingCacheEntry
+
+# Least recently used vectors beyond this many are evicted (0 disables the cache)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+# Hashes looked up per SELECT
+EMBEDDING_CACHE_LOOKUP_BATCH_SIZE = 500
+# Vectors written by this process between checks of the cache size
+EMBEDDING_CACHE_EVICTION_INTERVAL = int(os.getenv("EMBEDDING_CACHE_EVICTION_INTERVAL", "1000"))
+
+def normalize_embedding_text(text: str) -> str:
+    """Texts that differ only in surrounding or repeated whitespace share an embedding."""
+    return " ".join(text.split())
+
+def embedding_text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_embedding_text(text).encode("utf-8")).hexdigest()
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+def unpack_vector(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+class EmbeddingCache:
+    """
+    Postgres-backed cache of embedding vectors keyed by (model, normalized text).
+
+    Vectors are stored as packed float32 blobs. Lookups are batched, hits refresh
+    the entry's last use. Every EMBEDDING_CACHE_EVICTION_INTERVAL written vectors
+    the size is checked in a separate transaction, and only if it is over
+    max_entries are the least recently used entries evicted. Both sync and async
+    access are supported so it can sit under BaseLLMClient.embed_texts and
+    aembed_texts.
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Starts due so the first write after startup checks the size
+        self._written_since_check = EMBEDDING_CACHE_EVICTION_INTERVAL
+
+    # --- Statements shared by the sync and async paths ---
+
+    def _lookup_statement(self, model: str, hashes: List[str]):
+        return select(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.vector).where(
+            EmbeddingCacheEntry.model == model,
+            EmbeddingCacheEntry.text_hash.in_(hashes)
+        )
+
+    def _touch_statement(self, model: str, hashes: List[str]):
+        return (
+            update(EmbeddingCacheEntry)
+            .where(EmbeddingCacheEntry.model == model, EmbeddingCacheEntry.text_hash.in_(hashes))
+            .values(last_used_at=datetime.now(timezone.utc))
+        )
+
+    def _insert_statement(self, model: str, hashes: List[str], vectors: List[List[float]]):
+        now = datetime.now(timezone.utc)
+        rows = {}
+        for text_hash, vector in zip(hashes, vectors):
+            rows[text_hash] = {
+                "model": model,
+                "text_hash": text_hash,
+                "dimensions": len(vector),
+                "vector": pack_vector(vector),
+                "last_used_at": now
+            }
+        # Another worker may have cached the same text in the meantime
+        return insert(EmbeddingCacheEntry).values(list(rows.values())).on_conflict_do_nothing()
+
+    def _count_statement(self):
+        return select(func.count()).select_from(EmbeddingCacheEntry)
+
+    def _evict_statement(self):
+        stale = (
+            select(EmbeddingCacheEntry.model, EmbeddingCacheEntry.text_hash)
+            .order_by(EmbeddingCacheEntry.last_used_at.desc())
+            .offset(self.max_entries)
+        )
+        return delete(EmbeddingCacheEntry).where(
+            tuple_(EmbeddingCacheEntry.model, EmbeddingCacheEntry.text_hash).in_(stale)
+        )
+
+    def _record(self, found: int, total: int):
+        self.hits += found
+        self.misses += total - found
+
+    def _eviction_due(self, written: int) -> bool:
+        self._written_since_check += written
+        if self._written_since_check < EMBEDDING_CACHE_EVICTION_INTERVAL:
+            return False
+        self._written_since_check = 0
+        return True
+
+    # --- Sync API ---
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[int, List[float]]:
+        """Return {index: vector} for the texts that are cached."""
+        hashes = [embedding_text_hash(text) for text in texts]
+        vectors_by_hash = {}
+        with get_postgres_driver().SessionLocal() as session:
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), EMBEDDING_CACHE_LOOKUP_BATCH_SIZE):
+                batch = unique[start:start + EMBEDDING_CACHE_LOOKUP_BATCH_SIZE]
+                for text_hash, blob in session.execute(self._lookup_statement(model, batch)):
+                    vectors_by_hash[text_hash] = unpack_vector(blob)
+            if vectors_by_hash:
+                session.execute(self._touch_statement(model, list(vectors_by_hash)))
+                session.commit()
+        found = {i: vectors_by_hash[h] for i, h in enumerate(hashes) if h in vectors_by_hash}
+        self._record(len(found), len(texts))
+        return found
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        if not texts:
+            return
+        hashes = [embedding_text_hash(text) for text in texts]
+        with get_postgres_driver().SessionLocal() as session:
+            session.execute(self._insert_statement(model, hashes, vectors))
+            session.commit()
+        if self._eviction_due(len(texts)):
+            self.evict()
+
+    def evict(self):
+        """Evict the least recently used entries, if there are more than max_entries."""
+        with get_postgres_driver().SessionLocal() as session:
+            if session.execute(self._count_statement()).scalar_one() > self.max_entries:
+                session.execute(self._evict_statement())
+                session.commit()
+
+    # --- Async API ---
+
+    async def aget_many(self, model: str, texts: List[str]) -> Dict[int, List[float]]:
+        """Async variant of get_many."""
+        hashes = [embedding_text_hash(text) for text in texts]
+        vectors_by_hash = {}
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), EMBEDDING_CACHE_LOOKUP_BATCH_SIZE):
+                batch = unique[start:start + EMBEDDING_CACHE_LOOKUP_BATCH_SIZE]
+                for text_hash, blob in await session.execute(self._lookup_statement(model, batch)):
+                    vectors_by_hash[text_hash] = unpack_vector(blob)
+            if vectors_by_hash:
+                await session.execute(self._touch_statement(model, list(vectors_by_hash)))
+                await session.commit()
+        found = {i: vectors_by_hash[h] for i, h in enumerate(hashes) if h in vectors_by_hash}
+        self._record(len(found), len(texts))
+        return found
+
+    async def aput_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        if not texts:
+            return
+        hashes = [embedding_text_hash(text) for text in texts]
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            await session.execute(self._insert_statement(model, hashes, vectors))
+            await session.commit()
+        if self._eviction_due(len(texts)):
+            await self.aevict()
+
+    async def aevict(self):
+        """Async variant of evict."""
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            if (await session.execute(self._count_statement())).scalar_one() > self.max_entries:
+                await session.execute(self._evict_statement())
+                await session.commit()
+
+    # --- Maintenance ---
+
+    async def stats(self) -> dict:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            entries, size_bytes = (await session.execute(
+                select(
+                    func.count(EmbeddingCacheEntry.text_hash),
+                    func.coalesce(func.sum(func.length(EmbeddingCacheEntry.vector)), 0)
+                )
+            )).one()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.max_entries > 0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "size_bytes": size_bytes,
+            "process_hits": self.hits,
+            "process_misses": self.misses,
+            "process_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    async def clear(self) -> int:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            result = await session.execute(delete(EmbeddingCacheEntry))
+            await session.commit()
+            return result.rowcount
@@ -1,11 +1,17 @@
 import os
 import json
+import logging
 from abc import ABC, abstractmethod
 from typing import Type, TypeVar, List, Dict, Any, Optional, Union
 
 from pydantic import BaseModel, ValidationError
 from openai import OpenAI, AsyncOpenAI
 
+from app.utils.embedding_cache import EmbeddingCache, EMBEDDING_CACHE_MAX_ENTRIES
+from app.metrics import observe_llm_call, record_llm_usage, EMBEDDING_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
 # Define a generic type variable for Pydantic models
 PydanticModel = TypeVar("PydanticModel", bound=BaseModel)
 
@@ -38,7 +44,9 @@ class BaseLLMClient(ABC):
     ) -> PydanticModel:
         pass
 
-    @abstractmethod
+    # Set by get_llm_client when the embedding cache is enabled
+    embedding_cache: Optional[EmbeddingCache] = None
+
     def embed_texts(
         self,
         texts: List[str],
@@ -48,7 +56,83 @@ class BaseLLMClient(ABC):
         """
         Generate embeddings for a list of texts.
         Returns a list of embedding vectors (one per input text).
+
+        Cached vectors are looked up first; only the misses are sent to the
+        embedding endpoint, and their results are cached.
         """
+        if self.embedding_cache is None:
+            EMBEDDING_BATCH_SIZE.labels(model=model_name).observe(len(texts))
+            return self._embed_texts(texts, model_name, **kwargs)
+        try:
+            cached = self.embedding_cache.get_many(model_name, texts)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            cached = {}
+        missing = [i for i in range(len(texts)) if i not in cached]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            EMBEDDING_BATCH_SIZE.labels(model=model_name).observe(len(missing_texts))
+            embeddings = self._embed_texts(missing_texts, model_name, **kwargs)
+            if len(embeddings) != len(missing_texts):
+                raise ValueError(f"Expected {len(missing_texts)} embeddings, got {len(embeddings)}")
+            cached.update(zip(missing, embeddings))
+            try:
+                self.embedding_cache.put_many(model_name, missing_texts, embeddings)
+            except Exception as e:
+                logger.warning(f"Could not cache embeddings: {e}")
+        return [cached[i] for i in range(len(texts))]
+
+    async def aembed_texts(
+        self,
+        texts: List[str],
+        model_name: str,
+        **kwargs: Any
+    ) -> List[List[float]]:
+        """
+        Asynchronously generate embeddings for a list of texts.
+        Returns a list of embedding vectors (one per input text).
+        Uses the embedding cache the same way as embed_texts.
+        """
+        if self.embedding_cache is None:
+            EMBEDDING_BATCH_SIZE.labels(model=model_name).observe(len(texts))
+            return await self._aembed_texts(texts, model_name, **kwargs)
+        try:
+            cached = await self.embedding_cache.aget_many(model_name, texts)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            cached = {}
+        missing = [i for i in range(len(texts)) if i not in cached]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            EMBEDDING_BATCH_SIZE.labels(model=model_name).observe(len(missing_texts))
+            embeddings = await self._aembed_texts(missing_texts, model_name, **kwargs)
+            if len(embeddings) != len(missing_texts):
+                raise ValueError(f"Expected {len(missing_texts)} embeddings, got {len(embeddings)}")
+            cached.update(zip(missing, embeddings))
+            try:
+                await self.embedding_cache.aput_many(model_name, missing_texts, embeddings)
+            except Exception as e:
+                logger.warning(f"Could not cache embeddings: {e}")
+        return [cached[i] for i in range(len(texts))]
+
+    @abstractmethod
+    def _embed_texts(
+        self,
+        texts: List[str],
+        model_name: str,
+        **kwargs: Any
+    ) -> List[List[float]]:
+        """Call the embedding endpoint for texts (no caching)."""
+        pass
+
+    @abstractmethod
+    async def _aembed_texts(
+        self,
+        texts: List[str],
+        model_name: str,
+        **kwargs: Any
+    ) -> List[List[float]]:
+        """Asynchronously call the embedding endpoint for texts (no caching)."""
         pass
 
 # --- 2. Implement the OpenAI Client ---
@@ -70,6 +154,7 @@ class OpenAIClient(BaseLLMClient):
         if not self.client.api_key:
             raise ValueError("OpenAI API key is required. Provide it via api_key argument or OPENAI_API_KEY environment variable.")
 
+    @observe_llm_call("chat")
     def generate_structured_output(
         self,
         model_name: str,
@@ -88,6 +173,7 @@ class OpenAIClient(BaseLLMClient):
                 max_tokens=max_tokens,
                 **kwargs
             )
+            record_llm_usage(model_name, completion.usage)
             result_object = completion.choices[0].message.parsed
             if not isinstance(result_object, pydantic_model):
                 raise TypeError(f"Parsed object is not of type {pydantic_model.__name__}, got {type(result_object)}")
@@ -95,6 +181,7 @@ class OpenAIClient(BaseLLMClient):
         except Exception as e:
             raise
 
+    @observe_llm_call("chat")
     async def agenerate_structured_output(
         self,
         model_name: str,
@@ -113,6 +200,7 @@ class OpenAIClient(BaseLLMClient):
                 max_tokens=max_tokens,
                 **kwargs
             )
+            record_llm_usage(model_name, completion.usage)
             result_object = completion.choices[0].message.parsed
             if not isinstance(result_object, pydantic_model):
                 raise TypeError(f"Parsed object is not of type {pydantic_model.__name__}, got {type(result_object)}")
@@ -120,7 +208,8 @@ class OpenAIClient(BaseLLMClient):
         except Exception as e:
             raise
 
-    def embed_texts(
+    @observe_llm_call("embedding")
+    def _embed_texts(
         self,
         texts: List[str],
         model_name: str,
@@ -132,11 +221,30 @@ class OpenAIClient(BaseLLMClient):
                 model=model_name,
                 **kwargs
             )
+            record_llm_usage(model_name, response.usage)
             # OpenAI returns a list of objects with .embedding
             return [item.embedding for item in response.data]
         except Exception as e:
             raise
 
+    @observe_llm_call("embedding")
+    async def _aembed_texts(
+        self,
+        texts: List[str],
+        model_name: str,
+        **kwargs: Any
+    ) -> List[List[float]]:
+        try:
+            response = await self.aclient.embeddings.create(
+                input=texts,
+                model=model_name,
+                **kwargs
+            )
+            record_llm_usage(model_name, response.usage)
+            return [item.embedding for item in response.data]
+        except Exception as e:
+            raise
+
 # --- 3. Implement the vLLM Client (via OpenAI Compatible Endpoint) ---
 
 class VLLMClient(BaseLLMClient):
@@ -158,6 +266,7 @@ class VLLMClient(BaseLLMClient):
 
         self.base_url = base_url
 
+    @observe_llm_call("chat")
     def generate_structured_output(
         self,
         model_name: str,
@@ -181,6 +290,7 @@ class VLLMClient(BaseLLMClient):
                 stop=stop,
                 extra_body=extra_body
             )
+            record_llm_usage(model_name, completion.usage)
             raw_response_content = completion.choices[0].message.content
             if not raw_response_content:
                 raise ValueError("vLLM returned empty content.")
@@ -191,6 +301,7 @@ class VLLMClient(BaseLLMClient):
         except Exception as e:
             raise
 
+    @observe_llm_call("chat")
     async def agenerate_structured_output(
         self,
         model_name: str,
@@ -215,6 +326,7 @@ class VLLMClient(BaseLLMClient):
                 stop=stop,
                 extra_body=extra_body
             )
+            record_llm_usage(model_name, completion.usage)
             raw_response_content = completion.choices[0].message.content
             if not raw_response_content:
                 raise ValueError("vLLM returned empty content.")
@@ -225,7 +337,8 @@ class VLLMClient(BaseLLMClient):
         except Exception as e:
             raise
 
-    def embed_texts(
+    @observe_llm_call("embedding")
+    def _embed_texts(
         self,
         texts: List[str],
         model_name: str,
@@ -237,21 +350,56 @@ class VLLMClient(BaseLLMClient):
                 model=model_name,
                 **kwargs
             )
+            record_llm_usage(model_name, response.usage)
+            return [item.embedding for item in response.data]
+        except Exception as e:
+            raise
+
+    @observe_llm_call("embedding")
+    async def _aembed_texts(
+        self,
+        texts: List[str],
+        model_name: str,
+        **kwargs: Any
+    ) -> List[List[float]]:
+        try:
+            response = await self.aclient.embeddings.create(
+                input=texts,
+                model=model_name,
+                **kwargs
+            )
+            record_llm_usage(model_name, response.usage)
             return [item.embedding for item in response.data]
         except Exception as e:
             raise
 
 # --- 4. Factory Method ---
 
+_llm_client: Optional[BaseLLMClient] = None
+
 def get_llm_client() -> BaseLLMClient:
     """
     Factory method to get the correct LLM client based on USE_OPENAI env var.
     If USE_OPENAI is set to "1", "true", or "yes" (case-insensitive), use OpenAI.
     Otherwise, use vLLM.
+
+    The client is created once per process so its HTTP connection pools
+    (sync and async) are reused across requests. Unless EMBEDDING_CACHE_MAX_ENTRIES
+    is 0, embeddings go through the persistent embedding cache.
     """
-    use_openai = os.getenv("USE_OPENAI", "1").lower() in ("1", "true", "yes")
-    if use_openai:
-        return OpenAIClient()
-    else:
-        vllm_base = os.getenv("VLLM_BASE", "http://localhost:8000/v1")
-        return VLLMClient(base_url=vllm_base)
+    global _llm_client
+    if _llm_client is None:
+        use_openai = os.getenv("USE_OPENAI", "1").lower() in ("1", "true", "yes")
+        if use_openai:
+            _llm_client = OpenAIClient()
+        else:
+            vllm_base = os.getenv("VLLM_BASE", "http://localhost:8000/v1")
+            _llm_client = VLLMClient(base_url=vllm_base)
+        if EMBEDDING_CACHE_MAX_ENTRIES > 0:
+            _llm_client.embedding_cache = EmbeddingCache()
+    return _llm_client
+
+def set_llm_client(client: Optional[BaseLLMClient]):
+    """Replace the process-wide client (e.g. with an offline fake for benchmarks). None resets it."""
+    global _llm_client
+    _llm_client = client
@@ -0,0 +1,78 @@
+import json
+import base64
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import PAGINATION_TOTAL_CACHE_SIZE, PAGINATION_TOTAL_CACHE_TTL
+from app.utils.cache import TTLCache
+
+# Listing totals keyed by (listing, project_id); counts may lag writes by up to the TTL
+_total_cache = TTLCache(maxsize=PAGINATION_TOTAL_CACHE_SIZE, ttl=PAGINATION_TOTAL_CACHE_TTL)
+
+def encode_cursor(name: Optional[str], node_id: int) -> str:
+    """Encode a (name, id) sort key as an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps([name, node_id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        name, node_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not (name is None or isinstance(name, str)) or not isinstance(node_id, int):
+        raise ValueError("Invalid cursor")
+    return name, node_id
+
+def keyset_phases(name_expr: str, id_expr: str, cursor: Optional[Tuple[Optional[str], int]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Build the Cypher predicates selecting rows after cursor in ORDER BY name_expr, id_expr order.
+
+    Neo4j sorts null names last, so the rows come in two ranges, run one after the
+    other (see fetch_keyset_page): named rows after the cursor, whose name >= bound
+    allows an index range seek on (project_id, name), then rows with a null name,
+    ordered by id among themselves. Keeping them apart means the null rows are
+    only scanned once every named row has been paged through.
+
+    Returns:
+        [(predicate, parameters), ...] to AND into the query's WHERE clause, in order
+    """
+    if cursor is None:
+        return [(f"{name_expr} IS NOT NULL", {}), (f"{name_expr} IS NULL", {})]
+    name, node_id = cursor
+    if name is None:
+        return [(f"{name_expr} IS NULL AND {id_expr} > $cursor_id", {"cursor_id": node_id})]
+    return [
+        (
+            f"{name_expr} >= $cursor_name AND ({name_expr} > $cursor_name OR {id_expr} > $cursor_id)",
+            {"cursor_name": name, "cursor_id": node_id}
+        ),
+        (f"{name_expr} IS NULL", {})
+    ]
+
+def fetch_keyset_page(phases: List[Tuple[str, Dict[str, Any]]], limit: int, run: Callable[[str, Dict[str, Any], int], list]) -> list:
+    """
+    Collect up to limit rows by calling run(predicate, parameters, remaining) for each
+    phase from keyset_phases in turn, stopping as soon as the page is full.
+    """
+    rows = []
+    for condition, params in phases:
+        rows += run(condition, params, limit - len(rows))
+        if len(rows) >= limit:
+            break
+    return rows
+
+def get_cached_total(listing: str, project_id: int, count) -> int:
+    """Return the cached total for a listing, calling count() to refresh it when missing or expired."""
+    key = (listing, project_id)
+    total = _total_cache.get(key)
+    if total is None:
+        total = count()
+        _total_cache.set(key, total)
+    return total
+
+def invalidate_cached_totals(project_id: int):
+    """Drop cached listing totals for a project after its people or relationships change."""
+    _total_cache.invalidate_where(lambda key: key[1] == project_id)
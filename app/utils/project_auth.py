@@ -1,58 +1,78 @@
-from functools import lru_cache, wraps
+from functools import wraps
 from fastapi import HTTPException, Request, Depends, Query # Added Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.postgres_db import get_postgres_db
+from app.config import PROJECT_ACCESS_CACHE_SIZE, PROJECT_ACCESS_CACHE_TTL
+from app.postgres_db import get_async_postgres_db
 from app.models.postgres_models import Project
 from app.utils.auth import is_user_in_group
+from app.utils.cache import TTLCache
 
-def check_project_access(project_id: int, user_email: str, db: Session) -> bool:
+# Cache of (user_email, project_id) -> project details for users with access.
+# Denials are not cached, so newly granted access takes effect immediately.
+_project_access_cache = TTLCache(maxsize=PROJECT_ACCESS_CACHE_SIZE, ttl=PROJECT_ACCESS_CACHE_TTL)
+
+def _project_details(db_project: Project) -> dict:
+    """Build the project details dict returned by verify_project_access."""
+    return {
+        "project_id": db_project.id,
+        "project_name": db_project.name,
+        "project_description": db_project.description,
+        "project_authorization_group": db_project.authorization_group,
+        "project_creator_email": db_project.creator_email
+    }
+
+async def get_accessible_project(project_id: int, user_email: str, db: AsyncSession) -> Optional[dict]:
     """
-    Check if a user has access to a project.
+    Get project details if the user has access to the project.
+    
+    Results are cached per (user, project) for PROJECT_ACCESS_CACHE_TTL seconds,
+    so a cache hit makes no database or authorization-group lookups.
     
     Args:
         project_id: The ID of the project to check
         user_email: The email of the user
-        db: Database session
+        db: Async database session
         
     Returns:
-        bool: True if the user has access, False otherwise
+        dict: Project details, or None if the project doesn't exist or the user has no access
     """
+    cache_key = (user_email, project_id)
+    cached = _project_access_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    
     # Query the project
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    result = await db.execute(select(Project).where(Project.id == project_id))
+    db_project = result.scalars().first()
     
-    # If project doesn't exist, return False
+    # If project doesn't exist, there is nothing to access
     if not db_project:
-        return False
-    
-    # Check if user is the creator
-    if db_project.creator_email == user_email:
-        return True
+        return None
     
-    # Check if user is in the project's authorization group
-    if is_user_in_group(user_email, db_project.authorization_group):
-        return True
+    # User has access if they are the creator or in the project's authorization group
+    if db_project.creator_email != user_email and not is_user_in_group(user_email, db_project.authorization_group):
+        return None
     
-    # User doesn't have access
-    return False
+    details = _project_details(db_project)
+    _project_access_cache.set(cache_key, details)
+    return dict(details)
 
-# Cache the project access check to avoid repeated database queries
-@lru_cache(maxsize=1024)
-def cached_check_project_access(project_id: int, user_email: str) -> bool:
+async def check_project_access(project_id: int, user_email: str, db: AsyncSession) -> bool:
     """
-    Cached version of check_project_access.
+    Check if a user has access to a project.
     
-    Note: This function creates its own database session, so it should not be used
-    within an existing database transaction.
+    Args:
+        project_id: The ID of the project to check
+        user_email: The email of the user
+        db: Async database session
+        
+    Returns:
+        bool: True if the user has access, False otherwise
     """
-    from app.postgres_db import SessionLocal
-    
-    db = SessionLocal()
-    try:
-        return check_project_access(project_id, user_email, db)
-    finally:
-        db.close()
+    return await get_accessible_project(project_id, user_email, db) is not None
 
 def require_project_access(project_id_param: str = "project_id"):
     """
@@ -66,7 +86,7 @@ def require_project_access(project_id_param: str = "project_id"):
     """
     def decorator(func):
         @wraps(func)
-        async def wrapper(*args, request: Request = None, db: Session = None, **kwargs):
+        async def wrapper(*args, request: Request = None, db: AsyncSession = None, **kwargs):
             # Get request and db from kwargs if not provided as args
             if request is None:
                 request = kwargs.get("request")
@@ -85,7 +105,7 @@ def require_project_access(project_id_param: str = "project_id"):
             user_email = request.state.user_email
             
             # Check if user has access to the project
-            if not check_project_access(project_id, user_email, db):
+            if not await check_project_access(project_id, user_email, db):
                 raise HTTPException(status_code=403, detail="You don't have access to this project")
             
             # User has access, proceed with the route
@@ -99,7 +119,7 @@ def require_project_access(project_id_param: str = "project_id"):
 async def verify_project_access(
     request: Request,
     project_id_query: Optional[int] = None,
-    db: Session = Depends(get_postgres_db)
+    db: AsyncSession = Depends(get_async_postgres_db)
 ):
     """
     Dependency to check if a user has access to a project.
@@ -108,7 +128,7 @@ async def verify_project_access(
     Args:
         request: The request object
         project_id_query: Project ID from query parameter (e.g., ?project_id=1)
-        db: Database session
+        db: Async database session
         
     Returns:
         dict: Project information if the user has access
@@ -149,34 +169,24 @@ async def verify_project_access(
                 detail=f"Invalid Project ID format. Received: {target_project_id}. Error: {str(e)}"
             )
 
-    # Check if user has access to the project
-    if not check_project_access(target_project_id, user_email, db):
+    # Check if user has access to the project (served from cache when possible)
+    project_details = await get_accessible_project(target_project_id, user_email, db)
+    if project_details is None:
         raise HTTPException(status_code=403, detail="You don't have access to this project")
     
-    # Get project details
-    db_project = db.query(Project).filter(Project.id == target_project_id).first()
-    
-    # If project doesn't exist (might happen if ID is invalid despite check_project_access passing somehow)
-    if not db_project:
-         raise HTTPException(status_code=404, detail="Project not found")
-         
     # Return project information
-    return {
-        "project_id": db_project.id,
-        "project_name": db_project.name,
-        "project_description": db_project.description,
-        "project_authorization_group": db_project.authorization_group,
-        "project_creator_email": db_project.creator_email
-    }
+    return project_details
 
-# Function to invalidate the cache for a specific project and user
-def invalidate_project_access_cache(project_id: int, user_email: str):
+# Function to invalidate cached access checks for a project
+def invalidate_project_access_cache(project_id: int, user_email: Optional[str] = None):
     """
-    Invalidate the cache for a specific project and user.
+    Invalidate cached access checks for a project.
     
     Args:
         project_id: The ID of the project
-        user_email: The email of the user
+        user_email: Only invalidate this user's entry; all users' entries if None
     """
-    if (project_id, user_email) in cached_check_project_access.cache_info().currsize:
-        cached_check_project_access.cache_clear()
+    if user_email is not None:
+        _project_access_cache.pop((user_email, project_id))
+    else:
+        _project_access_cache.invalidate_where(lambda key: key[1] == project_id)
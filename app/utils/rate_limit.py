@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for budgeting LLM requests (about 4 characters per token).
+    Good enough for rate limiting; not meant to match the tokenizer exactly.
+    """
+    return len(text) // 4 + 1
+
+class AsyncTokenRateLimiter:
+    """
+    Token-bucket limiter that keeps LLM usage under a tokens-per-minute budget.
+
+    The bucket holds up to one minute of budget and refills continuously.
+    Callers wait in arrival order until enough budget is available.
+    A budget of 0 (or less) disables limiting.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._available = float(max(tokens_per_minute, 0))
+        self._rate = max(tokens_per_minute, 0) / 60.0
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.tokens_per_minute > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(
+            float(self.tokens_per_minute),
+            self._available + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    async def acquire(self, tokens: int):
+        """Wait until tokens can be spent without exceeding the budget, then spend them."""
+        if not self.enabled:
+            return
+        # A single request larger than the whole budget waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            self._refill()
+            while self._available < tokens:
+                await asyncio.sleep((tokens - self._available) / self._rate)
+                self._refill()
+            self._available -= tokens
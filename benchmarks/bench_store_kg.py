@@ -0,0 +1,161 @@
+"""
+Benchmark storing an extracted knowledge graph in Neo4j.
+
+Compares the original row-by-row write path of /api/kg/store (one CREATE per
+entity, two MATCH lookups plus one CREATE per relationship, auto-commit) with
+the batched UNWIND writer in src.kg.store, and reports store time per 1k entities.
+
+Requires a running Neo4j (configured through the usual NEO4J_* variables).
+Synthetic data is written to a throwaway project id and deleted afterwards.
+
+Usage:
+    python -m benchmarks.bench_store_kg --entities 1000 --relationships-per-entity 2
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+
+from app.database import get_driver, close_driver
+from src.kg.store import store_knowledge_graph, neo4j_relationship_type
+
+RELATIONSHIP_LABELS = ["friend of", "colleague of", "married to", "advisor to", "rival of"]
+
+def generate_knowledge_graph(num_entities: int, relationships_per_entity: int, seed: int = 42):
+    """Generate a deterministic synthetic knowledge graph in the /api/kg/extract format."""
+    rng = random.Random(seed)
+    entities = [
+        {
+            "entity_id": f"e{i}",
+            "label": f"Person {i}",
+            "type": "Person",
+            "description": f"Synthetic person number {i} used for benchmarking."
+        }
+        for i in range(num_entities)
+    ]
+    relationships = []
+    if num_entities > 1:
+        for i in range(num_entities):
+            for _ in range(relationships_per_entity):
+                j = rng.randrange(num_entities - 1)
+                j = j + 1 if j >= i else j
+                relationships.append({
+                    "source_id": f"e{i}",
+                    "target_id": f"e{j}",
+                    "label": rng.choice(RELATIONSHIP_LABELS)
+                })
+    return entities, relationships
+
+def store_row_by_row(session, entities, relationships, project_id, user_email, current_time):
+    """The original /api/kg/store write path, kept here as the benchmark baseline."""
+    count_record = session.run(
+        "MATCH (p:Person {project_id: $project_id}) RETURN COUNT(p) as count",
+        project_id=project_id
+    ).single()
+    offset = count_record["count"] if count_record else 0
+    id_mapping = {}
+    for i, entity in enumerate(entities):
+        new_entity_id = str(int(offset) + i + 1)
+        id_mapping[entity["entity_id"]] = new_entity_id
+        session.run(
+            """
+            CREATE (p:Person {
+                entity_id: $entity_id, original_entity_id: $original_entity_id,
+                name: $name, description: $description, project_id: $project_id,
+                created_by: $user_email, created_at: $current_time,
+                updated_by: $user_email, updated_at: $current_time
+            })
+            RETURN p, ID(p) as id
+            """,
+            entity_id=new_entity_id,
+            original_entity_id=entity["entity_id"],
+            name=entity["label"],
+            description=entity["description"],
+            project_id=project_id,
+            user_email=user_email,
+            current_time=current_time
+        ).single()
+    for rel in relationships:
+        source = session.run(
+            "MATCH (p:Person {entity_id: $entity_id, project_id: $project_id}) RETURN ID(p) as id",
+            entity_id=id_mapping[rel["source_id"]],
+            project_id=project_id
+        ).single()
+        target = session.run(
+            "MATCH (p:Person {entity_id: $entity_id, project_id: $project_id}) RETURN ID(p) as id",
+            entity_id=id_mapping[rel["target_id"]],
+            project_id=project_id
+        ).single()
+        rel_type = neo4j_relationship_type(rel["label"])
+        session.run(
+            f"""
+            MATCH (p1:Person) WHERE ID(p1) = $id1 AND p1.project_id = $project_id
+            MATCH (p2:Person) WHERE ID(p2) = $id2 AND p2.project_id = $project_id
+            CREATE (p1)-[r:{rel_type} {{
+                project_id: $project_id, created_by: $user_email, created_at: $current_time,
+                updated_by: $user_email, updated_at: $current_time
+            }}]->(p2)
+            RETURN type(r) as relationship_type
+            """,
+            id1=source["id"],
+            id2=target["id"],
+            project_id=project_id,
+            user_email=user_email,
+            current_time=current_time
+        ).single()
+
+def store_batched(session, entities, relationships, project_id, user_email, current_time):
+    store_knowledge_graph(session, entities, relationships, project_id, user_email, current_time)
+
+def delete_project_graph(session, project_id):
+    session.run(
+        """
+        MATCH (p:Person {project_id: $project_id})
+        CALL { WITH p DETACH DELETE p } IN TRANSACTIONS OF 1000 ROWS
+        """,
+        project_id=project_id
+    )
+
+def run(num_entities: int, relationships_per_entity: int, repeats: int, project_id: int) -> dict:
+    entities, relationships = generate_knowledge_graph(num_entities, relationships_per_entity)
+    user_email = "benchmark@example.com"
+    driver = get_driver()
+    results = {}
+    for name, store in (("row_by_row", store_row_by_row), ("batched_unwind", store_batched)):
+        timings = []
+        for _ in range(repeats):
+            with driver.get_session() as session:
+                delete_project_graph(session, project_id)
+                current_time = datetime.utcnow().isoformat()
+                start = time.perf_counter()
+                store(session, entities, relationships, project_id, user_email, current_time)
+                timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results[name] = {
+            "seconds": round(best, 4),
+            "seconds_per_1k_entities": round(best * 1000 / max(num_entities, 1), 4),
+            "runs": [round(t, 4) for t in timings]
+        }
+    with driver.get_session() as session:
+        delete_project_graph(session, project_id)
+    results["speedup"] = round(results["row_by_row"]["seconds"] / max(results["batched_unwind"]["seconds"], 1e-9), 1)
+    return {
+        "benchmark": "store_kg",
+        "entities": num_entities,
+        "relationships": len(relationships),
+        "repeats": repeats,
+        "results": results
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the /api/kg/store write path.")
+    parser.add_argument("--entities", type=int, default=1000, help="Number of synthetic entities to store.")
+    parser.add_argument("--relationships-per-entity", type=int, default=2, help="Outgoing relationships per entity.")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per write path; the best run is reported.")
+    parser.add_argument("--project-id", type=int, default=-1, help="Throwaway project id to write into (its Person nodes are deleted).")
+    args = parser.parse_args()
+    try:
+        print(json.dumps(run(args.entities, args.relationships_per_entity, args.repeats, args.project_id), indent=2))
+    finally:
+        close_driver()
@@ -0,0 +1,113 @@
+"""
+Deterministic offline LLM client for the benchmarks.
+
+Embeddings are feature-hashed bags of words, so texts that share words get
+similar vectors and the same text always gets the same vector. Duplicate
+confirmation answers "duplicate" when two names share a surname and first
+initial, for single-entity and multi-group prompts alike. No network calls
+are made; an optional fixed latency can simulate API round trips.
+"""
+import re
+import math
+import time
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional, Type
+
+from app.utils.llm import BaseLLMClient, PydanticModel
+from app.utils.rate_limit import estimate_tokens
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Candidate lines in the deduplication confirmation prompt
+CANDIDATE_PATTERN = re.compile(r"^ID: (\S+?), Name: (.*?), Description:", re.MULTILINE)
+TARGET_PATTERN = re.compile(r"^ID: (\S+)\nName: (.*)$", re.MULTILINE)
+# Each target/candidates group starts with this line
+GROUP_SEPARATOR = "Target Entity:"
+
+def name_key(name: str):
+    """(first initial, surname) of a person name, ignoring titles and case."""
+    tokens = [t for t in TOKEN_PATTERN.findall(name.lower()) if t not in ("dr", "mr", "mrs", "ms", "prof")]
+    if not tokens:
+        return None
+    return tokens[0][0], tokens[-1]
+
+class FakeLLMClient(BaseLLMClient):
+    def __init__(self, dimensions: int, latency: float = 0.0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.calls = 0
+        self.embedded_texts = 0
+        self.prompt_tokens = 0
+
+    # --- Embeddings ---
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _embed_texts(self, texts: List[str], model_name: str, **kwargs: Any) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls += 1
+        self.embedded_texts += len(texts)
+        return [self.embed(text) for text in texts]
+
+    async def _aembed_texts(self, texts: List[str], model_name: str, **kwargs: Any) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls += 1
+        self.embedded_texts += len(texts)
+        return [self.embed(text) for text in texts]
+
+    # --- Structured output (duplicate confirmation only) ---
+
+    def _answer(self, messages: List[Dict[str, str]], pydantic_model: Type[PydanticModel]) -> PydanticModel:
+        if "duplicates" not in pydantic_model.model_fields:
+            raise NotImplementedError(f"FakeLLMClient cannot produce {pydantic_model.__name__}")
+        prompt = messages[-1]["content"]
+        duplicates = []
+        for group in prompt.split(GROUP_SEPARATOR)[1:]:
+            target = TARGET_PATTERN.search(group)
+            if not target:
+                continue
+            target_key = name_key(target.group(2))
+            duplicates += [
+                # target_id is ignored by the single-entity response model
+                {"target_id": target.group(1), "candidate_id": candidate_id, "justification": "Same surname and first initial"}
+                for candidate_id, name in CANDIDATE_PATTERN.findall(group)
+                if target_key is not None and name_key(name) == target_key
+            ]
+        self.prompt_tokens += sum(estimate_tokens(message["content"]) for message in messages)
+        self.calls += 1
+        return pydantic_model.model_validate({"duplicates": duplicates})
+
+    def generate_structured_output(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        pydantic_model: Type[PydanticModel],
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> PydanticModel:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(messages, pydantic_model)
+
+    async def agenerate_structured_output(
+        self,
+        model_name: str,
+        messages: List[Dict[str, str]],
+        pydantic_model: Type[PydanticModel],
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> PydanticModel:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(messages, pydantic_model)
@@ -0,0 +1,306 @@
+"""
+Benchmark suite for the store, export, pagination and deduplication hot paths.
+
+Generates a synthetic project (see benchmarks/synthetic.py), embeds it with a
+deterministic offline LLM client (benchmarks/fake_llm.py) and times:
+
+- store_kg: embedding + the batched Neo4j write used by /api/kg/store
+- export_kg: streaming the NDJSON and JSON exports
+- read_people: walking every page with cursors and with legacy page numbers
+- candidates: duplicate candidate generation with the Neo4j vector index and NumPy
+- find_potential_duplicates: candidates plus (fake) LLM confirmation
+- merge_duplicate_entities: merging confirmed pairs one at a time and in one batch
+
+Requires a running Neo4j (configured through the usual NEO4J_* variables); no
+OpenAI key or Postgres is needed. Synthetic data is written to a throwaway
+project id and deleted afterwards. Results are printed (or written with
+--output) as JSON, and --compare prints the ratio against an earlier result file.
+
+Usage:
+    python -m benchmarks.suite --people 2000 --output bench_output.json
+    python -m benchmarks.suite --people 2000 --compare bench_output.json
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime
+
+from app.utils.llm import set_llm_client
+from app.database import get_driver, close_driver
+from app.neo4j_schema import init_schema, get_embedding_dimensions
+from src.kg.embeddings import embedding_model, entity_embedding_text, agenerate_embeddings
+from src.kg.store import store_knowledge_graph
+from benchmarks.bench_store_kg import delete_project_graph
+from benchmarks.fake_llm import FakeLLMClient
+from benchmarks.synthetic import generate_project
+
+USER_EMAIL = "benchmark@example.com"
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def timed(fn, repeats: int) -> dict:
+    """Run fn repeats times; report the best run and keep the last return value under 'value'."""
+    timings = []
+    value = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        value = fn()
+        timings.append(time.perf_counter() - start)
+    return {"seconds": round(min(timings), 4), "runs": [round(t, 4) for t in timings], "value": value}
+
+def bench_store(db, entities, relationships, project_id, repeats) -> dict:
+    texts = [entity_embedding_text(entity["label"], entity["description"]) for entity in entities]
+    embed_runs, store_runs = [], []
+    for _ in range(repeats):
+        with db.get_session() as session:
+            delete_project_graph(session, project_id)
+        start = time.perf_counter()
+        embeddings = asyncio.run(agenerate_embeddings(texts))
+        embedded = time.perf_counter()
+        with db.get_session() as session:
+            store_knowledge_graph(
+                session, entities, relationships, project_id, USER_EMAIL,
+                datetime.utcnow().isoformat(), embeddings=embeddings
+            )
+        embed_runs.append(embedded - start)
+        store_runs.append(time.perf_counter() - embedded)
+    # New nodes must be in the vector index before the candidate benchmarks
+    with db.get_session() as session:
+        session.run("CALL db.awaitIndexes(600)").consume()
+    totals = [e + s for e, s in zip(embed_runs, store_runs)]
+    best = totals.index(min(totals))
+    return {
+        "seconds": round(totals[best], 4),
+        "embed_seconds": round(embed_runs[best], 4),
+        "store_seconds": round(store_runs[best], 4),
+        "seconds_per_1k_entities": round(totals[best] * 1000 / max(len(entities), 1), 4),
+        "runs": [round(t, 4) for t in totals]
+    }
+
+def bench_export(db, project_id, repeats) -> dict:
+    from app.routes.kg import stream_export_ndjson, stream_export_json
+
+    results = {}
+    for name, stream in (("ndjson", stream_export_ndjson), ("json", stream_export_json)):
+        result = timed(lambda: sum(len(chunk) for chunk in stream(db, project_id)), repeats)
+        result["bytes"] = result.pop("value")
+        results[name] = result
+    return results
+
+def bench_pagination(db, project_id, page_size, repeats) -> dict:
+    from app.routes.api import read_people
+
+    project_details = {"project_id": project_id}
+
+    def cursor_walk():
+        pages, cursor = 0, None
+        while True:
+            page = read_people(limit=page_size, cursor=cursor, include_total=False, db=db, project_details=project_details)
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def page_walk():
+        pages = 0
+        while True:
+            page = read_people(page=pages + 1, limit=page_size, cursor=None, include_total=False, db=db, project_details=project_details)
+            pages += 1
+            if page["next_cursor"] is None:
+                return pages
+
+    results = {}
+    for name, walk in (("cursor", cursor_walk), ("page_number", page_walk)):
+        result = timed(walk, repeats)
+        result["pages"] = result.pop("value")
+        results[name] = result
+    return results
+
+def bench_candidates(db, project_id, num_people, repeats) -> dict:
+    from src.kg.deduplicate import (
+        DEDUP_CANDIDATE_BATCH_SIZE, get_recent_entities_with_embeddings, query_similar_entities_batch
+    )
+    from src.kg.similarity import load_project_embeddings, similar_entity_rows
+
+    similarity_threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
+    top_n = int(os.getenv("VECTOR_TOP_N", "40"))
+    batch_size = max(1, DEDUP_CANDIDATE_BATCH_SIZE)
+    with db.get_session() as session:
+        entities = get_recent_entities_with_embeddings(session, project_id, num_people, include_embeddings=False)
+    batches = [entities[start:start + batch_size] for start in range(0, len(entities), batch_size)]
+
+    def vector_index():
+        return sum(
+            len(rows)
+            for batch in batches
+            for rows in query_similar_entities_batch(batch, project_id, similarity_threshold, top_n)
+        )
+
+    def numpy_matrix():
+        with db.get_session() as session:
+            matrix = load_project_embeddings(session, project_id)
+        return sum(
+            len(similar_entity_rows(matrix, [entity.id for entity in batch], similarity_threshold, top_n))
+            for batch in batches
+        )
+
+    results = {}
+    for name, generate in (("neo4j", vector_index), ("numpy", numpy_matrix)):
+        result = timed(generate, repeats)
+        result["candidate_rows"] = result.pop("value")
+        results[name] = result
+    return results
+
+def bench_find_duplicates(project_id, num_people, fake_client, repeats) -> tuple[dict, list]:
+    from src.kg.deduplicate import find_potential_duplicates
+
+    calls_before = fake_client.calls
+    tokens_before = fake_client.prompt_tokens
+    # Not incremental, so every repeat does the full amount of work
+    result = timed(lambda: asyncio.run(find_potential_duplicates(num_people, project_id, incremental=False)), repeats)
+    response = result.pop("value")
+    result["entities_checked"] = response.total_entities_checked
+    result["duplicates_found"] = response.potential_duplicates_found
+    result["clusters_found"] = len(response.clusters)
+    result["lexical_accepted"] = response.lexical_accepted
+    result["lexical_pruned"] = response.lexical_pruned
+    result["llm_calls_per_run"] = (fake_client.calls - calls_before) // max(repeats, 1)
+    result["llm_prompt_tokens_per_run"] = (fake_client.prompt_tokens - tokens_before) // max(repeats, 1)
+    return result, response.duplicates
+
+def bench_merge(project_id, duplicates, max_pairs) -> dict:
+    from src.kg.deduplicate import merge_duplicate_entities, merge_duplicate_entities_batch
+
+    # Merge pairs that do not share an entity, so every merge finds both nodes
+    pairs, used = [], set()
+    for dup in duplicates:
+        if len(pairs) >= max_pairs:
+            break
+        if dup.entity1_id in used or dup.entity2_id in used:
+            continue
+        used.update((dup.entity1_id, dup.entity2_id))
+        pairs.append((dup.entity1_id, dup.entity2_id))
+
+    # Merging is destructive, so half the pairs are merged one request at a
+    # time and the other half in a single batched transaction
+    half = len(pairs) // 2
+    current_time = datetime.utcnow().isoformat()
+    start = time.perf_counter()
+    for keep_id, duplicate_id in pairs[:half]:
+        asyncio.run(merge_duplicate_entities(keep_id, duplicate_id, USER_EMAIL, current_time, project_id))
+    one_by_one = time.perf_counter() - start
+    start = time.perf_counter()
+    asyncio.run(merge_duplicate_entities_batch(pairs[half:], USER_EMAIL, current_time, project_id))
+    batched = time.perf_counter() - start
+    return {
+        "one_by_one": {
+            "seconds": round(one_by_one, 4),
+            "pairs": half,
+            "seconds_per_pair": round(one_by_one / half, 4) if half else 0.0
+        },
+        "batch": {
+            "seconds": round(batched, 4),
+            "pairs": len(pairs) - half,
+            "seconds_per_pair": round(batched / (len(pairs) - half), 4) if len(pairs) > half else 0.0
+        }
+    }
+
+def run(args) -> dict:
+    fake_client = FakeLLMClient(get_embedding_dimensions(embedding_model), latency=args.llm_latency)
+    set_llm_client(fake_client)
+    entities, relationships = generate_project(
+        args.people, args.relationships_per_person, args.duplicate_fraction, seed=args.seed
+    )
+    db = get_driver()
+    init_schema(db)
+    results = {}
+    try:
+        results["store_kg"] = bench_store(db, entities, relationships, args.project_id, args.repeats)
+        results["export_kg"] = bench_export(db, args.project_id, args.repeats)
+        results["read_people"] = bench_pagination(db, args.project_id, args.page_size, args.repeats)
+        results["candidates"] = bench_candidates(db, args.project_id, args.people, args.repeats)
+        results["find_potential_duplicates"], duplicates = bench_find_duplicates(
+            args.project_id, args.people, fake_client, args.repeats
+        )
+        results["merge_duplicate_entities"] = bench_merge(args.project_id, duplicates, args.merge_pairs)
+    finally:
+        if not args.keep:
+            with db.get_session() as session:
+                delete_project_graph(session, args.project_id)
+    return {
+        "benchmark": "suite",
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "parameters": {
+            "people": args.people,
+            "relationships": len(relationships),
+            "duplicate_fraction": args.duplicate_fraction,
+            "page_size": args.page_size,
+            "repeats": args.repeats,
+            "llm_latency": args.llm_latency,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+def flatten_seconds(results: dict, prefix: str = "") -> dict:
+    """{"store_kg": {"seconds": 1.0}, "export_kg": {"json": {"seconds": 2.0}}} -> {"store_kg": 1.0, "export_kg.json": 2.0}"""
+    flat = {}
+    for name, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        key = f"{prefix}{name}"
+        if "seconds" in value:
+            flat[key] = value["seconds"]
+        flat.update(flatten_seconds(value, key + "."))
+    return flat
+
+def compare(baseline: dict, current: dict) -> dict:
+    """Per benchmark: baseline and current seconds and current/baseline (below 1 is faster)."""
+    before = flatten_seconds(baseline["results"])
+    after = flatten_seconds(current["results"])
+    return {
+        name: {
+            "baseline": before[name],
+            "current": after[name],
+            "ratio": round(after[name] / before[name], 3) if before[name] else None
+        }
+        for name in after if name in before
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the store, export, pagination and deduplication hot paths.")
+    parser.add_argument("--people", type=int, default=1000, help="Number of synthetic people (including duplicates).")
+    parser.add_argument("--relationships-per-person", type=int, default=2, help="Outgoing relationships per person.")
+    parser.add_argument("--duplicate-fraction", type=float, default=0.05, help="Fraction of people that duplicate another.")
+    parser.add_argument("--page-size", type=int, default=50, help="Page size for the read_people walk.")
+    parser.add_argument("--merge-pairs", type=int, default=50, help="Maximum confirmed pairs to merge.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per fake LLM call.")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per benchmark; the best run is reported.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic project.")
+    parser.add_argument("--project-id", type=int, default=-1, help="Throwaway project id to write into (its Person nodes are deleted).")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic project in Neo4j afterwards.")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    args = parser.parse_args()
+    try:
+        result = run(args)
+    finally:
+        close_driver()
+    if args.compare:
+        with open(args.compare) as f:
+            result["comparison"] = compare(json.load(f), result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
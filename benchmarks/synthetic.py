@@ -0,0 +1,81 @@
+"""
+Synthetic projects for the benchmarks.
+
+A project is a list of Person entities and relationships in the /api/kg/extract
+format. A fraction of the people are written a second time under a variant of
+their name (a title, an initial), with the same occupation and city, so the
+deduplication pipeline has real duplicates to find.
+"""
+import random
+from typing import Dict, List, Tuple
+
+FIRST_NAMES = [
+    "Ada", "Alan", "Barbara", "Claude", "Donald", "Edsger", "Frances", "Grace", "John", "Katherine",
+    "Ken", "Leslie", "Margaret", "Niklaus", "Radia", "Robin", "Shafi", "Tim", "Vint", "Whitfield"
+]
+LAST_NAMES = [
+    "Allen", "Backus", "Cerf", "Dijkstra", "Engelbart", "Feigenbaum", "Goldwasser", "Hopper", "Iverson",
+    "Johnson", "Kahn", "Lamport", "Liskov", "McCarthy", "Naur", "Perlman", "Ritchie", "Shannon",
+    "Thompson", "Turing", "Valiant", "Wirth", "Yao", "Zuse"
+]
+OCCUPATIONS = [
+    "mathematician", "physicist", "chemist", "engineer", "architect", "economist",
+    "historian", "linguist", "surgeon", "pilot", "composer", "novelist"
+]
+CITIES = [
+    "Amsterdam", "Boston", "Cairo", "Dublin", "Edinburgh", "Florence", "Geneva", "Helsinki",
+    "Istanbul", "Kyoto", "Lisbon", "Montreal", "Nairobi", "Oslo", "Prague", "Quito"
+]
+RELATIONSHIP_LABELS = ["friend of", "colleague of", "married to", "advisor to", "rival of"]
+
+def _variant(name: str, rng: random.Random) -> str:
+    first, last = name.split(" ", 1)
+    return rng.choice([f"Dr. {name}", f"{first[0]}. {last}", name.upper()])
+
+def generate_project(
+    num_people: int,
+    relationships_per_person: int = 2,
+    duplicate_fraction: float = 0.05,
+    seed: int = 42
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """
+    Generate a deterministic synthetic project.
+
+    Returns:
+        (entities, relationships); num_people includes the duplicate records
+    """
+    rng = random.Random(seed)
+    num_duplicates = int(num_people * duplicate_fraction)
+    num_originals = num_people - num_duplicates
+
+    entities = []
+    for i in range(num_originals):
+        # The index keeps names unique beyond the size of the name pools
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}{i}"
+        entities.append({
+            "entity_id": f"e{i}",
+            "label": name,
+            "type": "Person",
+            "description": f"{rng.choice(OCCUPATIONS)} in {rng.choice(CITIES)}"
+        })
+    for i in range(num_duplicates):
+        original = entities[rng.randrange(num_originals)]
+        entities.append({
+            "entity_id": f"d{i}",
+            "label": _variant(original["label"], rng),
+            "type": "Person",
+            "description": original["description"]
+        })
+
+    relationships = []
+    if len(entities) > 1:
+        for i, entity in enumerate(entities):
+            for _ in range(relationships_per_person):
+                j = rng.randrange(len(entities) - 1)
+                j = j + 1 if j >= i else j
+                relationships.append({
+                    "source_id": entity["entity_id"],
+                    "target_id": entities[j]["entity_id"],
+                    "label": rng.choice(RELATIONSHIP_LABELS)
+                })
+    return entities, relationships
@@ -2,19 +2,22 @@ import os
 import requests
 import json
 import argparse # Added argparse
+import time
 from tqdm import tqdm
 
 # Base URL for the API
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+# Seconds between job status polls
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
 
 def read_text_file(file_path):
     """Read content from a text file."""
     with open(file_path, 'r', encoding='utf-8') as file:
         return file.read()
 
-def extract_knowledge_graph(text: str, project_id: int, user_email: str):
-    """Call the extract endpoint to extract knowledge graph from text for a specific project."""
-    url = f"{BASE_URL}/api/kg/extract"
+def submit_job(text: str, project_id: int, user_email: str):
+    """Submit text as a background extraction + storage job for a specific project. Returns the job id."""
+    url = f"{BASE_URL}/api/jobs/extract"
     headers = {
         "Content-Type": "application/json",
         "X-User-Email": user_email # Use provided user email for auth
@@ -22,62 +25,50 @@ def extract_knowledge_graph(text: str, project_id: int, user_email: str):
     params = {"project_id": project_id} # Pass project_id as query parameter
     payload = {"text": text}
     
-    print(f"  Extracting KG for project {project_id}...")
     response = requests.post(url, headers=headers, params=params, json=payload)
     
-    if response.status_code != 200:
-        print(f"Error extracting knowledge graph: {response.text}")
+    if response.status_code != 202:
+        print(f"Error submitting job: {response.text}")
         return None
     
-    # Return only the relevant parts (entities, relationships)
-    data = response.json()
-    return {
-        "entities": data.get("entities", []),
-        "relationships": data.get("relationships", [])
-    }
+    return response.json()["id"]
 
-def store_knowledge_graph(kg_data: dict, project_id: int, user_email: str):
-    """Call the store endpoint to store the knowledge graph in Neo4j for a specific project."""
-    url = f"{BASE_URL}/api/kg/store"
-    headers = {
-        "Content-Type": "application/json",
-        "X-User-Email": user_email # Use provided user email for auth
-    }
-    params = {"project_id": project_id} # Pass project_id as query parameter
+def get_job(job_id: int, user_email: str):
+    """Fetch the current state of a job."""
+    url = f"{BASE_URL}/api/jobs/{job_id}"
+    headers = {"X-User-Email": user_email} # Use provided user email for auth
     
-    print(f"  Storing KG for project {project_id}...")
-    response = requests.post(url, headers=headers, params=params, json=kg_data)
+    response = requests.get(url, headers=headers)
     
     if response.status_code != 200:
-        print(f"Error storing knowledge graph: {response.text}")
+        print(f"Error fetching job {job_id}: {response.text}")
         return None
     
     return response.json()
 
-def process_file(file_path: str, project_id: int, user_email: str):
-    """Process a single text file by extracting and storing its knowledge graph for a specific project."""
-    # Read the file content
-    text = read_text_file(file_path)
-    
-    # Extract knowledge graph
-    kg_data = extract_knowledge_graph(text, project_id, user_email)
-    if kg_data is None: # Check for None explicitly
-        print(f"  Extraction failed for {os.path.basename(file_path)}")
-        return False
-        
-    # Check if extraction actually returned entities/relationships
-    if not kg_data.get("entities") and not kg_data.get("relationships"):
-        print(f"  No entities or relationships extracted from {os.path.basename(file_path)}")
-        # Decide if this counts as success or failure - let's say success as the process ran
-        return True 
-        
-    # Store knowledge graph
-    result = store_knowledge_graph(kg_data, project_id, user_email)
-    if result is None: # Check for None explicitly
-        print(f"  Storing failed for {os.path.basename(file_path)}")
-        return False
-    
-    return True
+def wait_for_jobs(jobs: dict, user_email: str):
+    """Poll submitted jobs until all of them finish. Returns (successful, failed) counts."""
+    successful = 0
+    failed = 0
+    pending = dict(jobs)  # job_id -> file name
+    with tqdm(total=len(pending), desc="Processing files") as progress:
+        while pending:
+            for job_id, file_name in list(pending.items()):
+                job = get_job(job_id, user_email)
+                if job is None:
+                    continue
+                if job["status"] == "completed":
+                    successful += 1
+                elif job["status"] == "failed":
+                    print(f"  Job {job_id} failed for {file_name}: {job['error']}")
+                    failed += 1
+                else:
+                    continue
+                del pending[job_id]
+                progress.update(1)
+            if pending:
+                time.sleep(POLL_INTERVAL)
+    return successful, failed
 
 def main(project_id: int, user_email: str):
     """Main function to process all text files in the test_text folder for a specific project."""
@@ -96,22 +87,23 @@ def main(project_id: int, user_email: str):
         if f.endswith('.txt')
     ]
     
-    # Process each file with a progress bar
-    successful = 0
-    failed = 0
-    
     print(f"Found {len(txt_files)} text files to process for Project ID: {project_id}")
     
-    for file_path in tqdm(txt_files, desc="Processing files"):
+    # Submit every file as a background job; the server extracts, embeds and stores them
+    jobs = {}
+    failed_submissions = 0
+    for file_path in txt_files:
         file_name = os.path.basename(file_path)
-        # print(f"\nProcessing {file_name}...") # tqdm provides progress
-        
-        if process_file(file_path, project_id, user_email):
-            successful += 1
-            # print(f"Successfully processed {file_name}")
+        job_id = submit_job(read_text_file(file_path), project_id, user_email)
+        if job_id is None:
+            print(f"  Submission failed for {file_name}")
+            failed_submissions += 1
         else:
-            failed += 1
-            # print(f"Failed to process {file_name}")
+            jobs[job_id] = file_name
+    
+    # Wait for the jobs to finish
+    successful, failed = wait_for_jobs(jobs, user_email)
+    failed += failed_submissions
     
     print(f"\nProcessing complete for Project ID {project_id}: {successful} successful, {failed} failed")
 
@@ -0,0 +1,38 @@
+"""Create extraction cache table
+
+Revision ID: 8e4f2a6c1d37
+Revises: 3c1d7e9a2b64
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4f2a6c1d37'
+down_revision: Union[str, None] = '3c1d7e9a2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('extraction_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=255), nullable=True),
+        sa.Column('prompt_version', sa.String(length=50), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('size_bytes', sa.Integer(), nullable=True),
+        sa.Column('hits', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_extraction_cache_last_used_at'), 'extraction_cache', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_extraction_cache_last_used_at'), table_name='extraction_cache')
+    op.drop_table('extraction_cache')
@@ -0,0 +1,47 @@
+"""Create dedup watermark and verdict tables
+
+Revision ID: d2c8b1f6a9e5
+Revises: b7a95d3e4f12
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2c8b1f6a9e5'
+down_revision: Union[str, None] = 'b7a95d3e4f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('dedup_watermarks',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('changed_at', sa.String(length=64), nullable=True),
+        sa.Column('node_id', sa.BigInteger(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('project_id')
+    )
+    op.create_table('dedup_verdicts',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('entity1_id', sa.BigInteger(), nullable=False),
+        sa.Column('entity2_id', sa.BigInteger(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=True),
+        sa.Column('decision', sa.String(length=20), nullable=True),
+        sa.Column('model', sa.String(length=255), nullable=True),
+        sa.Column('confidence_score', sa.Float(), nullable=True),
+        sa.Column('reasoning', sa.Text(), nullable=True),
+        sa.Column('decided_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('project_id', 'entity1_id', 'entity2_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dedup_verdicts')
+    op.drop_table('dedup_watermarks')
@@ -0,0 +1,28 @@
+"""Add job owner and heartbeat
+
+Revision ID: e4a1c7b9d3f2
+Revises: d2c8b1f6a9e5
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a1c7b9d3f2'
+down_revision: Union[str, None] = 'd2c8b1f6a9e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('worker_id', sa.String(length=255), nullable=True))
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'heartbeat_at')
+    op.drop_column('jobs', 'worker_id')
@@ -0,0 +1,51 @@
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+class DisjointSet:
+    """Union-find over arbitrary hashable items, with path halving and union by size."""
+
+    def __init__(self):
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.size: Dict[Hashable, int] = {}
+
+    def add(self, item: Hashable):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        self.add(item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: Hashable, b: Hashable) -> Hashable:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+    def groups(self) -> List[List[Hashable]]:
+        """Connected components, each in insertion order, ordered by their first item."""
+        components: Dict[Hashable, List[Hashable]] = {}
+        for item in self.parent:
+            components.setdefault(self.find(item), []).append(item)
+        return list(components.values())
+
+def connected_components(edges: Iterable[Tuple[Hashable, Hashable]]) -> List[List[Hashable]]:
+    """Group the endpoints of edges (e.g. confirmed duplicate pairs) into connected components."""
+    disjoint_set = DisjointSet()
+    for a, b in edges:
+        disjoint_set.union(a, b)
+    return disjoint_set.groups()
+
+def choose_canonical(members: List[str], degrees: Dict[str, int]) -> str:
+    """
+    Pick the entity that survives a cluster merge: the one with the most
+    relationships (so the fewest need re-pointing), then the oldest (lowest id).
+    """
+    return min(members, key=lambda member: (-degrees.get(member, 0), int(member)))
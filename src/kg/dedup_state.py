@@ -0,0 +1,135 @@
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.postgres_db import get_postgres_driver
+from app.models.postgres_models import DedupWatermark, DedupVerdict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pairs looked up per SELECT and upserted per INSERT
+VERDICT_LOOKUP_BATCH_SIZE = 500
+
+def pair_key(entity1_id, entity2_id) -> Tuple[int, int]:
+    """Order-independent key of a pair of Person node ids."""
+    a, b = int(entity1_id), int(entity2_id)
+    return (a, b) if a < b else (b, a)
+
+def pair_fingerprint(entity1, entity2) -> str:
+    """
+    sha256 over both entities' ids, names and descriptions (in id order).
+    A stored verdict only applies while the fingerprint still matches, so
+    edited entities, and node ids reused by Neo4j, are judged again.
+    """
+    digest = hashlib.sha256()
+    for entity in sorted((entity1, entity2), key=lambda e: int(e.id)):
+        for part in (str(entity.id), entity.name or "", entity.description or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+async def get_watermark(project_id: int) -> Optional[Tuple[str, int]]:
+    """(changed_at, node_id) where the last incremental run stopped, or None to start from the beginning."""
+    try:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            watermark = await session.get(DedupWatermark, project_id)
+            return (watermark.changed_at, watermark.node_id) if watermark else None
+    except Exception as e:
+        logger.warning(f"Could not load dedup watermark for project {project_id}: {e}")
+        return None
+
+async def set_watermark(project_id: int, changed_at: str, node_id: int):
+    try:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            await session.merge(DedupWatermark(project_id=project_id, changed_at=changed_at, node_id=node_id))
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Could not save dedup watermark for project {project_id}: {e}")
+
+async def get_verdicts(project_id: int, pairs: List[Tuple[int, int]]) -> Dict[Tuple[int, int], DedupVerdict]:
+    """Stored verdicts by pair_key for the given pairs. Lookup errors are treated as no verdicts."""
+    verdicts = {}
+    unique = list(dict.fromkeys(pair_key(a, b) for a, b in pairs))
+    try:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            for start in range(0, len(unique), VERDICT_LOOKUP_BATCH_SIZE):
+                batch = unique[start:start + VERDICT_LOOKUP_BATCH_SIZE]
+                result = await session.execute(
+                    select(DedupVerdict).where(
+                        DedupVerdict.project_id == project_id,
+                        tuple_(DedupVerdict.entity1_id, DedupVerdict.entity2_id).in_(batch)
+                    )
+                )
+                for verdict in result.scalars():
+                    verdicts[(verdict.entity1_id, verdict.entity2_id)] = verdict
+    except Exception as e:
+        logger.warning(f"Dedup verdict lookup failed: {e}")
+    return verdicts
+
+async def get_duplicate_verdicts(project_id: int, models: List[str]) -> List[DedupVerdict]:
+    """All of a project's stored "duplicate" verdicts made by one of models. Lookup errors are treated as none."""
+    try:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(DedupVerdict).where(
+                    DedupVerdict.project_id == project_id,
+                    DedupVerdict.decision == "duplicate",
+                    DedupVerdict.model.in_(models)
+                )
+            )
+            return list(result.scalars())
+    except Exception as e:
+        logger.warning(f"Dedup verdict lookup failed: {e}")
+        return []
+
+async def save_verdicts(project_id: int, verdicts: List[dict]):
+    """
+    Upsert verdicts, each a dict with 'entity1_id', 'entity2_id', 'fingerprint',
+    'decision', 'model' and optionally 'confidence_score' and 'reasoning'.
+    """
+    if not verdicts:
+        return
+    now = datetime.now(timezone.utc)
+    rows = {}
+    for verdict in verdicts:
+        entity1_id, entity2_id = pair_key(verdict["entity1_id"], verdict["entity2_id"])
+        rows[(entity1_id, entity2_id)] = {
+            "project_id": project_id,
+            "entity1_id": entity1_id,
+            "entity2_id": entity2_id,
+            "fingerprint": verdict["fingerprint"],
+            "decision": verdict["decision"],
+            "model": verdict["model"],
+            "confidence_score": verdict.get("confidence_score"),
+            "reasoning": verdict.get("reasoning"),
+            "decided_at": now
+        }
+    rows = list(rows.values())
+    try:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            # Batched to stay under the driver's bind parameter limit
+            for start in range(0, len(rows), VERDICT_LOOKUP_BATCH_SIZE):
+                statement = insert(DedupVerdict).values(rows[start:start + VERDICT_LOOKUP_BATCH_SIZE])
+                statement = statement.on_conflict_do_update(
+                    index_elements=[DedupVerdict.project_id, DedupVerdict.entity1_id, DedupVerdict.entity2_id],
+                    set_={
+                        column: statement.excluded[column]
+                        for column in ("fingerprint", "decision", "model", "confidence_score", "reasoning", "decided_at")
+                    }
+                )
+                await session.execute(statement)
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Could not save {len(rows)} dedup verdicts: {e}")
+
+async def reset_dedup_state(project_id: int) -> dict:
+    """Forget the watermark and all verdicts of a project, so the next run checks everything again."""
+    async with get_postgres_driver().AsyncSessionLocal() as session:
+        verdicts = await session.execute(delete(DedupVerdict).where(DedupVerdict.project_id == project_id))
+        await session.execute(delete(DedupWatermark).where(DedupWatermark.project_id == project_id))
+        await session.commit()
+        return {"verdicts_deleted": verdicts.rowcount}
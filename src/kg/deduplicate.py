@@ -1,11 +1,21 @@
 from tqdm import tqdm
 import os
+import asyncio
 import logging
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import Callable, List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from app.utils.llm import get_llm_client
+from app.utils.rate_limit import AsyncTokenRateLimiter, estimate_tokens
+from app.database import get_driver
+from src.kg.embeddings import EMBEDDING_BATCH_SIZE, entity_embedding_text, agenerate_embeddings
+from src.kg.merge import merge_entities
+from src.kg.clustering import connected_components, choose_canonical
+from src.kg.lexical import lexical_score, suffixes_conflict, is_placeholder_name, same_surname
+from src.kg.dedup_state import (
+    pair_key, pair_fingerprint, get_watermark, set_watermark, get_verdicts, get_duplicate_verdicts, save_verdicts
+)
 from openai import OpenAI
-from neo4j import GraphDatabase
 # from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -27,62 +37,108 @@ embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
 logger.info(f"Using OpenAI model: {model}")
 logger.info(f"Using OpenAI embedding model: {embedding_model}")
 
-async def batch_generate_embeddings(project_id: Optional[int] = None, batch_size: int = 100):
+# Deduplication pipeline settings
+# Entities whose vector candidates are fetched per batch
+DEDUP_CANDIDATE_BATCH_SIZE = int(os.getenv("DEDUP_CANDIDATE_BATCH_SIZE", "50"))
+# Maximum LLM confirmation requests in flight
+DEDUP_LLM_CONCURRENCY = int(os.getenv("DEDUP_LLM_CONCURRENCY", "8"))
+# Token budget per minute for LLM confirmations (0 disables rate limiting)
+DEDUP_TOKENS_PER_MINUTE = int(os.getenv("DEDUP_TOKENS_PER_MINUTE", "0"))
+# Tokens reserved for each confirmation response when budgeting
+DEDUP_RESPONSE_TOKEN_ALLOWANCE = int(os.getenv("DEDUP_RESPONSE_TOKEN_ALLOWANCE", "256"))
+# Estimated prompt tokens of target/candidate groups packed into one confirmation request (0 sends one request per entity)
+DEDUP_LLM_BATCH_TOKENS = int(os.getenv("DEDUP_LLM_BATCH_TOKENS", "2000"))
+# Candidate generation backend: "neo4j" (vector index) or "numpy" (in-process matrix multiply)
+DEDUP_CANDIDATE_BACKEND = os.getenv("DEDUP_CANDIDATE_BACKEND", "neo4j").lower()
+# Lexical pre-scoring of candidates before the LLM (see triage_candidates)
+DEDUP_LEXICAL_BLOCKING = os.getenv("DEDUP_LEXICAL_BLOCKING", "1").lower() in ("1", "true", "yes")
+# Lexical score at or above which a candidate is accepted without the LLM
+DEDUP_LEXICAL_ACCEPT_SCORE = float(os.getenv("DEDUP_LEXICAL_ACCEPT_SCORE", "0.95"))
+# Lexical score below which a candidate is dropped without the LLM
+DEDUP_LEXICAL_PRUNE_SCORE = float(os.getenv("DEDUP_LEXICAL_PRUNE_SCORE", "0.5"))
+# Vector score needed to auto-accept; candidates at or above it are never pruned
+DEDUP_AUTO_ACCEPT_SIMILARITY = float(os.getenv("DEDUP_AUTO_ACCEPT_SIMILARITY", "0.9"))
+
+def _run_query(query: str, **params) -> List[Dict[str, Any]]:
+    """Run a Cypher query on the shared driver in a short-lived session (safe to call from a worker thread)."""
+    with get_driver().get_session() as session:
+        return session.run(query, **params).data()
+
+async def batch_generate_embeddings(
+    project_id: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    progress: Optional[Callable[[int, int, int], None]] = None
+):
     """
     Generate and store embeddings for all Person nodes (optionally by project) that do not have an embedding.
+    Each batch is embedded with batched embedding requests and written back with a single UNWIND query.
+
+    Neo4j calls run in worker threads and embeddings use the async client, so the
+    event loop is never blocked; cancelling the task stops after the current batch.
+    progress, if given, is called as progress(processed, failed, total) after each batch.
     """
     logger.info(f"Starting batch embedding generation for {'all projects' if project_id is None else f'project {project_id}'}")
-    NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-    NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password123")
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    try:
-        with driver.session() as session:
-            while True:
-                # Build query for batch of Person nodes without embedding
-                query = """
-                MATCH (p:Person)
-                WHERE p.embedding IS NULL
-                """
-                if project_id is not None:
-                    query += " AND p.project_id = $project_id"
-                query += """
-                RETURN ID(p) as id, p.name as name, p.description as description
-                LIMIT $batch_size
+    batch_size = batch_size or EMBEDDING_BATCH_SIZE
+    project_filter = " AND p.project_id = $project_id" if project_id is not None else ""
+    count = await asyncio.to_thread(
+        _run_query,
+        "MATCH (p:Person) WHERE p.embedding IS NULL" + project_filter + " RETURN count(p) as count",
+        project_id=project_id
+    )
+    total = count[0]["count"] if count else 0
+    processed = 0
+    if progress:
+        progress(processed, 0, total)
+    # Nodes whose embedding failed are skipped so the loop cannot refetch them forever
+    failed_ids = []
+    while True:
+        # Fetch a batch of Person nodes without embedding
+        entities = await asyncio.to_thread(
+            _run_query,
+            """
+            MATCH (p:Person)
+            WHERE p.embedding IS NULL AND NOT ID(p) IN $failed_ids
+            """ + project_filter + """
+            RETURN ID(p) as id, p.name as name, p.description as description
+            LIMIT $batch_size
+            """,
+            batch_size=batch_size,
+            failed_ids=failed_ids,
+            project_id=project_id
+        )
+        if not entities:
+            break
+        logger.info(f"Processing batch of {len(entities)} entities for embeddings")
+        texts = [entity_embedding_text(entity["name"], entity["description"]) for entity in entities]
+        # Use the LLM abstraction for embeddings (supports OpenAI and vLLM)
+        embeddings = await agenerate_embeddings(texts, client=client, model_name=embedding_model, batch_size=batch_size)
+        rows = []
+        for entity, embedding in zip(entities, embeddings):
+            if embedding is None:
+                failed_ids.append(entity["id"])
+            else:
+                rows.append({"id": entity["id"], "embedding": embedding})
+        if rows:
+            await asyncio.to_thread(
+                _run_query,
                 """
-                params = {"batch_size": batch_size}
-                if project_id is not None:
-                    params["project_id"] = project_id
-                entities = session.run(query, **params).data()
-                if not entities:
-                    break
-                logger.info(f"Processing batch of {len(entities)} entities for embeddings")
-                for entity in entities:
-                    entity_id = entity["id"]
-                    text = f"{entity['name'] or ''} - {entity['description'] or ''}"
-                    try:
-                        # Use the LLM abstraction for embeddings (supports OpenAI and vLLM)
-                        embedding = client.embed_texts([text], model_name=embedding_model)[0]
-                        session.run(
-                            """
-                            MATCH (p:Person) WHERE ID(p) = $entity_id
-                            SET p.embedding = $embedding
-                            """,
-                            entity_id=entity_id,
-                            embedding=embedding
-                        )
-                        logger.info(f"Set embedding for Person node {entity_id}")
-                    except Exception as e:
-                        logger.error(f"Error generating embedding for entity {entity_id}: {e}")
-    finally:
-        driver.close()
+                UNWIND $rows AS row
+                MATCH (p:Person) WHERE ID(p) = row.id
+                SET p.embedding = row.embedding, p.embedded_at = $embedded_at
+                """,
+                rows=rows,
+                # Lets incremental deduplication pick up nodes that only now have an embedding
+                embedded_at=datetime.utcnow().isoformat()
+            )
+        processed += len(entities)
+        logger.info(f"Set embeddings for {len(rows)} Person nodes ({len(entities) - len(rows)} failed)")
+        if progress:
+            # New nodes may arrive while the backfill runs
+            progress(processed, len(failed_ids), max(total, processed))
+    if failed_ids:
+        logger.warning(f"Could not generate embeddings for {len(failed_ids)} Person nodes")
     logger.info("Batch embedding generation completed.")
 
-# Neo4j connection configuration
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7688")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password123")
-
 # --- Pydantic Models ---
 class DeduplicationRequest(BaseModel):
     """Request model for deduplication."""
@@ -107,11 +163,27 @@ class BatchDeduplicationResult(BaseModel):
     """Model for OpenAI's batch deduplication response."""
     duplicate_pairs: List[DuplicatePair] = Field(..., description="List of potential duplicate entity pairs")
 
+class DuplicateClusterMember(BaseModel):
+    id: str = Field(..., description="ID of the entity")
+    name: str = Field(..., description="Name of the entity")
+
+class DuplicateCluster(BaseModel):
+    """Entities connected by confirmed duplicate pairs, to be merged into one canonical entity."""
+    canonical_id: str = Field(..., description="ID of the entity that survives the merge")
+    canonical_name: str = Field(..., description="Name of the entity that survives the merge")
+    members: List[DuplicateClusterMember] = Field(..., description="Entities merged into the canonical entity")
+    confidence_score: float = Field(..., description="Lowest confidence score among the cluster's pairs")
+    pairs: List[DuplicatePair] = Field(..., description="Confirmed pairs that form the cluster")
+
 class DeduplicationResponse(BaseModel):
     """Response model for deduplication results."""
     total_entities_checked: int = Field(..., description="Total number of entities checked")
     potential_duplicates_found: int = Field(..., description="Number of potential duplicate pairs found")
     duplicates: List[DuplicatePair] = Field([], description="List of potential duplicate pairs")
+    clusters: List[DuplicateCluster] = Field([], description="Duplicate pairs grouped transitively into clusters")
+    reused_verdicts: int = Field(0, description="Candidate pairs answered from stored verdicts instead of the LLM")
+    lexical_accepted: int = Field(0, description="Candidate pairs accepted by name without the LLM")
+    lexical_pruned: int = Field(0, description="Candidate pairs dropped by name without the LLM")
 
 class EntityNode(BaseModel):
     id: str
@@ -124,12 +196,18 @@ class CandidatePair(BaseModel):
     entity2: EntityNode
     vector_score: float
 
-def get_recent_entities_with_embeddings(session, project_id: int, limit: int) -> list[EntityNode]:
+def get_recent_entities_with_embeddings(session, project_id: int, limit: int, include_embeddings: bool = True) -> list[EntityNode]:
+    """
+    Get the most recent entities in the project that have an embedding.
+    Pass include_embeddings=False when the vectors are only used server-side,
+    to avoid shipping them over Bolt.
+    """
     records = session.run(
-        """
-        MATCH (p:Person {project_id: $project_id})
+        f"""
+        MATCH (p:Person {{project_id: $project_id}})
         WHERE p.embedding IS NOT NULL
-        RETURN ID(p) as id, p.name as name, p.description as description, p.embedding as embedding
+        RETURN ID(p) as id, p.name as name, p.description as description,
+               {"p.embedding" if include_embeddings else "null"} as embedding
         ORDER BY ID(p) DESC
         LIMIT $limit
         """,
@@ -146,34 +224,96 @@ def get_recent_entities_with_embeddings(session, project_id: int, limit: int) ->
         for r in records
     ]
 
-def get_vector_candidate_pairs(session, entities: list[EntityNode], project_id: int, similarity_threshold: float) -> list[CandidatePair]:
-    processed_pairs = set()
-    candidate_pairs = []
-    for entity in entities:
-        if not entity.embedding:
-            continue
-        similar_entities = session.run(
-            """
-            CALL db.index.vector.queryNodes('person_embeddings', 41, $embedding)
+def get_changed_entities(session, project_id: int, limit: int, since: Optional[tuple] = None) -> tuple[list[EntityNode], list[str]]:
+    """
+    Get up to limit entities with an embedding that were created, updated or
+    embedded after the (changed_at, node id) watermark, oldest change first.
+    Timestamps are the ISO strings stored on the nodes, so they sort as text.
+
+    Returns:
+        (entities, changed_at per entity)
+    """
+    since_at, since_id = since or ("", -1)
+    records = session.run(
+        """
+        MATCH (p:Person {project_id: $project_id})
+        WHERE p.embedding IS NOT NULL
+        WITH p, reduce(latest = '', t IN [p.created_at, p.updated_at, p.embedded_at] |
+                       CASE WHEN t > latest THEN t ELSE latest END) as changed_at
+        WHERE changed_at > $since_at OR (changed_at = $since_at AND ID(p) > $since_id)
+        RETURN ID(p) as id, p.name as name, p.description as description, changed_at
+        ORDER BY changed_at, ID(p)
+        LIMIT $limit
+        """,
+        project_id=project_id,
+        since_at=since_at,
+        since_id=since_id,
+        limit=limit
+    ).data()
+    entities = [
+        EntityNode(id=str(r["id"]), name=r["name"] or "Unknown", description=r["description"] or "")
+        for r in records
+    ]
+    return entities, [r["changed_at"] for r in records]
+
+def get_vector_candidate_rows(session, entity_ids: list[str], project_id: int, similarity_threshold: float, top_n: int = 40) -> list[dict]:
+    """
+    Get vector search candidates for a batch of entities in a single round trip.
+
+    Each entity's own embedding is looked up server-side and used to query the
+    'person_embeddings' index for its top N neighbours in the project above the
+    similarity threshold.
+
+    Returns:
+        Rows with 'entity_id', 'id', 'name', 'description' and 'score',
+        ordered by input entity and then by descending score
+    """
+    if not entity_ids:
+        return []
+    return session.run(
+        """
+        UNWIND range(0, size($entity_ids) - 1) AS idx
+        WITH idx, $entity_ids[idx] AS entity_id
+        MATCH (e:Person) WHERE ID(e) = entity_id AND e.embedding IS NOT NULL
+        CALL {
+            WITH e, entity_id
+            CALL db.index.vector.queryNodes('person_embeddings', $k, e.embedding)
             YIELD node, score
-            WHERE ID(node) <> $entity_id
+            WHERE ID(node) <> entity_id
               AND node.project_id = $project_id
               AND score > $threshold
-            RETURN ID(node) as id, node.name as name, node.description as description, score
+            RETURN node, score
             ORDER BY score DESC
-            LIMIT 40
-            """,
-            entity_id=int(entity.id),
-            project_id=project_id,
-            embedding=entity.embedding,
-            threshold=similarity_threshold
-        ).data()
+            LIMIT $top_n
+        }
+        RETURN entity_id, ID(node) as id, node.name as name, node.description as description, score
+        ORDER BY idx, score DESC
+        """,
+        entity_ids=[int(entity_id) for entity_id in entity_ids],
+        project_id=project_id,
+        threshold=similarity_threshold,
+        k=top_n + 1,
+        top_n=top_n
+    ).data()
+
+def group_candidate_rows(entities: list[EntityNode], rows: list[dict]) -> list[list[dict]]:
+    """Split get_vector_candidate_rows output into one list of similar entities per input entity."""
+    rows_by_entity = {entity.id: [] for entity in entities}
+    for row in rows:
+        rows_by_entity.setdefault(str(row["entity_id"]), []).append(row)
+    return [rows_by_entity[entity.id] for entity in entities]
+
+def candidate_pairs_from_rows(entities: list[EntityNode], rows: list[dict]) -> list[CandidatePair]:
+    """Build de-duplicated CandidatePairs from candidate rows (as returned by get_vector_candidate_rows)."""
+    processed_pairs = set()
+    candidate_pairs = []
+    for entity, similar_entities in zip(entities, group_candidate_rows(entities, rows)):
         for similar in similar_entities:
             similar_id = str(similar["id"])
-            pair_key = tuple(sorted([entity.id, similar_id]))
-            if pair_key in processed_pairs:
+            key = tuple(sorted([entity.id, similar_id]))
+            if key in processed_pairs:
                 continue
-            processed_pairs.add(pair_key)
+            processed_pairs.add(key)
             candidate_pairs.append(CandidatePair(
                 entity1=entity,
                 entity2=EntityNode(
@@ -186,6 +326,10 @@ def get_vector_candidate_pairs(session, entities: list[EntityNode], project_id:
             ))
     return candidate_pairs
 
+def get_vector_candidate_pairs(session, entities: list[EntityNode], project_id: int, similarity_threshold: float, top_n: int = 40) -> list[CandidatePair]:
+    rows = get_vector_candidate_rows(session, [entity.id for entity in entities], project_id, similarity_threshold, top_n)
+    return candidate_pairs_from_rows(entities, rows)
+
 class DuplicatePairResult(BaseModel):
     entity1_id: str
     entity2_id: str
@@ -194,17 +338,46 @@ class DuplicatePairResult(BaseModel):
 class DuplicatePairResultList(BaseModel):
     duplicates: List[DuplicatePairResult]
 
+def format_candidate_group(entity: EntityNode, candidates: list[EntityNode]) -> str:
+    """Prompt section describing a target entity and its candidates."""
+    candidate_descriptions = [
+        f"ID: {cand.id}, Name: {cand.name}, Description: {cand.description}"
+        for cand in candidates
+    ]
+    return (
+        f"Target Entity:\n"
+        f"ID: {entity.id}\n"
+        f"Name: {entity.name}\n"
+        f"Description: {entity.description}\n\n"
+        f"Candidates:\n" +
+        "\n".join(candidate_descriptions)
+    )
+
+def confirmed_duplicate_pair(entity: EntityNode, cand: EntityNode, vector_scores: dict, justification: str) -> DuplicatePair:
+    score = vector_scores.get(cand.id, 0.0)
+    return DuplicatePair(
+        entity1_id=entity.id,
+        entity1_name=entity.name,
+        entity2_id=cand.id,
+        entity2_name=cand.name,
+        confidence_score=round(score * 10, 1),
+        reasoning=f"Vector similarity score: {score:.3f}. OpenAI: {justification}"
+    )
+
 async def confirm_duplicates_with_openai_per_entity(
     entity: EntityNode,
     candidates: list[EntityNode],
     vector_scores: dict,
     openai_model: str,
-    openai_api_key: str
+    openai_api_key: str,
+    rate_limiter: Optional[AsyncTokenRateLimiter] = None,
+    raise_errors: bool = False
 ) -> list[DuplicatePair]:
     """
     For a single entity and its candidate list, ask OpenAI which candidates are duplicates of the entity.
+    If a rate limiter is given, the request waits until its estimated tokens fit the budget.
+    Errors are logged and yield no pairs, unless raise_errors is set.
     """
-    from tqdm import tqdm
     client = get_llm_client()
     confirmed = []
 
@@ -212,18 +385,8 @@ async def confirm_duplicates_with_openai_per_entity(
         return confirmed
 
     # Prepare prompt
-    candidate_descriptions = []
-    for cand in candidates:
-        candidate_descriptions.append(
-            f"ID: {cand.id}, Name: {cand.name}, Description: {cand.description}"
-        )
     prompt = (
-        f"Target Entity:\n"
-        f"ID: {entity.id}\n"
-        f"Name: {entity.name}\n"
-        f"Description: {entity.description}\n\n"
-        f"Candidates:\n" +
-        "\n".join(candidate_descriptions) +
+        format_candidate_group(entity, candidates) +
         "\n\n"
         "Return a JSON object with a 'duplicates' field, which is a list of objects. "
         "Each object should have 'candidate_id' and 'justification' fields, for each candidate you consider a duplicate of the target entity. "
@@ -237,13 +400,18 @@ async def confirm_duplicates_with_openai_per_entity(
     class PerEntityDuplicateResultList(BaseModel):
         duplicates: List[PerEntityDuplicateResult]
 
+    messages = [
+        {"role": "system", "content": "You are an expert at entity deduplication. Return a valid JSON object with a 'duplicates' field, which is a list of objects with 'candidate_id' and 'justification'."},
+        {"role": "user", "content": prompt}
+    ]
+
     try:
-        completion = client.generate_structured_output(
+        if rate_limiter is not None:
+            prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+            await rate_limiter.acquire(prompt_tokens + DEDUP_RESPONSE_TOKEN_ALLOWANCE)
+        completion = await client.agenerate_structured_output(
             model_name=openai_model,
-            messages=[
-                {"role": "system", "content": "You are an expert at entity deduplication. Return a valid JSON object with a 'duplicates' field, which is a list of objects with 'candidate_id' and 'justification'."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=messages,
             pydantic_model=PerEntityDuplicateResultList,
             temperature=0.1
         )
@@ -251,92 +419,482 @@ async def confirm_duplicates_with_openai_per_entity(
         for dup in parsed.duplicates:
             cand = next((c for c in candidates if c.id == dup.candidate_id), None)
             if cand:
-                score = vector_scores.get(cand.id, 0.0)
-                confidence_score = round(score * 10, 1)
-                reasoning = f"Vector similarity score: {score:.3f}. OpenAI: {dup.justification}"
-                confirmed.append(DuplicatePair(
-                    entity1_id=entity.id,
-                    entity1_name=entity.name,
-                    entity2_id=cand.id,
-                    entity2_name=cand.name,
-                    confidence_score=confidence_score,
-                    reasoning=reasoning
-                ))
+                confirmed.append(confirmed_duplicate_pair(entity, cand, vector_scores, dup.justification))
     except Exception as e:
         logger.error(f"OpenAI batch error for entity {entity.id}: {e}")
+        if raise_errors:
+            raise
     return confirmed
 
-async def find_potential_duplicates(limit: int, project_id: int) -> DeduplicationResponse:
+class BatchDuplicateResult(BaseModel):
+    target_id: str
+    candidate_id: str
+    justification: str
+
+class BatchDuplicateResultList(BaseModel):
+    duplicates: List[BatchDuplicateResult]
+
+async def confirm_duplicates_with_openai_batch(
+    groups: list[tuple[EntityNode, list[EntityNode], dict]],
+    openai_model: str,
+    openai_api_key: str,
+    rate_limiter: Optional[AsyncTokenRateLimiter] = None,
+    raise_errors: bool = False
+) -> list[list[DuplicatePair]]:
+    """
+    Ask OpenAI about several (entity, candidates, vector_scores) groups in one request,
+    so small groups share the instructions. Answers naming a candidate outside the
+    target's own group are ignored. A single group uses the per-entity prompt.
+
+    Returns:
+        One list of confirmed pairs per group, in order
+    """
+    if len(groups) == 1:
+        entity, candidates, vector_scores = groups[0]
+        return [await confirm_duplicates_with_openai_per_entity(
+            entity, candidates, vector_scores, openai_model, openai_api_key,
+            rate_limiter=rate_limiter, raise_errors=raise_errors
+        )]
+
+    client = get_llm_client()
+    confirmed = [[] for _ in groups]
+    prompt = (
+        "\n\n".join(
+            f"Group {number}:\n" + format_candidate_group(entity, candidates)
+            for number, (entity, candidates, _) in enumerate(groups, start=1)
+        ) +
+        "\n\n"
+        "For each group, decide which of its candidates are duplicates of that group's target entity; "
+        "only compare candidates with the target of their own group. "
+        "Return a JSON object with a 'duplicates' field, which is a list of objects. "
+        "Each object should have 'target_id', 'candidate_id' and 'justification' fields, for each candidate you consider a duplicate of its target entity. "
+        "Only include candidates that are likely duplicates."
+    )
+    messages = [
+        {"role": "system", "content": "You are an expert at entity deduplication. Return a valid JSON object with a 'duplicates' field, which is a list of objects with 'target_id', 'candidate_id' and 'justification'."},
+        {"role": "user", "content": prompt}
+    ]
+
+    try:
+        if rate_limiter is not None:
+            prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+            await rate_limiter.acquire(prompt_tokens + DEDUP_RESPONSE_TOKEN_ALLOWANCE * len(groups))
+        completion = await client.agenerate_structured_output(
+            model_name=openai_model,
+            messages=messages,
+            pydantic_model=BatchDuplicateResultList,
+            temperature=0.1
+        )
+        group_by_target = {entity.id: index for index, (entity, _, _) in enumerate(groups)}
+        for dup in completion.duplicates:
+            index = group_by_target.get(dup.target_id)
+            if index is None:
+                continue
+            entity, candidates, vector_scores = groups[index]
+            cand = next((c for c in candidates if c.id == dup.candidate_id), None)
+            if cand:
+                confirmed[index].append(confirmed_duplicate_pair(entity, cand, vector_scores, dup.justification))
+    except Exception as e:
+        logger.error(f"OpenAI batch error for entities {', '.join(entity.id for entity, _, _ in groups)}: {e}")
+        if raise_errors:
+            raise
+    return confirmed
+
+def query_similar_entities_batch(entities: list[EntityNode], project_id: int, similarity_threshold: float, top_n: int) -> list[list[dict]]:
+    """Run the vector candidate query for a batch of entities in one round trip. Returns one result list per entity."""
+    with get_driver().get_session() as session:
+        rows = get_vector_candidate_rows(session, [entity.id for entity in entities], project_id, similarity_threshold, top_n)
+    return group_candidate_rows(entities, rows)
+
+def select_unchecked_candidates(entity: EntityNode, similar_entities: list[dict], already_checked: set) -> tuple[list[EntityNode], dict]:
+    """
+    Turn vector query rows into candidates, skipping pairs already queued for confirmation.
+    Marks the returned pairs as checked.
+    """
+    candidates = []
+    vector_scores = {}
+    for sim in similar_entities:
+        sim_id = str(sim["id"])
+        key = tuple(sorted([entity.id, sim_id]))
+        if key in already_checked:
+            continue
+        already_checked.add(key)
+        candidates.append(EntityNode(
+            id=sim_id,
+            name=sim["name"] or "Unknown",
+            description=sim["description"] or "",
+            embedding=None
+        ))
+        vector_scores[sim_id] = sim["score"]
+    return candidates, vector_scores
+
+def lexically_accepted(name1: str, name2: str, lexical: float, vector_score: float) -> bool:
+    """Whether triage_candidates accepts a pair without the LLM under the current settings."""
+    if is_placeholder_name(name1) or is_placeholder_name(name2) or suffixes_conflict(name1, name2):
+        return False
+    return lexical >= DEDUP_LEXICAL_ACCEPT_SCORE and vector_score >= DEDUP_AUTO_ACCEPT_SIMILARITY
+
+def triage_candidates(entity: EntityNode, candidates: list[EntityNode], vector_scores: dict) -> tuple[list[DuplicatePair], list[EntityNode], list[EntityNode]]:
+    """
+    Split candidates by lexical_score of the names so only the ambiguous band needs the LLM:
+    the same name after normalization (or token order) with a vector score of at least
+    DEDUP_AUTO_ACCEPT_SIMILARITY is accepted, names scoring below DEDUP_LEXICAL_PRUNE_SCORE
+    are pruned unless their vector score reaches that bar or they share a surname (nicknames
+    such as 'Bob' for 'Robert' score low), and the rest are ambiguous. Placeholder names
+    ('Unknown') and different generational suffixes ('Jr.' vs 'Sr.') are never accepted
+    without the LLM.
+
+    Returns:
+        (accepted pairs, pruned candidates, ambiguous candidates)
+    """
+    accepted, pruned, ambiguous = [], [], []
+    for cand in candidates:
+        score = vector_scores.get(cand.id, 0.0)
+        lexical = lexical_score(entity.name, cand.name)
+        if lexically_accepted(entity.name, cand.name, lexical, score):
+            accepted.append(DuplicatePair(
+                entity1_id=entity.id,
+                entity1_name=entity.name,
+                entity2_id=cand.id,
+                entity2_name=cand.name,
+                confidence_score=round(score * 10, 1),
+                reasoning=f"Vector similarity score: {score:.3f}. Lexical: names match after normalization ({lexical:.2f})"
+            ))
+        elif (
+            lexical < DEDUP_LEXICAL_PRUNE_SCORE
+            and score < DEDUP_AUTO_ACCEPT_SIMILARITY
+            and not same_surname(entity.name, cand.name)
+        ):
+            pruned.append(cand)
+        else:
+            ambiguous.append(cand)
+    return accepted, pruned, ambiguous
+
+def lexical_verdicts(entity: EntityNode, candidates: list[EntityNode], accepted: list[DuplicatePair]) -> list[dict]:
+    """
+    Verdicts (model 'lexical') for the pairs accepted by triage_candidates, in the format of
+    save_verdicts. They are only used to return the pairs again (see load_stored_duplicates),
+    never to skip a candidate, and pruned pairs are not stored at all.
+    """
+    candidates_by_id = {cand.id: cand for cand in candidates}
+    return [
+        {
+            "entity1_id": entity.id,
+            "entity2_id": dup.entity2_id,
+            "fingerprint": pair_fingerprint(entity, candidates_by_id[dup.entity2_id]),
+            "decision": "duplicate",
+            "model": "lexical",
+            "confidence_score": dup.confidence_score,
+            "reasoning": dup.reasoning
+        }
+        for dup in accepted
+    ]
+
+async def load_stored_duplicates(project_id: int, openai_model: str, exclude: set) -> list[DuplicatePair]:
+    """
+    The project's stored duplicate verdicts that still hold: made by openai_model (or
+    lexical ones the current rule still accepts), both entities still exist, and their
+    names and descriptions are unchanged. Pairs whose pair_key is in exclude are skipped.
+    """
+    verdicts = [
+        verdict for verdict in await get_duplicate_verdicts(project_id, [openai_model, "lexical"])
+        if (verdict.entity1_id, verdict.entity2_id) not in exclude
+    ]
+    if not verdicts:
+        return []
+
+    def load_entities():
+        ids = list({verdict.entity1_id for verdict in verdicts} | {verdict.entity2_id for verdict in verdicts})
+        return _run_query(
+            """
+            MATCH (p:Person {project_id: $project_id}) WHERE ID(p) IN $ids
+            RETURN ID(p) as id, p.name as name, p.description as description
+            """,
+            project_id=project_id,
+            ids=ids
+        )
+
+    entities = {
+        r["id"]: EntityNode(id=str(r["id"]), name=r["name"] or "Unknown", description=r["description"] or "")
+        for r in await asyncio.to_thread(load_entities)
+    }
+    duplicates = []
+    for verdict in verdicts:
+        entity1, entity2 = entities.get(verdict.entity1_id), entities.get(verdict.entity2_id)
+        if entity1 is None or entity2 is None or verdict.fingerprint != pair_fingerprint(entity1, entity2):
+            continue
+        if verdict.model == "lexical" and not lexically_accepted(
+            entity1.name, entity2.name, lexical_score(entity1.name, entity2.name), (verdict.confidence_score or 0.0) / 10
+        ):
+            continue
+        duplicates.append(DuplicatePair(
+            entity1_id=entity1.id,
+            entity1_name=entity1.name,
+            entity2_id=entity2.id,
+            entity2_name=entity2.name,
+            confidence_score=verdict.confidence_score or 0.0,
+            reasoning=verdict.reasoning or ""
+        ))
+    return duplicates
+
+def get_relationship_counts(session, entity_ids: list[str], project_id: int) -> Dict[str, int]:
+    """Number of project relationships (either direction) per entity, in one query."""
+    records = session.run(
+        """
+        MATCH (p:Person {project_id: $project_id}) WHERE ID(p) IN $ids
+        RETURN ID(p) as id, COUNT { (p)-[r {project_id: $project_id}]-() } as degree
+        """,
+        project_id=project_id,
+        ids=[int(entity_id) for entity_id in entity_ids]
+    ).data()
+    return {str(r["id"]): r["degree"] for r in records}
+
+def build_duplicate_clusters(duplicates: list[DuplicatePair], degrees: Dict[str, int]) -> list[DuplicateCluster]:
+    """
+    Union confirmed pairs into connected components, so A~B, B~C and A~C become
+    one cluster merged in one operation, with a canonical survivor chosen by
+    choose_canonical. Clusters are ordered by their first pair.
+    """
+    names = {}
+    for dup in duplicates:
+        names[dup.entity1_id] = dup.entity1_name
+        names[dup.entity2_id] = dup.entity2_name
+    components = connected_components((dup.entity1_id, dup.entity2_id) for dup in duplicates)
+    component_of = {member: index for index, members in enumerate(components) for member in members}
+    pairs_by_component = [[] for _ in components]
+    for dup in duplicates:
+        pairs_by_component[component_of[dup.entity1_id]].append(dup)
+
+    clusters = []
+    for members, pairs in zip(components, pairs_by_component):
+        canonical_id = choose_canonical(members, degrees)
+        clusters.append(DuplicateCluster(
+            canonical_id=canonical_id,
+            canonical_name=names[canonical_id],
+            members=[DuplicateClusterMember(id=member, name=names[member]) for member in members if member != canonical_id],
+            confidence_score=min(pair.confidence_score for pair in pairs),
+            pairs=pairs
+        ))
+    return clusters
+
+async def find_potential_duplicates(limit: int, project_id: int, incremental: bool = False) -> DeduplicationResponse:
     """
     For each entity, get top N similar (N configurable), then ask OpenAI which are duplicates.
     Avoid redundant checks. Use tqdm for progress.
+
+    Runs as a pipeline: vector candidate queries run in batches of DEDUP_CANDIDATE_BATCH_SIZE
+    entities (off the event loop), against the Neo4j vector index or, with
+    DEDUP_CANDIDATE_BACKEND=numpy, an in-memory matrix of the project's embeddings, and LLM confirmations start as soon as
+    candidates are known. Entities' candidate groups are packed into requests of up to DEDUP_LLM_BATCH_TOKENS
+    estimated prompt tokens, with at most DEDUP_LLM_CONCURRENCY requests in flight and an optional
+    DEDUP_TOKENS_PER_MINUTE budget. Candidate selection is sequential and results are collected
+    in entity order, so the returned pairs match a one-at-a-time run. The confirmed pairs
+    are also grouped into clusters (see build_duplicate_clusters).
+
+    With DEDUP_LEXICAL_BLOCKING on, candidates are first pre-scored by name
+    (see triage_candidates): clear matches are accepted and clear mismatches
+    dropped without an LLM call.
+
+    With incremental=True only entities changed since the project's watermark are
+    checked (oldest change first), pairs with a stored verdict from the current
+    OPENAI_MODEL are not sent to the LLM again, and new verdicts and the watermark
+    are saved in Postgres (see src/kg/dedup_state.py). Every stored duplicate that
+    still holds is returned on each run (see load_stored_duplicates), so confirmed
+    pairs stay listed until they are merged. Otherwise the limit most recent
+    entities are checked from scratch.
     """
     logger.info(f"Checking up to {limit} entities for duplicates using per-entity vector search and OpenAI confirmation...")
-    NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-    NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password123")
     similarity_threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
     openai_model = os.getenv("OPENAI_MODEL", "gpt-4o")
     openai_api_key = os.getenv("OPENAI_API_KEY")
     top_n = int(os.getenv("VECTOR_TOP_N", "40"))
+    run_started = datetime.utcnow().isoformat()
+    watermark = await get_watermark(project_id) if incremental else None
 
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    try:
-        with driver.session() as session:
-            entities = get_recent_entities_with_embeddings(session, project_id, limit)
-            if len(entities) < 2:
-                return DeduplicationResponse(
-                    total_entities_checked=len(entities),
-                    potential_duplicates_found=0,
-                    duplicates=[]
-                )
-            already_checked = set()
-            all_duplicates = []
-            for entity in tqdm(entities, desc="Deduplication (vector+OpenAI)", unit="entity"):
-                # For this entity, get top N similar (excluding already checked)
-                similar_entities = session.run(
-                    f"""
-                    CALL db.index.vector.queryNodes('person_embeddings', {top_n+1}, $embedding)
-                    YIELD node, score
-                    WHERE ID(node) <> $entity_id
-                      AND node.project_id = $project_id
-                      AND score > $threshold
-                    RETURN ID(node) as id, node.name as name, node.description as description, score
-                    ORDER BY score DESC
-                    LIMIT {top_n}
-                    """,
-                    entity_id=int(entity.id),
-                    project_id=project_id,
-                    embedding=entity.embedding,
-                    threshold=similarity_threshold
-                ).data()
-                candidates = []
-                vector_scores = {}
-                for sim in similar_entities:
-                    sim_id = str(sim["id"])
-                    pair_key = tuple(sorted([entity.id, sim_id]))
-                    if pair_key in already_checked:
-                        continue
-                    already_checked.add(pair_key)
-                    candidates.append(EntityNode(
-                        id=sim_id,
-                        name=sim["name"] or "Unknown",
-                        description=sim["description"] or "",
-                        embedding=None
-                    ))
-                    vector_scores[sim_id] = sim["score"]
-                if candidates:
-                    dups = await confirm_duplicates_with_openai_per_entity(
-                        entity, candidates, vector_scores, openai_model, openai_api_key
-                    )
-                    all_duplicates.extend(dups)
+    def load_entities():
+        with get_driver().get_session() as session:
+            if incremental:
+                return get_changed_entities(session, project_id, limit, since=watermark)
+            # Embeddings stay in Neo4j; candidate queries look them up server-side
+            return get_recent_entities_with_embeddings(session, project_id, limit, include_embeddings=False), None
+
+    async def respond(duplicates: list[DuplicatePair], **counts) -> DeduplicationResponse:
+        if incremental:
+            # Confirmed pairs are returned on every run until merged, not just when an entity changed
+            found = {pair_key(dup.entity1_id, dup.entity2_id) for dup in duplicates}
+            duplicates = duplicates + await load_stored_duplicates(project_id, openai_model, found)
+
+        def load_degrees():
+            entity_ids = {dup.entity1_id for dup in duplicates} | {dup.entity2_id for dup in duplicates}
+            with get_driver().get_session() as session:
+                return get_relationship_counts(session, list(entity_ids), project_id)
+
+        degrees = await asyncio.to_thread(load_degrees) if duplicates else {}
         return DeduplicationResponse(
             total_entities_checked=len(entities),
-            potential_duplicates_found=len(all_duplicates),
-            duplicates=all_duplicates
+            potential_duplicates_found=len(duplicates),
+            duplicates=duplicates,
+            clusters=build_duplicate_clusters(duplicates, degrees),
+            **counts
         )
-    finally:
-        driver.close()
+
+    entities, changed_at = await asyncio.to_thread(load_entities)
+    if not entities or (not incremental and len(entities) < 2):
+        if incremental:
+            await set_watermark(project_id, run_started, -1)
+        return await respond([])
+
+    if DEDUP_CANDIDATE_BACKEND == "numpy":
+        # Load the project's embeddings once and compute candidates in-process
+        from src.kg.similarity import load_project_embeddings, similar_entity_rows
+
+        def load_matrix():
+            with get_driver().get_session() as session:
+                return load_project_embeddings(session, project_id)
+
+        matrix = await asyncio.to_thread(load_matrix)
+
+        def fetch_candidates(batch: list[EntityNode]) -> list[list[dict]]:
+            rows = similar_entity_rows(matrix, [entity.id for entity in batch], similarity_threshold, top_n)
+            return group_candidate_rows(batch, rows)
+    else:
+        def fetch_candidates(batch: list[EntityNode]) -> list[list[dict]]:
+            return query_similar_entities_batch(batch, project_id, similarity_threshold, top_n)
+
+    semaphore = asyncio.Semaphore(max(1, DEDUP_LLM_CONCURRENCY))
+    rate_limiter = AsyncTokenRateLimiter(DEDUP_TOKENS_PER_MINUTE)
+    new_verdicts = []
+    failed_confirmations = 0
+
+    # Confirmed pairs per checked entity, in entity order
+    duplicates_by_group = []
+
+    async def confirm(groups: list[tuple[int, EntityNode, list[EntityNode], dict]]):
+        nonlocal failed_confirmations
+        async with semaphore:
+            try:
+                results = await confirm_duplicates_with_openai_batch(
+                    [(entity, candidates, vector_scores) for _, entity, candidates, vector_scores in groups],
+                    openai_model, openai_api_key, rate_limiter=rate_limiter, raise_errors=incremental
+                )
+            except Exception:
+                # No verdicts are recorded, so these pairs are asked again next run
+                failed_confirmations += 1
+                return
+        for (slot, entity, candidates, _), confirmed in zip(groups, results):
+            duplicates_by_group[slot].extend(confirmed)
+            if not incremental:
+                continue
+            confirmed_by_id = {dup.entity2_id: dup for dup in confirmed}
+            for candidate in candidates:
+                dup = confirmed_by_id.get(candidate.id)
+                new_verdicts.append({
+                    "entity1_id": entity.id,
+                    "entity2_id": candidate.id,
+                    "fingerprint": pair_fingerprint(entity, candidate),
+                    "decision": "duplicate" if dup else "distinct",
+                    "model": openai_model,
+                    "confidence_score": dup.confidence_score if dup else None,
+                    "reasoning": dup.reasoning if dup else None
+                })
+
+    # Groups waiting to be packed into one request, up to DEDUP_LLM_BATCH_TOKENS
+    pending = []
+    pending_tokens = 0
+
+    def flush_pending():
+        nonlocal pending, pending_tokens
+        if pending:
+            confirmations.append(asyncio.create_task(confirm(pending)))
+        pending, pending_tokens = [], 0
+
+    already_checked = set()
+    confirmations = []
+    reused_verdicts = 0
+    lexical_accepted = 0
+    lexical_pruned = 0
+    batch_size = max(1, DEDUP_CANDIDATE_BATCH_SIZE)
+    try:
+        with tqdm(total=len(entities), desc="Deduplication (vector+OpenAI)", unit="entity") as progress:
+            for start in range(0, len(entities), batch_size):
+                batch = entities[start:start + batch_size]
+                # For each entity in the batch, get top N similar (excluding already checked)
+                similar_by_entity = await asyncio.to_thread(fetch_candidates, batch)
+                selections = [
+                    select_unchecked_candidates(entity, similar_entities, already_checked)
+                    for entity, similar_entities in zip(batch, similar_by_entity)
+                ]
+                verdicts = {}
+                if incremental:
+                    verdicts = await get_verdicts(project_id, [
+                        (entity.id, candidate.id)
+                        for entity, (candidates, _) in zip(batch, selections)
+                        for candidate in candidates
+                    ])
+                for entity, (candidates, vector_scores) in zip(batch, selections):
+                    # Pairs already judged by the current model (with unchanged entities) skip the LLM
+                    undecided, stored = [], []
+                    for candidate in candidates:
+                        verdict = verdicts.get(pair_key(entity.id, candidate.id))
+                        if (
+                            verdict is None
+                            or verdict.model != openai_model
+                            or verdict.fingerprint != pair_fingerprint(entity, candidate)
+                        ):
+                            undecided.append(candidate)
+                            continue
+                        reused_verdicts += 1
+                        if verdict.decision == "duplicate":
+                            stored.append(DuplicatePair(
+                                entity1_id=entity.id,
+                                entity1_name=entity.name,
+                                entity2_id=candidate.id,
+                                entity2_name=candidate.name,
+                                confidence_score=verdict.confidence_score or 0.0,
+                                reasoning=verdict.reasoning or ""
+                            ))
+                    if DEDUP_LEXICAL_BLOCKING and undecided:
+                        accepted, pruned, ambiguous = triage_candidates(entity, undecided, vector_scores)
+                        lexical_accepted += len(accepted)
+                        lexical_pruned += len(pruned)
+                        if incremental:
+                            new_verdicts.extend(lexical_verdicts(entity, undecided, accepted))
+                        stored += accepted
+                        undecided = ambiguous
+                    if not stored and not undecided:
+                        continue
+                    duplicates_by_group.append(stored)
+                    if not undecided:
+                        continue
+                    group_tokens = estimate_tokens(format_candidate_group(entity, undecided))
+                    if pending and pending_tokens + group_tokens > DEDUP_LLM_BATCH_TOKENS:
+                        flush_pending()
+                    pending.append((len(duplicates_by_group) - 1, entity, undecided, vector_scores))
+                    pending_tokens += group_tokens
+                progress.update(len(batch))
+        flush_pending()
+        await asyncio.gather(*confirmations)
+    except BaseException:
+        for task in confirmations:
+            task.cancel()
+        raise
+
+    if incremental:
+        await save_verdicts(project_id, new_verdicts)
+        if failed_confirmations:
+            logger.warning(f"{failed_confirmations} confirmations failed; keeping the dedup watermark so they are retried")
+        elif len(entities) < limit:
+            # Every changed entity was checked; continue from this run's start next time
+            await set_watermark(project_id, run_started, -1)
+        else:
+            await set_watermark(project_id, changed_at[-1], int(entities[-1].id))
+
+    return await respond(
+        [dup for dups in duplicates_by_group for dup in dups],
+        reused_verdicts=reused_verdicts,
+        lexical_accepted=lexical_accepted,
+        lexical_pruned=lexical_pruned
+    )
 
 
 async def merge_duplicate_entities(
@@ -344,7 +902,7 @@ async def merge_duplicate_entities(
     duplicate_id: str, 
     user_email: str = None, 
     current_time: str = None, 
-    project_id: int = None # Added project_id
+    project_id: int = None
 ) -> Dict[str, Any]:
     """
     Merge two duplicate entities in the Neo4j database within a specific project.
@@ -365,106 +923,46 @@ async def merge_duplicate_entities(
     if str(entity_id) == str(duplicate_id):
         raise ValueError("Cannot merge an entity with itself.")
 
+    result = await merge_duplicate_entities_batch([(entity_id, duplicate_id)], user_email, current_time, project_id)
+    return {
+        "message": f"Successfully merged entity {duplicate_id} into {entity_id}",
+        "entity_id": entity_id,
+        "merged_id": duplicate_id,
+        "relationships_transferred": result["relationships_transferred"]
+    }
+
+async def merge_duplicate_clusters(
+    clusters: List[tuple],
+    user_email: str = None,
+    current_time: str = None,
+    project_id: int = None
+) -> Dict[str, Any]:
+    """
+    Merge (canonical ID, [member IDs]) clusters: every member is merged into its
+    canonical entity, all clusters in one transaction.
+    """
+    pairs = [(canonical_id, member_id) for canonical_id, member_ids in clusters for member_id in member_ids]
+    return await merge_duplicate_entities_batch(pairs, user_email, current_time, project_id)
+
+async def merge_duplicate_entities_batch(
+    pairs: List[tuple],
+    user_email: str = None,
+    current_time: str = None,
+    project_id: int = None
+) -> Dict[str, Any]:
+    """
+    Merge many (keep, duplicate) pairs in one transaction on the shared driver.
+    See src.kg.merge.merge_entities for how chains and self-loops are handled.
+    """
+    if project_id is None:
+        raise ValueError("project_id is required for merging entities")
+
     # If current_time is not provided, generate it
     if current_time is None:
-        from datetime import datetime
         current_time = datetime.utcnow().isoformat()
-    
-    if project_id is None:
-        raise ValueError("project_id is required for merging entities")
-        
-    # Connect to Neo4j
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    
-    try:
-        with driver.session() as session:
-            # Verify both entities exist in the project before proceeding
-            check = session.run(
-                """
-                MATCH (keep:Person {project_id: $project_id}) WHERE ID(keep) = $entity_id
-                MATCH (dup:Person {project_id: $project_id}) WHERE ID(dup) = $duplicate_id
-                RETURN keep, dup
-                """,
-                project_id=project_id,
-                entity_id=int(entity_id),
-                duplicate_id=int(duplicate_id)
-            ).single()
-            
-            if not check or not check["keep"] or not check["dup"]:
-                 raise ValueError(f"One or both entities ({entity_id}, {duplicate_id}) not found in project {project_id}")
-
-            # 1. Get all relationships of the duplicate entity within the project
-            relationships = session.run(
-                """
-                MATCH (dup:Person {project_id: $project_id})-[r {project_id: $project_id}]->(other:Person {project_id: $project_id}) 
-                WHERE ID(dup) = $duplicate_id
-                RETURN ID(other) as target_id, type(r) as rel_type, 'outgoing' as direction
-                UNION
-                MATCH (other:Person {project_id: $project_id})-[r {project_id: $project_id}]->(dup:Person {project_id: $project_id}) 
-                WHERE ID(dup) = $duplicate_id
-                RETURN ID(other) as target_id, type(r) as rel_type, 'incoming' as direction
-                """,
-                project_id=project_id,
-                duplicate_id=int(duplicate_id)
-            ).data()
-            
-            # 2. Create equivalent relationships for the entity to keep within the project
-            for rel in relationships:
-                if rel['direction'] == 'outgoing':
-                    # Create outgoing relationship with project_id and user tracking
-                    session.run(
-                        f"""
-                        MATCH (keep:Person {{project_id: $project_id}}) WHERE ID(keep) = $entity_id
-                        MATCH (other:Person {{project_id: $project_id}}) WHERE ID(other) = $target_id
-                        MERGE (keep)-[r:{rel['rel_type']}]->(other)
-                        ON CREATE SET r.project_id = $project_id, 
-                                      r.created_by = $user_email,
-                                      r.created_at = $current_time,
-                                      r.updated_by = $user_email,
-                                      r.updated_at = $current_time
-                        """,
-                        project_id=project_id,
-                        entity_id=int(entity_id),
-                        target_id=rel['target_id'],
-                        user_email=user_email,
-                        current_time=current_time
-                    )
-                else:
-                    # Create incoming relationship with project_id and user tracking
-                    session.run(
-                        f"""
-                        MATCH (keep:Person {{project_id: $project_id}}) WHERE ID(keep) = $entity_id
-                        MATCH (other:Person {{project_id: $project_id}}) WHERE ID(other) = $target_id
-                        MERGE (other)-[r:{rel['rel_type']}]->(keep)
-                        ON CREATE SET r.project_id = $project_id,
-                                      r.created_by = $user_email,
-                                      r.created_at = $current_time,
-                                      r.updated_by = $user_email,
-                                      r.updated_at = $current_time
-                        """,
-                        project_id=project_id,
-                        entity_id=int(entity_id),
-                        target_id=rel['target_id'],
-                        user_email=user_email,
-                        current_time=current_time
-                    )
-            
-            # 3. Delete the duplicate entity (which must be in the project)
-            session.run(
-                """
-                MATCH (dup:Person {project_id: $project_id}) WHERE ID(dup) = $duplicate_id
-                DETACH DELETE dup
-                """,
-                project_id=project_id,
-                duplicate_id=int(duplicate_id)
-            )
-            
-            return {
-                "message": f"Successfully merged entity {duplicate_id} into {entity_id}",
-                "entity_id": entity_id,
-                "merged_id": duplicate_id,
-                "relationships_transferred": len(relationships)
-            }
-    
-    finally:
-        driver.close()
+
+    def merge():
+        with get_driver().get_session() as session:
+            return merge_entities(session, pairs, project_id, user_email, current_time)
+
+    return await asyncio.to_thread(merge)
@@ -0,0 +1,56 @@
+import os
+import asyncio
+import logging
+from typing import List, Optional
+from app.utils.llm import BaseLLMClient, get_llm_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Get embedding settings from environment
+embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
+# Number of texts sent to the embedding endpoint per request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+# Maximum embedding batches in flight per call (each also holds a Postgres session for the embedding cache)
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+
+def entity_embedding_text(name: Optional[str], description: Optional[str]) -> str:
+    """Build the text embedded for a Person entity (name + description)."""
+    return f"{name or ''} - {description or ''}"
+
+async def agenerate_embeddings(
+    texts: List[str],
+    client: Optional[BaseLLMClient] = None,
+    model_name: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> List[Optional[List[float]]]:
+    """
+    Embed texts in batches of batch_size texts per embedding request, with up to
+    EMBEDDING_CONCURRENCY batches in flight, without blocking the event loop.
+
+    A failed batch is logged and yields None for each of its texts, so callers
+    can store what succeeded and retry the rest later.
+
+    Returns:
+        One embedding (or None) per input text, in input order
+    """
+    client = client or get_llm_client()
+    model_name = model_name or embedding_model
+    batch_size = max(1, batch_size or EMBEDDING_BATCH_SIZE)
+    semaphore = asyncio.Semaphore(max(1, EMBEDDING_CONCURRENCY))
+
+    async def embed_batch(batch: List[str]) -> List[Optional[List[float]]]:
+        try:
+            async with semaphore:
+                batch_embeddings = await client.aembed_texts(batch, model_name=model_name)
+            if len(batch_embeddings) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(batch_embeddings)}")
+            return batch_embeddings
+        except Exception as e:
+            logger.error(f"Error generating embeddings for batch of {len(batch)} texts: {e}")
+            return [None] * len(batch)
+
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    return [embedding for batch_embeddings in results for embedding in batch_embeddings]
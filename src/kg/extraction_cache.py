@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import select, update, delete, func
+from app.postgres_db import get_postgres_driver
+from app.models.postgres_models import ExtractionCacheEntry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Least recently used entries beyond this many are evicted (0 disables the cache)
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "10000"))
+# Results stored by this process between checks of the cache size
+EXTRACTION_CACHE_EVICTION_INTERVAL = int(os.getenv("EXTRACTION_CACHE_EVICTION_INTERVAL", "100"))
+
+# Lookups served by this process since startup
+_hits = 0
+_misses = 0
+# Starts due so the first store after startup checks the size
+_stored_since_check = EXTRACTION_CACHE_EVICTION_INTERVAL
+
+def extraction_cache_key(text: str, model: str, prompt_version: str) -> str:
+    """Content address of an extraction: sha256 over the model, prompt version and text."""
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+async def get_cached_extraction(key: str) -> Optional[dict]:
+    """
+    Return the cached {"entities": [...], "relationships": [...]} for key, or None.
+    Errors are logged and treated as a miss so the cache never breaks extraction.
+    """
+    global _hits, _misses
+    if EXTRACTION_CACHE_MAX_ENTRIES <= 0:
+        return None
+    try:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            entry = await session.get(ExtractionCacheEntry, key)
+            if entry is None:
+                _misses += 1
+                return None
+            await session.execute(
+                update(ExtractionCacheEntry)
+                .where(ExtractionCacheEntry.key == key)
+                .values(hits=ExtractionCacheEntry.hits + 1, last_used_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+            _hits += 1
+            return entry.result
+    except Exception as e:
+        logger.warning(f"Extraction cache lookup failed: {e}")
+        _misses += 1
+        return None
+
+async def store_extraction(key: str, model: str, prompt_version: str, result: dict):
+    """Cache an extraction result, periodically evicting the least recently used entries over the limit."""
+    global _stored_since_check
+    if EXTRACTION_CACHE_MAX_ENTRIES <= 0:
+        return
+    try:
+        async with get_postgres_driver().AsyncSessionLocal() as session:
+            await session.merge(ExtractionCacheEntry(
+                key=key,
+                model=model,
+                prompt_version=prompt_version,
+                result=result,
+                size_bytes=len(json.dumps(result)),
+                hits=0,
+                last_used_at=datetime.now(timezone.utc)
+            ))
+            await session.commit()
+        _stored_since_check += 1
+        if _stored_since_check >= EXTRACTION_CACHE_EVICTION_INTERVAL:
+            _stored_since_check = 0
+            await evict_extraction_cache()
+    except Exception as e:
+        logger.warning(f"Could not cache extraction result: {e}")
+
+async def evict_extraction_cache():
+    """Evict the least recently used entries, if there are more than EXTRACTION_CACHE_MAX_ENTRIES."""
+    async with get_postgres_driver().AsyncSessionLocal() as session:
+        entries = (await session.execute(select(func.count()).select_from(ExtractionCacheEntry))).scalar_one()
+        if entries <= EXTRACTION_CACHE_MAX_ENTRIES:
+            return
+        stale = (
+            select(ExtractionCacheEntry.key)
+            .order_by(ExtractionCacheEntry.last_used_at.desc())
+            .offset(EXTRACTION_CACHE_MAX_ENTRIES)
+        )
+        await session.execute(delete(ExtractionCacheEntry).where(ExtractionCacheEntry.key.in_(stale)))
+        await session.commit()
+
+async def get_extraction_cache_stats() -> dict:
+    async with get_postgres_driver().AsyncSessionLocal() as session:
+        entries, size_bytes, stored_hits = (await session.execute(
+            select(
+                func.count(ExtractionCacheEntry.key),
+                func.coalesce(func.sum(ExtractionCacheEntry.size_bytes), 0),
+                func.coalesce(func.sum(ExtractionCacheEntry.hits), 0)
+            )
+        )).one()
+    lookups = _hits + _misses
+    return {
+        "enabled": EXTRACTION_CACHE_MAX_ENTRIES > 0,
+        "entries": entries,
+        "max_entries": EXTRACTION_CACHE_MAX_ENTRIES,
+        "size_bytes": size_bytes,
+        "total_hits": stored_hits,
+        "process_hits": _hits,
+        "process_misses": _misses,
+        "process_hit_rate": round(_hits / lookups, 4) if lookups else 0.0
+    }
+
+async def clear_extraction_cache() -> int:
+    """Delete every cached extraction. Returns the number removed."""
+    async with get_postgres_driver().AsyncSessionLocal() as session:
+        result = await session.execute(delete(ExtractionCacheEntry))
+        await session.commit()
+        return result.rowcount
@@ -1,9 +1,13 @@
 import os
+import re
+import asyncio
 import logging
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from fastapi import HTTPException, UploadFile
 from app.utils.llm import get_llm_client
+from app.utils.rate_limit import estimate_tokens
+from src.kg.extraction_cache import extraction_cache_key, get_cached_extraction, store_extraction
 from dotenv import load_dotenv
 
 # --- Configuration ---
@@ -19,6 +23,15 @@ logger = logging.getLogger(__name__)
 model = os.getenv("OPENAI_MODEL", "gpt-4")
 logger.info(f"Using OpenAI model: {model}")
 
+# Bump when the extraction prompt or schema changes, so cached results are not reused
+EXTRACTION_PROMPT_VERSION = "1"
+
+# Long documents are extracted in overlapping chunks of about this many tokens (0 disables chunking)
+EXTRACTION_CHUNK_TOKENS = int(os.getenv("EXTRACTION_CHUNK_TOKENS", "3000"))
+EXTRACTION_CHUNK_OVERLAP_TOKENS = int(os.getenv("EXTRACTION_CHUNK_OVERLAP_TOKENS", "200"))
+# Chunks extracted concurrently per document
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "4"))
+
 # --- Pydantic Models ---
 # Define the structure for an entity in the knowledge graph
 class EntityBase(BaseModel):
@@ -78,55 +91,204 @@ class TextInput(BaseModel):
     text: str = Field(..., min_length=1, description="The raw text to process.")
     # project_id removed, will be passed as function argument
 
+# --- Chunking ---
+def split_text_into_chunks(text: str, chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Split text into windows of about chunk_tokens tokens, each overlapping the
+    previous one by about overlap_tokens so entities and relationships that
+    straddle a boundary are seen whole in at least one chunk.
+
+    Windows end at a paragraph, line, sentence or word break where possible.
+    Token counts use the same ~4 characters per token estimate as the rate limiter.
+    """
+    max_chars = max(chunk_tokens, 1) * 4
+    overlap_chars = min(max(overlap_tokens, 0) * 4, max_chars // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            # Prefer the last natural break in the second half of the window
+            window_floor = start + max_chars // 2
+            for separator in ("\n\n", "\n", ". ", " "):
+                cut = text.rfind(separator, window_floor, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunks.append(text[start:end])
+        if end >= len(text):
+            break
+        next_start = max(end - overlap_chars, start + 1)
+        # Start the overlap on a word boundary
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+def _normalize_label(label: str) -> str:
+    """Key used to recognise the same entity across chunks."""
+    return " ".join(re.sub(r"[^\w\s]", " ", label.casefold()).split())
+
+def merge_knowledge_graphs(graphs: List[KnowledgeGraph]) -> KnowledgeGraph:
+    """
+    Merge per-chunk extractions into one graph.
+
+    Entities with the same normalized label are reconciled into one entity
+    (keeping the longest description) and renumbered; relationships are
+    remapped onto the merged ids and deduplicated. Relationships that point at
+    entities missing from their chunk, or that become self-loops, are dropped.
+    """
+    entities: List[EntityResponse] = []
+    entity_by_key = {}
+    relationships: List[RelationshipResponse] = []
+    seen_relationships = set()
+
+    for graph in graphs:
+        # Chunk-local entity id -> merged entity id
+        id_mapping = {}
+        for entity in graph.entities:
+            key = _normalize_label(entity.label) or entity.label
+            merged = entity_by_key.get(key)
+            if merged is None:
+                merged = EntityResponse(
+                    entity_id=str(len(entities) + 1),
+                    label=entity.label,
+                    type=entity.type,
+                    description=entity.description
+                )
+                entity_by_key[key] = merged
+                entities.append(merged)
+            elif len(entity.description) > len(merged.description):
+                merged.description = entity.description
+            id_mapping[entity.entity_id] = merged.entity_id
+
+        for rel in graph.relationships:
+            source_id = id_mapping.get(rel.source_id)
+            target_id = id_mapping.get(rel.target_id)
+            if source_id is None or target_id is None or source_id == target_id:
+                continue
+            rel_key = (source_id, target_id, _normalize_label(rel.label))
+            if rel_key in seen_relationships:
+                continue
+            seen_relationships.add(rel_key)
+            relationships.append(RelationshipResponse(source_id=source_id, target_id=target_id, label=rel.label))
+
+    return KnowledgeGraph(entities=entities, relationships=relationships)
+
 # --- OpenAI Interaction ---
-async def extract_knowledge_graph_from_text(text: str, project_id: Optional[int] = None) -> KnowledgeGraph: # Added project_id parameter
+async def _extract_chunk_uncached(text: str) -> KnowledgeGraph:
+    """Extract a knowledge graph from one piece of text with a single LLM call."""
+    # Create the prompt for OpenAI
+    prompt = f"""Extract a knowledge graph from the following text. 
+    IMPORTANT: Identify ONLY people as entities (no organizations, locations, or other entity types).
+    Focus exclusively on relationships between people.
+    Return the results in a structured format matching the provided schema.
+
+    Text to analyze:
+    {text}
+
+    Instructions:
+    1. Identify all significant people (individuals) in the text
+    2. For each person, assign a unique ID, label, and type ('Person')
+    3. Identify relationships between these people (e.g., 'friend_of', 'married_to', 'colleague_of', etc.)
+    4. Return the results in the specified JSON format
+    5. ONLY include entities of type 'Person' - do not include organizations, locations, or other entity types
+    """
+
+    client = get_llm_client()
+    completion = await client.agenerate_structured_output(
+        model_name=model,
+        messages=[
+            {"role": "system", "content": "You are an expert at extracting structured knowledge graphs from unstructured text. Return a valid JSON object with 'entities' and 'relationships' fields."},
+            {"role": "user", "content": prompt}
+        ],
+        pydantic_model=KnowledgeGraph,
+        temperature=0.1
+    )
+
+    # Filter entities to include only those of type 'Person'
+    parsed_response = completion
+    parsed_response.entities = [entity for entity in parsed_response.entities if entity.type == "Person"]
+
+    return parsed_response
+
+async def _extract_chunk(text: str, bypass_cache: bool = False) -> KnowledgeGraph:
+    """
+    Extract one piece of text, serving repeats from the extraction cache.
+    With bypass_cache the LLM is always called (and the cache refreshed).
+    """
+    key = extraction_cache_key(text, model, EXTRACTION_PROMPT_VERSION)
+    if not bypass_cache:
+        cached = await get_cached_extraction(key)
+        if cached is not None:
+            return KnowledgeGraph(**cached)
+    kg = await _extract_chunk_uncached(text)
+    await store_extraction(key, model, EXTRACTION_PROMPT_VERSION, knowledge_graph_to_dict(kg))
+    return kg
+
+async def extract_knowledge_graph_from_text(text: str, project_id: Optional[int] = None, bypass_cache: bool = False) -> KnowledgeGraph: # Added project_id parameter
     """
     Extracts entities and relationships from text using OpenAI's API.
     Focuses ONLY on entities of type 'Person'.
+
+    Text longer than EXTRACTION_CHUNK_TOKENS is split into overlapping chunks
+    that are extracted concurrently (at most EXTRACTION_CONCURRENCY at once)
+    and merged with merge_knowledge_graphs.
+
+    Each chunk's result is cached by hash of (model, EXTRACTION_PROMPT_VERSION,
+    text), so repeat extractions skip the LLM unless bypass_cache is set.
     The project_id is currently not used in the extraction logic itself,
     but is accepted for consistency with the calling routes.
     """
     logger.info(f"Extracting KG from text (length: {len(text)})...")
 
     try:
-        # Create the prompt for OpenAI
-        prompt = f"""Extract a knowledge graph from the following text. 
-        IMPORTANT: Identify ONLY people as entities (no organizations, locations, or other entity types).
-        Focus exclusively on relationships between people.
-        Return the results in a structured format matching the provided schema.
-
-        Text to analyze:
-        {text}
-
-        Instructions:
-        1. Identify all significant people (individuals) in the text
-        2. For each person, assign a unique ID, label, and type ('Person')
-        3. Identify relationships between these people (e.g., 'friend_of', 'married_to', 'colleague_of', etc.)
-        4. Return the results in the specified JSON format
-        5. ONLY include entities of type 'Person' - do not include organizations, locations, or other entity types
-        """
-
-        client = get_llm_client()
-        completion = client.generate_structured_output(
-            model_name=model,
-            messages=[
-                {"role": "system", "content": "You are an expert at extracting structured knowledge graphs from unstructured text. Return a valid JSON object with 'entities' and 'relationships' fields."},
-                {"role": "user", "content": prompt}
-            ],
-            pydantic_model=KnowledgeGraph,
-            temperature=0.1
-        )
-
-        # Filter entities to include only those of type 'Person'
-        parsed_response = completion
-        parsed_response.entities = [entity for entity in parsed_response.entities if entity.type == "Person"]
-
-        return parsed_response
+        if EXTRACTION_CHUNK_TOKENS <= 0 or estimate_tokens(text) <= EXTRACTION_CHUNK_TOKENS:
+            return await _extract_chunk(text, bypass_cache)
+
+        chunks = split_text_into_chunks(text, EXTRACTION_CHUNK_TOKENS, EXTRACTION_CHUNK_OVERLAP_TOKENS)
+        logger.info(f"Extracting {len(chunks)} chunks, at most {EXTRACTION_CONCURRENCY} at a time")
+        semaphore = asyncio.Semaphore(max(1, EXTRACTION_CONCURRENCY))
+
+        async def extract_with_limit(chunk: str) -> KnowledgeGraph:
+            async with semaphore:
+                return await _extract_chunk(chunk, bypass_cache)
+
+        tasks = [asyncio.create_task(extract_with_limit(chunk)) for chunk in chunks]
+        try:
+            graphs = await asyncio.gather(*tasks)
+        except BaseException:
+            # Do not leave the remaining chunks running
+            for task in tasks:
+                task.cancel()
+            raise
+        return merge_knowledge_graphs(graphs)
 
     except Exception as e:
         logger.error(f"Error extracting knowledge graph: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to extract knowledge graph: {str(e)}")
 
+def knowledge_graph_to_dict(kg: KnowledgeGraph) -> dict:
+    """Convert an extracted KnowledgeGraph to the entities/relationships dicts returned by the API."""
+    return {
+        "entities": [
+            {
+                "entity_id": entity.entity_id,
+                "label": entity.label,
+                "type": entity.type,
+                "description": entity.description
+            }
+            for entity in kg.entities
+        ],
+        "relationships": [
+            {
+                "source_id": rel.source_id,
+                "target_id": rel.target_id,
+                "label": rel.label
+            }
+            for rel in kg.relationships
+        ]
+    }
+
 # --- Helper Function for File Processing ---
 async def read_file_content(file: UploadFile) -> str:
     """Reads content from uploaded file."""
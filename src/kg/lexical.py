@@ -0,0 +1,119 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import FrozenSet, Optional
+
+# Honorifics that do not distinguish people
+NAME_STOPWORDS = frozenset({"dr", "mr", "mrs", "ms", "miss", "prof", "sir", "dame"})
+# Generational suffixes are left out of the name keys, but do distinguish people (see suffixes_conflict)
+GENERATIONAL_SUFFIXES = frozenset({"jr", "sr", "ii", "iii", "iv"})
+# Normalized names of nodes without a real name ("Unknown" is filled in for missing names)
+PLACEHOLDER_NAMES = frozenset({"", "unknown"})
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6"
+}
+
+def _name_words(name: str) -> list[str]:
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    tokens = re.sub(r"[^\w\s]", " ", text.casefold()).split()
+    return [token for token in tokens if token not in NAME_STOPWORDS]
+
+def name_tokens_list(name: str) -> list[str]:
+    """Lowercase, accent-free word tokens of a name, without titles and generational suffixes."""
+    words = _name_words(name)
+    # The first word is never a suffix
+    return words[:1] + [word for word in words[1:] if word not in GENERATIONAL_SUFFIXES]
+
+def generational_suffix(name: str) -> Optional[str]:
+    """'John Smith Jr.' -> 'jr', or None."""
+    words = _name_words(name)
+    return next((word for word in words[1:] if word in GENERATIONAL_SUFFIXES), None)
+
+def suffixes_conflict(name1: str, name2: str) -> bool:
+    """True when both names carry a generational suffix and they differ ('Jr.' vs 'Sr.')."""
+    suffix1, suffix2 = generational_suffix(name1), generational_suffix(name2)
+    return suffix1 is not None and suffix2 is not None and suffix1 != suffix2
+
+def same_surname(name1: str, name2: str) -> bool:
+    """True when both names have a given name and surname and the surnames match ('Bob Smith', 'Robert Smith')."""
+    tokens1, tokens2 = name_tokens_list(name1), name_tokens_list(name2)
+    return len(tokens1) >= 2 and len(tokens2) >= 2 and tokens1[-1] == tokens2[-1]
+
+def is_placeholder_name(name: str) -> bool:
+    return normalized_name(name) in PLACEHOLDER_NAMES
+
+def normalized_name(name: str) -> str:
+    """Blocking key: 'Dr. José  SMITH' -> 'jose smith'."""
+    return " ".join(name_tokens_list(name))
+
+def token_set(name: str) -> FrozenSet[str]:
+    """Order-independent signature: 'Smith, John' and 'John Smith' match."""
+    return frozenset(name_tokens_list(name))
+
+def initials_signature(name: str) -> Optional[str]:
+    """First-name initials plus surname: 'John Ronald Tolkien' and 'J. R. Tolkien' -> 'jr tolkien'."""
+    tokens = name_tokens_list(name)
+    if len(tokens) < 2:
+        return None
+    return "".join(token[0] for token in tokens[:-1]) + " " + tokens[-1]
+
+def soundex(word: str) -> str:
+    """American Soundex code of a word ('' if it has no letters)."""
+    letters = [char for char in word.lower() if "a" <= char <= "z"]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], "")
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+        # h and w do not separate letters with the same code; vowels do
+        if char not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+def phonetic_key(name: str) -> Optional[str]:
+    """
+    Soundex of the first and last name tokens. Digits are kept, so 'Smith 2' and 'Smith 3' differ.
+    None when a token has no Latin letters (e.g. Cyrillic or CJK names), since Soundex cannot code it.
+    """
+    tokens = name_tokens_list(name)
+    if not tokens or not soundex(tokens[0]) or not soundex(tokens[-1]):
+        return None
+    digits = "".join(char for char in "".join(tokens) if char.isdigit())
+    return " ".join([soundex(tokens[0]), soundex(tokens[-1]), digits]).strip()
+
+def lexical_score(name1: str, name2: str) -> float:
+    """
+    Cheap name similarity in [0, 1] used to pre-score duplicate candidates:
+    1.0 for the same normalized name, 0.95 for the same token set, 0.9 for the
+    same initials signature when one name is abbreviated, 0.75 for the same
+    phonetic key, otherwise token Jaccard or the character similarity of the
+    less similar of first and last names, whichever is higher.
+    """
+    key1, key2 = normalized_name(name1), normalized_name(name2)
+    if not key1 or not key2:
+        return 0.0
+    if key1 == key2:
+        return 1.0
+    tokens1, tokens2 = token_set(name1), token_set(name2)
+    if tokens1 == tokens2:
+        return 0.95
+    initials1, initials2 = initials_signature(name1), initials_signature(name2)
+    abbreviated = any(len(token) == 1 for token in tokens1 | tokens2)
+    if initials1 and initials1 == initials2 and abbreviated:
+        return 0.9
+    phonetic1 = phonetic_key(name1)
+    if phonetic1 is not None and phonetic1 == phonetic_key(name2):
+        return 0.75
+    jaccard = len(tokens1 & tokens2) / len(tokens1 | tokens2)
+    words1, words2 = key1.split(), key2.split()
+    if len(words1) < 2 or len(words2) < 2:
+        return max(jaccard, SequenceMatcher(None, key1, key2).ratio())
+    # Both first and last names must be alike; a shared first name alone is not enough
+    first = SequenceMatcher(None, words1[0], words2[0]).ratio()
+    last = SequenceMatcher(None, words1[-1], words2[-1]).ratio()
+    return max(jaccard, min(first, last))
@@ -0,0 +1,156 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence, Tuple
+from src.kg.store import quote_relationship_type
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def resolve_merge_pairs(pairs: Sequence[Tuple[int, int]]) -> Tuple[Dict[int, int], List[Tuple[int, int]]]:
+    """
+    Resolve (keep, duplicate) pairs into a final duplicate -> survivor mapping.
+
+    Pairs are applied in order, so chains collapse onto the first survivor:
+    (A, B) then (B, C) merges both B and C into A. If a pair's duplicate was
+    already merged into another survivor, the pair's keep entity joins that
+    survivor instead: (A, B) then (C, B) merges B and C into A, never A into C.
+    Pairs whose entities are already merged together (including (A, A) and
+    (B, A) after (A, B)) are skipped.
+
+    Returns:
+        (survivor_by_duplicate, skipped_pairs)
+    """
+    merged_into: Dict[int, int] = {}
+
+    def survivor(node_id: int) -> int:
+        while node_id in merged_into:
+            node_id = merged_into[node_id]
+        return node_id
+
+    skipped = []
+    for keep_id, duplicate_id in pairs:
+        keep_root = survivor(keep_id)
+        duplicate_root = survivor(duplicate_id)
+        if keep_root == duplicate_root:
+            skipped.append((keep_id, duplicate_id))
+            continue
+        if duplicate_root != duplicate_id:
+            # The duplicate already has a survivor from an earlier pair; keep that one
+            merged_into[keep_root] = duplicate_root
+        else:
+            merged_into[duplicate_root] = keep_root
+    return {duplicate_id: survivor(duplicate_id) for duplicate_id in merged_into}, skipped
+
+def merge_entities(
+    session,
+    pairs: Sequence[Tuple[int, int]],
+    project_id: int,
+    user_email: str,
+    current_time: str
+) -> Dict[str, Any]:
+    """
+    Merge duplicate Person nodes into the nodes to keep, in a single write transaction.
+
+    The duplicates' relationships are re-pointed at their survivors with one
+    UNWIND query per relationship type (self-loops created by the merge are
+    dropped, and existing relationships are reused), then all duplicates are
+    deleted with one query. If any entity is missing from the project nothing
+    is changed.
+
+    Args:
+        session: Neo4j session
+        pairs: (keep ID, duplicate ID) pairs; chains are resolved by resolve_merge_pairs
+        project_id: The ID of the project the entities belong to
+        user_email: Email of the user performing the merge
+        current_time: Timestamp used for the created/updated tracking fields
+
+    Returns:
+        Dictionary with the 'merged' {entity_id, merged_id} pairs, the 'skipped' pairs,
+        and 'relationships_transferred'
+    """
+    pairs = [(int(keep_id), int(duplicate_id)) for keep_id, duplicate_id in pairs]
+    survivor_by_duplicate, skipped = resolve_merge_pairs(pairs)
+    if survivor_by_duplicate:
+        result = session.execute_write(_merge_entities_tx, survivor_by_duplicate, project_id, user_email, current_time)
+    else:
+        result = {"merged": [], "relationships_transferred": 0}
+    result["skipped"] = [{"entity_id": str(keep_id), "duplicate_id": str(duplicate_id)} for keep_id, duplicate_id in skipped]
+    return result
+
+def _merge_entities_tx(tx, survivor_by_duplicate, project_id, user_email, current_time):
+    # Verify every entity exists in the project before changing anything
+    node_ids = set(survivor_by_duplicate) | set(survivor_by_duplicate.values())
+    found = tx.run(
+        """
+        MATCH (p:Person {project_id: $project_id}) WHERE ID(p) IN $ids
+        RETURN collect(ID(p)) as ids
+        """,
+        project_id=project_id,
+        ids=list(node_ids)
+    ).single()["ids"]
+    missing = sorted(node_ids - set(found))
+    if missing:
+        raise ValueError(f"Entities {', '.join(map(str, missing))} not found in project {project_id}")
+
+    # All relationships touching a duplicate, in either direction (DISTINCT, since
+    # a relationship between two duplicates matches once from each end)
+    records = tx.run(
+        """
+        MATCH (dup:Person {project_id: $project_id})-[r {project_id: $project_id}]-(other:Person {project_id: $project_id})
+        WHERE ID(dup) IN $duplicate_ids
+        RETURN DISTINCT ID(r) as id, ID(startNode(r)) as source, ID(endNode(r)) as target, type(r) as rel_type
+        """,
+        project_id=project_id,
+        duplicate_ids=list(survivor_by_duplicate)
+    ).data()
+
+    # Re-point both endpoints at their survivors and group by type,
+    # since a relationship type cannot be a query parameter
+    rows_by_type = defaultdict(set)
+    for record in records:
+        source = survivor_by_duplicate.get(record["source"], record["source"])
+        target = survivor_by_duplicate.get(record["target"], record["target"])
+        if source == target:
+            continue
+        rows_by_type[record["rel_type"]].add((source, target))
+
+    transferred = 0
+    for rel_type, rows in rows_by_type.items():
+        tx.run(
+            f"""
+            UNWIND $rows AS row
+            MATCH (keep:Person) WHERE ID(keep) = row.source
+            MATCH (other:Person) WHERE ID(other) = row.target
+            MERGE (keep)-[r:{quote_relationship_type(rel_type)}]->(other)
+            ON CREATE SET r.project_id = $project_id,
+                          r.created_by = $user_email,
+                          r.created_at = $current_time,
+                          r.updated_by = $user_email,
+                          r.updated_at = $current_time
+            """,
+            rows=[{"source": source, "target": target} for source, target in rows],
+            project_id=project_id,
+            user_email=user_email,
+            current_time=current_time
+        ).consume()
+        transferred += len(rows)
+
+    tx.run(
+        """
+        UNWIND $duplicate_ids AS duplicate_id
+        MATCH (dup:Person {project_id: $project_id}) WHERE ID(dup) = duplicate_id
+        DETACH DELETE dup
+        """,
+        project_id=project_id,
+        duplicate_ids=list(survivor_by_duplicate)
+    ).consume()
+
+    logger.info(f"Merged {len(survivor_by_duplicate)} entities, transferring {transferred} relationships")
+    return {
+        "merged": [
+            {"entity_id": str(keep_id), "merged_id": str(duplicate_id)}
+            for duplicate_id, keep_id in survivor_by_duplicate.items()
+        ],
+        "relationships_transferred": transferred
+    }
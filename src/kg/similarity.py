@@ -0,0 +1,152 @@
+import os
+import logging
+from typing import List, Optional
+import numpy as np
+from src.kg.deduplicate import CandidatePair, EntityNode, candidate_pairs_from_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Embeddings fetched from Neo4j per query while building the matrix
+SIMILARITY_CHUNK_SIZE = int(os.getenv("SIMILARITY_CHUNK_SIZE", "2000"))
+# Upper bound on the number of similarity scores held in memory per tile (float32)
+SIMILARITY_TILE_ELEMENTS = int(os.getenv("SIMILARITY_TILE_ELEMENTS", str(16 * 1024 * 1024)))
+
+class EmbeddingMatrix:
+    """
+    A project's Person embeddings as one L2-normalized float32 matrix,
+    plus the node ids, names and descriptions for each row.
+    """
+
+    def __init__(self, ids: List[int], names: List[str], descriptions: List[str], vectors: np.ndarray):
+        self.ids = ids
+        self.names = names
+        self.descriptions = descriptions
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.vectors = vectors / norms
+        self.row_by_id = {str(node_id): row for row, node_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+def load_project_embeddings(session, project_id: int, chunk_size: Optional[int] = None) -> EmbeddingMatrix:
+    """
+    Stream a project's embeddings out of Neo4j in chunks (keyset-paginated by node id)
+    into a preallocated float32 matrix.
+    """
+    chunk_size = chunk_size or SIMILARITY_CHUNK_SIZE
+    count_record = session.run(
+        "MATCH (p:Person {project_id: $project_id}) WHERE p.embedding IS NOT NULL RETURN count(p) as count",
+        project_id=project_id
+    ).single()
+    capacity = count_record["count"] if count_record else 0
+
+    ids, names, descriptions = [], [], []
+    vectors = None
+    dimensions = None
+    skipped = 0
+    last_id = -1
+    while True:
+        records = session.run(
+            """
+            MATCH (p:Person {project_id: $project_id})
+            WHERE p.embedding IS NOT NULL AND ID(p) > $last_id
+            RETURN ID(p) as id, p.name as name, p.description as description, p.embedding as embedding
+            ORDER BY ID(p)
+            LIMIT $limit
+            """,
+            project_id=project_id,
+            last_id=last_id,
+            limit=chunk_size
+        ).data()
+        if not records:
+            break
+        last_id = records[-1]["id"]
+        for record in records:
+            embedding = record["embedding"]
+            if dimensions is None:
+                dimensions = len(embedding)
+                vectors = np.empty((max(capacity, 1), dimensions), dtype=np.float32)
+            if len(embedding) != dimensions:
+                # Left over from a different embedding model; cannot be compared
+                skipped += 1
+                continue
+            row = len(ids)
+            if row >= vectors.shape[0]:
+                # Nodes were added since the count; grow the matrix
+                vectors = np.concatenate([vectors, np.empty_like(vectors)])
+            vectors[row] = embedding
+            ids.append(record["id"])
+            names.append(record["name"] or "Unknown")
+            descriptions.append(record["description"] or "")
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} embeddings in project {project_id} with dimensions other than {dimensions}")
+    if vectors is None:
+        vectors = np.empty((0, 0), dtype=np.float32)
+    logger.info(f"Loaded {len(ids)} embeddings for project {project_id} into a similarity matrix")
+    return EmbeddingMatrix(ids, names, descriptions, vectors[:len(ids)])
+
+def similar_entity_rows(matrix: EmbeddingMatrix, entity_ids: List[str], similarity_threshold: float, top_n: int = 40) -> List[dict]:
+    """
+    Exact top N neighbours for each entity using blocked matrix-multiply cosine similarity.
+
+    Scores use the same scale as Neo4j's cosine vector index, (1 + cosine) / 2,
+    so SIMILARITY_THRESHOLD means the same thing for both backends.
+
+    Returns:
+        Rows in the get_vector_candidate_rows format ('entity_id', 'id', 'name',
+        'description', 'score'), ordered by input entity and then by descending score
+    """
+    query_rows = [matrix.row_by_id[entity_id] for entity_id in entity_ids if entity_id in matrix.row_by_id]
+    total = len(matrix)
+    k = min(top_n, total - 1)
+    if not query_rows or k <= 0:
+        return []
+
+    rows = []
+    # Bound memory: each tile holds tile_size x total scores
+    tile_size = max(1, SIMILARITY_TILE_ELEMENTS // total)
+    for start in range(0, len(query_rows), tile_size):
+        tile = np.asarray(query_rows[start:start + tile_size])
+        scores = matrix.vectors[tile] @ matrix.vectors.T
+        scores = (scores + 1.0) / 2.0
+        # Exclude each entity from its own results
+        scores[np.arange(len(tile)), tile] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for query_row, neighbours, neighbour_scores in zip(tile, top, top_scores):
+            entity_id = matrix.ids[query_row]
+            for neighbour, score in zip(neighbours, neighbour_scores):
+                if score <= similarity_threshold:
+                    break
+                rows.append({
+                    "entity_id": entity_id,
+                    "id": matrix.ids[neighbour],
+                    "name": matrix.names[neighbour],
+                    "description": matrix.descriptions[neighbour],
+                    "score": float(score)
+                })
+    return rows
+
+def get_matrix_candidate_pairs(
+    session,
+    entities: List[EntityNode],
+    project_id: int,
+    similarity_threshold: float,
+    top_n: int = 40,
+    matrix: Optional[EmbeddingMatrix] = None
+) -> List[CandidatePair]:
+    """
+    In-process alternative to get_vector_candidate_pairs: loads the project's
+    embeddings once (unless a matrix is given) and computes candidates with NumPy.
+    """
+    if matrix is None:
+        matrix = load_project_embeddings(session, project_id)
+    rows = similar_entity_rows(matrix, [entity.id for entity in entities], similarity_threshold, top_n)
+    return candidate_pairs_from_rows(entities, rows)
@@ -0,0 +1,176 @@
+import logging
+from collections import defaultdict
+from typing import List, Optional, Dict, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def neo4j_relationship_type(label: str) -> str:
+    """Convert a relationship label (e.g. 'friend of') to a Neo4j relationship type ('friend_of')."""
+    return label.replace(' ', '_')
+
+def quote_relationship_type(rel_type: str) -> str:
+    """Backtick-quote a relationship type so it can be interpolated into Cypher safely."""
+    return "`" + rel_type.replace("`", "``") + "`"
+
+def store_knowledge_graph(
+    session,
+    entities: List[Dict[str, Any]],
+    relationships: List[Dict[str, Any]],
+    project_id: int,
+    user_email: str,
+    current_time: str,
+    embeddings: Optional[List[Optional[List[float]]]] = None
+) -> Dict[str, Any]:
+    """
+    Store extracted entities and relationships in a single write transaction.
+
+    All Person nodes are created with one UNWIND query, and relationships with
+    one UNWIND query per relationship type, instead of several round trips per row.
+
+    Args:
+        session: Neo4j session
+        entities: Extracted entities ('entity_id', 'label', 'description')
+        relationships: Extracted relationships ('source_id', 'target_id', 'label')
+        project_id: The ID of the project to store the graph in
+        user_email: Email of the user storing the graph
+        current_time: Timestamp used for the created/updated tracking fields
+        embeddings: Optional embedding per entity (same order as entities)
+
+    Returns:
+        Dictionary with the stored 'entities' and 'relationships'
+    """
+    return session.execute_write(
+        _store_knowledge_graph_tx,
+        entities,
+        relationships,
+        project_id,
+        user_email,
+        current_time,
+        embeddings
+    )
+
+def _store_knowledge_graph_tx(tx, entities, relationships, project_id, user_email, current_time, embeddings):
+    # Get the count of existing Person nodes *within the project* to use as an offset
+    count_record = tx.run(
+        "MATCH (p:Person {project_id: $project_id}) RETURN COUNT(p) as count",
+        project_id=project_id
+    ).single()
+    offset = count_record["count"] if count_record else 0
+
+    # Create a mapping between original entity IDs and new entity IDs
+    id_mapping = {}
+    entity_rows = []
+    for i, entity in enumerate(entities):
+        original_entity_id = entity["entity_id"]
+        new_entity_id = str(int(offset) + i + 1)  # +1 to avoid starting at 0
+        id_mapping[original_entity_id] = new_entity_id
+        entity_rows.append({
+            "entity_id": new_entity_id,
+            "original_entity_id": original_entity_id,
+            "name": entity["label"],
+            "description": entity["description"],
+            "embedding": embeddings[i] if embeddings else None
+        })
+
+    # Create all entities in one query
+    stored_entities = []
+    node_ids = {}
+    if entity_rows:
+        result = tx.run(
+            """
+            UNWIND $rows AS row
+            CREATE (p:Person {
+                entity_id: row.entity_id,
+                original_entity_id: row.original_entity_id,
+                name: row.name,
+                description: row.description,
+                project_id: $project_id,
+                created_by: $user_email,
+                created_at: $current_time,
+                updated_by: $user_email,
+                updated_at: $current_time,
+                embedding: row.embedding
+            })
+            RETURN ID(p) as id, p.entity_id as entity_id, p.original_entity_id as original_entity_id,
+                   p.name as name, p.description as description
+            """,
+            rows=entity_rows,
+            project_id=project_id,
+            user_email=user_email,
+            current_time=current_time
+        )
+        for record in result:
+            node_ids[record["entity_id"]] = record["id"]
+            stored_entities.append({
+                "id": str(record["id"]),
+                "entity_id": record["entity_id"] or "",
+                "original_entity_id": record["original_entity_id"] or "",
+                "name": record["name"] or "",
+                "description": record["description"] or ""
+            })
+
+    # Group relationships by type, since a relationship type cannot be a query parameter
+    rows_by_type = defaultdict(list)
+    for index, rel in enumerate(relationships):
+        original_source_id = rel["source_id"]
+        original_target_id = rel["target_id"]
+
+        # Skip if either source or target is not in the mapping
+        if original_source_id not in id_mapping or original_target_id not in id_mapping:
+            logger.warning(f"Skipping relationship: source {original_source_id} or target {original_target_id} not found in mapping")
+            continue
+
+        rel_type = neo4j_relationship_type(rel["label"] or "")
+        if not rel_type:
+            logger.warning(f"Skipping relationship with empty label: {original_source_id} -> {original_target_id}")
+            continue
+
+        rows_by_type[rel_type].append({
+            "index": index,
+            "source": node_ids[id_mapping[original_source_id]],
+            "target": node_ids[id_mapping[original_target_id]]
+        })
+
+    # Create relationships, one query per relationship type
+    created_indexes = set()
+    for rel_type, rows in rows_by_type.items():
+        result = tx.run(
+            f"""
+            UNWIND $rows AS row
+            MATCH (p1:Person) WHERE ID(p1) = row.source
+            MATCH (p2:Person) WHERE ID(p2) = row.target
+            CREATE (p1)-[r:{quote_relationship_type(rel_type)} {{
+                project_id: $project_id,
+                created_by: $user_email,
+                created_at: $current_time,
+                updated_by: $user_email,
+                updated_at: $current_time
+            }}]->(p2)
+            RETURN row.index as index
+            """,
+            rows=rows,
+            project_id=project_id,
+            user_email=user_email,
+            current_time=current_time
+        )
+        created_indexes.update(record["index"] for record in result)
+
+    # Report stored relationships in request order
+    stored_relationships = []
+    for index, rel in enumerate(relationships):
+        if index not in created_indexes:
+            continue
+        stored_relationships.append({
+            "source_id": id_mapping[rel["source_id"]],
+            "target_id": id_mapping[rel["target_id"]],
+            "original_source_id": rel["source_id"],
+            "original_target_id": rel["target_id"],
+            "label": rel["label"]
+        })
+
+    return {
+        "entities": stored_entities,
+        "relationships": stored_relationships
+    }